@@ -0,0 +1,327 @@
+"""
+Calcul hors ligne des bilans d'un grand nombre d'événements, sur plusieurs cœurs
+
+Les événements sont lus en flux depuis un fichier (NDJSON, CSV ou XLSX, au
+format de l'import : une ligne = un événement et ses sections) ou depuis
+MongoDB (MONGO_URL, DB_NAME), puis répartis par lots entre les processus d'un
+ProcessPoolExecutor. Chaque processus charge une seule fois les hypothèses
+(snapshot) et calcule avec le moteur de GET /api/calculate
+(calculate_general_fields puis compute_emission_result).
+
+Les résultats sont écrits en NDJSON dans l'ordre de la source : un
+EmissionResult par événement (avec "row", le numéro de ligne, pour un
+fichier), ou {"row"/"event_id", "errors"} si l'événement est invalide ou la
+ligne illisible (JSON incorrect).
+Après chaque lot écrit, un point de reprise (<sortie>.checkpoint) enregistre
+la position atteinte ; --resume reprend après une interruption, la sortie
+étant tronquée au dernier lot complet.
+
+Usage (depuis backend/) :
+    python -m batch_compute evenements.ndjson --output bilans.ndjson [--workers 8]
+    python -m batch_compute --mongo [--event-type Evenement_culturel] --output bilans.ndjson --resume
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, IO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from calculation_engine import calculate_general_fields
+from emissions import compute_emission_result
+from event_import import (
+    ImportFormatError,
+    build_import_footprint,
+    check_header,
+    detect_format,
+    format_errors,
+    iter_rows,
+)
+from hypotheses_snapshot import HYPOTHESES_DIR
+from hypotheses_store import HypothesesVersion, load_version
+from repository import EVENT_SORT, attach_sections, build_footprint
+
+CHUNK_SIZE = 500
+NDJSON = "ndjson"
+CHECKPOINT_FORMAT = 1
+
+# Hypothèses du processus de calcul, chargées une fois par _init_worker
+_version: Optional[HypothesesVersion] = None
+
+
+class InvalidRow(NamedTuple):
+    """Ligne illisible de la source, signalée dans les résultats sans arrêter le calcul"""
+    error: str
+
+
+# ==================== PROCESSUS DE CALCUL ====================
+
+def _init_worker(directory: str):
+    global _version
+    # Facteurs absents déjà signalés par le processus principal
+    logging.getLogger("factor_table").setLevel(logging.ERROR)
+    _version = load_version(Path(directory))
+
+
+def _result_line(footprint, key: Dict[str, Any]) -> str:
+    calculate_general_fields(footprint.event, _version.general)
+    result = compute_emission_result(footprint, _version.factors)
+    return json.dumps({**key, **result.model_dump(mode="json")}, ensure_ascii=False) + "\n"
+
+
+def _error_line(key: Dict[str, Any], errors: List[str]) -> str:
+    return json.dumps({**key, "errors": errors}, ensure_ascii=False) + "\n"
+
+
+def compute_rows(rows: List[Tuple[int, Union[Dict[str, Any], InvalidRow]]], check_columns: bool) -> Tuple[str, str]:
+    """Lot de lignes d'import (numéro, ligne) -> (version des hypothèses, lignes NDJSON)"""
+    lines = []
+    for number, row in rows:
+        key = {"row": number}
+        if isinstance(row, InvalidRow):
+            lines.append(_error_line(key, [row.error]))
+            continue
+        try:
+            # NDJSON : chaque ligne a ses propres colonnes
+            if check_columns:
+                check_header(list(row))
+            footprint = build_import_footprint(row)
+        except ValidationError as e:
+            lines.append(_error_line(key, format_errors(e)))
+            continue
+        except ImportFormatError as e:
+            lines.append(_error_line(key, [str(e)]))
+            continue
+        lines.append(_result_line(footprint, key))
+    return _version.version_id, "".join(lines)
+
+
+def compute_docs(docs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Tuple[str, str]:
+    """Lot de documents MongoDB (événement, sections) -> (version des hypothèses, lignes NDJSON)"""
+    lines = []
+    for event_doc, section_docs in docs:
+        try:
+            footprint = build_footprint(event_doc, section_docs)
+        except ValidationError as e:
+            lines.append(_error_line({"event_id": event_doc.get("id")}, format_errors(e)))
+            continue
+        lines.append(_result_line(footprint, {}))
+    return _version.version_id, "".join(lines)
+
+
+# ==================== SOURCES ====================
+
+def iter_ndjson_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Union[Dict[str, Any], InvalidRow]]]:
+    """Un objet JSON par ligne ; une ligne illisible devient InvalidRow"""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:   # JSONDecodeError ou UTF-8 invalide
+            yield number, InvalidRow(f"JSON invalide: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield number, InvalidRow("Objet JSON attendu")
+            continue
+        yield number, row
+
+
+def iter_file_chunks(path: str, chunk_size: int, skip: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """Lots de (numéro de ligne, ligne), après les `skip` premiers événements"""
+    file_format = NDJSON if path.lower().endswith((".ndjson", ".jsonl")) else detect_format(path)
+    with open(path, "rb") as f:
+        if file_format == NDJSON:
+            rows = iter_ndjson_rows(f)
+        else:
+            # En-tête en ligne 1, comme dans le rapport d'import
+            rows = enumerate(iter_rows(f, file_format), start=2)
+        chunk = []
+        for index, item in enumerate(rows):
+            if index < skip:
+                continue
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+async def file_chunks(path: str, chunk_size: int, skip: int) -> AsyncIterator[Tuple[list, Any]]:
+    """(lot, clé de reprise) ; lecture hors de la boucle d'événements"""
+    chunks = iter_file_chunks(path, chunk_size, skip)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk, None
+
+
+async def mongo_chunks(
+    repository, chunk_size: int, event_type: Optional[str], after: Optional[List[str]]
+) -> AsyncIterator[Tuple[list, Any]]:
+    """Événements triés par (created_at, id) avec leurs sections (get_sections), après la clé `after`"""
+    query: Dict[str, Any] = {"event_type": event_type} if event_type else {}
+    if after:
+        created_at, event_id = after
+        query["$or"] = [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "id": {"$gt": event_id}},
+        ]
+    fields = [field for field, _ in EVENT_SORT]
+
+    async def chunk(events: List[Dict[str, Any]]) -> Tuple[list, List[str]]:
+        key = [events[-1][field] for field in fields]
+        sections = await repository.get_sections([event["id"] for event in events])
+        return attach_sections(events, sections), key
+
+    batch = []
+    async for event in repository.iter_events(batch_size=chunk_size, query=query):
+        batch.append(event)
+        if len(batch) >= chunk_size:
+            yield await chunk(batch)
+            batch = []
+    if batch:
+        yield await chunk(batch)
+
+
+# ==================== POINT DE REPRISE ====================
+
+def read_checkpoint(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Format du point de reprise non pris en charge: {checkpoint.get('format')}")
+    return checkpoint
+
+
+def write_checkpoint(path: Path, checkpoint: Dict[str, Any]):
+    """Remplacement atomique : un arrêt pendant l'écriture laisse le point précédent"""
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+# ==================== EXÉCUTION ====================
+
+async def run(args) -> Dict[str, Any]:
+    if args.mongo:
+        source = f"mongo?event_type={args.event_type}" if args.event_type else "mongo"
+    else:
+        source = os.path.abspath(args.input)
+    version = load_version(Path(args.hypotheses))
+    output_path = Path(args.output)
+    checkpoint_path = Path(args.checkpoint or f"{args.output}.checkpoint")
+
+    checkpoint = read_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint:
+        if checkpoint["source"] != source:
+            raise ValueError(f"Le point de reprise concerne une autre source: {checkpoint['source']}")
+        if checkpoint["version_id"] != version.version_id:
+            raise ValueError("Les hypothèses ont changé depuis le début du calcul ; relancer sans --resume")
+    else:
+        checkpoint = {
+            "format": CHECKPOINT_FORMAT, "source": source, "version_id": version.version_id,
+            "events": 0, "output_bytes": 0, "after": None,
+        }
+
+    repository = None
+    if args.mongo:
+        from dotenv import load_dotenv
+
+        from repository import MongoEventRepository
+
+        load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+        repository = MongoEventRepository.from_url(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+        chunks = mongo_chunks(repository, args.chunk_size, args.event_type, checkpoint["after"])
+        compute = compute_docs
+    else:
+        chunks = file_chunks(args.input, args.chunk_size, checkpoint["events"])
+        compute = partial(compute_rows, check_columns=args.input.lower().endswith((".ndjson", ".jsonl")))
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    computed = 0
+    # Sortie tronquée à la fin du dernier lot enregistré dans le point de reprise
+    output = open(output_path, "r+b" if checkpoint["output_bytes"] else "wb")
+    output.truncate(checkpoint["output_bytes"])
+    output.seek(checkpoint["output_bytes"])
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.hypotheses,)) as pool:
+            # Lots en cours, dans l'ordre de la source : au plus 2 par processus
+            pending = deque()
+            max_pending = 2 * (args.workers or os.cpu_count() or 1)
+
+            async def write_next():
+                nonlocal computed
+                future, size, after = pending.popleft()
+                version_id, lines = await future
+                if version_id != version.version_id:
+                    raise RuntimeError("Hypothèses différentes dans un processus de calcul (fichiers modifiés ?)")
+                output.write(lines.encode("utf-8"))
+                output.flush()
+                os.fsync(output.fileno())
+                computed += size
+                checkpoint.update(
+                    events=checkpoint["events"] + size, output_bytes=output.tell(), after=after or checkpoint["after"],
+                )
+                write_checkpoint(checkpoint_path, checkpoint)
+
+            async for chunk, after in chunks:
+                pending.append((loop.run_in_executor(pool, compute, chunk), len(chunk), after))
+                if len(pending) >= max_pending:
+                    await write_next()
+            while pending:
+                await write_next()
+    finally:
+        output.close()
+        if repository:
+            repository.close()
+
+    elapsed = time.perf_counter() - start
+    # Calcul terminé : plus rien à reprendre
+    checkpoint_path.unlink(missing_ok=True)
+    return {"events": checkpoint["events"], "computed": computed, "elapsed_s": elapsed, "version_id": version.version_id}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcul des bilans par lots, sur plusieurs processus")
+    parser.add_argument("input", nargs="?", help="fichier NDJSON, CSV ou XLSX au format de l'import")
+    parser.add_argument("--mongo", action="store_true", help="lire les événements dans MongoDB (MONGO_URL, DB_NAME)")
+    parser.add_argument("--event-type", help="avec --mongo : ne calculer que ce type d'événement")
+    parser.add_argument("--output", required=True, help="fichier NDJSON des résultats")
+    parser.add_argument("--workers", type=int, help="processus de calcul (défaut : nombre de cœurs)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="événements par lot")
+    parser.add_argument("--checkpoint", help="point de reprise (défaut : <sortie>.checkpoint)")
+    parser.add_argument("--resume", action="store_true", help="reprendre au dernier point de reprise")
+    parser.add_argument("--hypotheses", default=str(HYPOTHESES_DIR), help="répertoire des hypothèses")
+    args = parser.parse_args()
+    if bool(args.input) == args.mongo:
+        parser.error("indiquer un fichier d'entrée ou --mongo")
+
+    try:
+        summary = asyncio.run(run(args))
+    except (ValueError, ImportFormatError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        raise SystemExit(1)
+    rate = summary["computed"] / summary["elapsed_s"] if summary["elapsed_s"] else 0
+    print(f"✓ {summary['computed']} événements calculés en {summary['elapsed_s']:.1f} s ({rate:.0f}/s), "
+          f"{summary['events']} au total (hypothèses {summary['version_id'][:12]}) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
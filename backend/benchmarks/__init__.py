@@ -0,0 +1,12 @@
+"""
+Benchmarks hors ligne (suite), test de charge HTTP (load_test) et accès MongoDB
+(fetch_footprint). Dépendances supplémentaires : requirements-dev.txt.
+"""
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Centile `pct` (0-100) par rang le plus proche"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,108 @@
+"""
+Benchmark de latence du chargement d'un événement pour /api/calculate/{event_id}
+
+Compare l'ancien chemin (10 find_one séquentiels) au $lookup unique et aux
+requêtes concurrentes. Nécessite une instance MongoDB (MONGO_URL) ; les données
+sont écrites dans une base temporaire supprimée à la fin.
+
+Usage (depuis backend/) :
+    python -m benchmarks.fetch_footprint --events 50 --iterations 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import percentile
+from models import EventGeneral
+from repository import SECTION_MODELS, MongoEventRepository, build_footprint
+
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+
+async def get_footprint_serial(db, event_id):
+    """Chemin historique : un find_one par collection, l'un après l'autre"""
+    event_doc = await db.events.find_one({"id": event_id}, {"_id": 0})
+    if not event_doc:
+        return None
+    section_docs = {}
+    for collection in SECTION_MODELS:
+        section_docs[collection] = await db[collection].find_one({"event_id": event_id}, {"_id": 0})
+    return build_footprint(event_doc, section_docs)
+
+
+async def seed(db, count):
+    """Créer `count` événements complets, chaque section saisie"""
+    event_ids = []
+    for i in range(count):
+        event = EventGeneral(
+            event_name=f"Benchmark {i}",
+            event_type="Evenement_culturel",
+            event_duration_days=2,
+            total_visitors=1000,
+        )
+        doc = event.model_dump()
+        doc['created_at'] = doc['created_at'].isoformat()
+        doc['updated_at'] = doc['updated_at'].isoformat()
+        await db.events.insert_one(doc)
+        for collection, model in SECTION_MODELS.items():
+            extra = {"approach": "real"} if collection == "energy" else {}
+            section_doc = model(event_id=event.id, **extra).model_dump()
+            section_doc['created_at'] = section_doc['created_at'].isoformat()
+            await db[collection].insert_one(section_doc)
+        event_ids.append(event.id)
+    return event_ids
+
+
+async def measure(fetch, event_ids, iterations):
+    samples = []
+    for i in range(iterations):
+        event_id = event_ids[i % len(event_ids)]
+        start = time.perf_counter()
+        await fetch(event_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def main(args):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[f"{os.environ.get('DB_NAME', 'calculateur')}_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        event_ids = await seed(db, args.events)
+
+        lookup_repo = MongoEventRepository(db)
+        concurrent_repo = MongoEventRepository(db)
+        concurrent_repo.use_lookup = False
+
+        strategies = {
+            "serial find_one (actuel)": lambda event_id: get_footprint_serial(db, event_id),
+            "$lookup unique": lookup_repo.get_footprint,
+            "asyncio.gather": concurrent_repo.get_footprint,
+        }
+
+        print(f"{'stratégie':<28}{'moy.':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+        for name, fetch in strategies.items():
+            await measure(fetch, event_ids, min(50, args.iterations))  # échauffement
+            samples = await measure(fetch, event_ids, args.iterations)
+            print(
+                f"{name:<28}{statistics.mean(samples):>9.2f}{percentile(samples, 50):>9.2f}"
+                f"{percentile(samples, 95):>9.2f}{percentile(samples, 99):>9.2f}"
+            )
+        if not lookup_repo.use_lookup:
+            print("⚠ $lookup non supporté par ce serveur : repli sur asyncio.gather")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50, help="nombre d'événements créés")
+    parser.add_argument("--iterations", type=int, default=500, help="chargements mesurés par stratégie")
+    asyncio.run(main(parser.parse_args()))
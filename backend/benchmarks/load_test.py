@@ -0,0 +1,230 @@
+"""
+Test de charge HTTP : parcours utilisateur simulés contre une instance uvicorn locale
+
+Chaque utilisateur virtuel enchaîne des parcours de saisie :
+    POST /api/events           création de l'événement
+    POST /api/<section>        chaque section saisie, l'une après l'autre
+    POST /api/events/preview   prévisualisations du formulaire (--polls)
+    GET  /api/calculate/{id}   bilan
+Les événements sont tirés du générateur synthétique (synthetic_events.py).
+
+Sans --url, le serveur est lancé dans un sous-processus avec
+EVENT_REPOSITORY=memory : les données restent en mémoire, la mesure porte sur
+le coût de l'application seule (validation, calculs, sérialisation).
+--repository mongo le lance sur la base MONGO_URL / DB_NAME de backend/.env.
+
+Rapport : requêtes/s, p50/p95/p99 par route, erreurs, et retard de la boucle
+d'événements du serveur (LOOP_LAG_MONITOR, GET /api/loop-lag) et du client ;
+un retard élevé côté client signifie que le générateur de charge sature et
+que les latences mesurées sont surestimées.
+
+Usage (depuis backend/) :
+    python -m benchmarks.load_test --concurrency 20 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8001 --flows 500 --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks import percentile
+from event_import import split_row
+from loop_monitor import LoopLagMonitor
+from synthetic_events import DEFAULT_SEED, iter_rows
+
+BACKEND_DIR = Path(__file__).parent.parent
+STARTUP_TIMEOUT = 30.0
+# Événements distincts générés avant la mesure, réutilisés en boucle
+CORPUS_SIZE = 500
+
+
+class Recorder:
+    """Latences (s) et erreurs par route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies.setdefault(route, []).append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+            return None
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        routes = {}
+        for route, samples in self.latencies.items():
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "rps": len(samples) / elapsed,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+            }
+        return routes
+
+
+async def flow(client: httpx.AsyncClient, recorder: Recorder, row: Dict[str, Any], polls: int) -> bool:
+    """Un parcours de saisie complet ; False s'il a été interrompu par une erreur"""
+    event_fields, section_fields = split_row(row)
+    response = await recorder.call(client, "POST /api/events", "POST", "/api/events", json=event_fields)
+    if response is None:
+        return False
+    event_id = response.json()["id"]
+    for section, fields in section_fields.items():
+        response = await recorder.call(
+            client, f"POST /api/{section}", "POST", f"/api/{section}", json={"event_id": event_id, **fields},
+        )
+        if response is None:
+            return False
+    for _ in range(polls):
+        if await recorder.call(client, "POST /api/events/preview", "POST", "/api/events/preview", json=event_fields) is None:
+            return False
+    return await recorder.call(client, "GET /api/calculate/{event_id}", "GET", f"/api/calculate/{event_id}") is not None
+
+
+async def run_load(
+    base_url: str, rows: List[Dict[str, Any]], concurrency: int, duration: Optional[float], flows: Optional[int], polls: int,
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    client_monitor = LoopLagMonitor()
+    monitor_task = asyncio.create_task(client_monitor.run())
+    next_row = itertools.cycle(rows)
+    # Compteur partagé : --flows parcours au total, répartis entre les utilisateurs
+    remaining = itertools.count() if flows is None else iter(range(flows))
+    completed = failed = 0
+    started_at = time.time()
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    async def user(client: httpx.AsyncClient):
+        nonlocal completed, failed
+        for _ in remaining:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            if await flow(client, recorder, next(next_row), polls):
+                completed += 1
+            else:
+                failed += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        await asyncio.gather(*(user(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        response = await client.get("/api/loop-lag", params={"since": started_at})
+        server_lag = response.json() if response.status_code == 200 else None
+    monitor_task.cancel()
+
+    routes = recorder.report(elapsed)
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "concurrency": concurrency,
+        "polls": polls,
+        "elapsed_s": elapsed,
+        "flows": {"completed": completed, "failed": failed, "per_s": completed / elapsed},
+        "rps": sum(route["requests"] for route in routes.values()) / elapsed,
+        "routes": routes,
+        "loop_lag": {"server": server_lag, "client": client_monitor.stats(started_at)},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(repository: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "EVENT_REPOSITORY": repository, "LOOP_LAG_MONITOR": "1"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_ready(base_url: str, server: subprocess.Popen):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Le serveur s'est arrêté au démarrage (code {server.returncode})")
+            try:
+                if (await client.get("/api/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Serveur non prêt après {STARTUP_TIMEOUT:.0f} s")
+
+
+def print_report(report: Dict[str, Any]):
+    flows = report["flows"]
+    print(f"\n{flows['completed']} parcours en {report['elapsed_s']:.1f} s ({flows['per_s']:.1f}/s, "
+          f"{flows['failed']} en échec), {report['rps']:.0f} requêtes/s, {report['concurrency']} utilisateurs")
+    print(f"\n{'route':<34}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'erreurs':>9}  (ms)")
+    for route, stats in sorted(report["routes"].items()):
+        print(f"{route:<34}{stats['rps']:>9.1f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['p99_ms']:>9.2f}{stats['errors']:>9}")
+    print(f"\n{'retard de la boucle':<34}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for side, lag in report["loop_lag"].items():
+        if not lag or not lag["samples"]:
+            print(f"{side:<34}  indisponible (LOOP_LAG_MONITOR)")
+            continue
+        print(f"{side:<34}{lag['p50_ms']:>9.2f}{lag['p95_ms']:>9.2f}{lag['p99_ms']:>9.2f}{lag['max_ms']:>9.2f}")
+
+
+async def main(args) -> int:
+    rows = list(iter_rows(min(CORPUS_SIZE, args.flows or CORPUS_SIZE), args.seed))
+    server = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(args.repository, port)
+    try:
+        if server:
+            await wait_ready(base_url, server)
+        duration = None if args.flows else args.duration
+        report = await run_load(base_url, rows, args.concurrency, duration, args.flows, args.polls)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report["repository"] = args.repository if server else None
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 1 if report["flows"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="instance déjà lancée (sinon un serveur local est démarré)")
+    parser.add_argument("--repository", choices=("memory", "mongo"), default="memory",
+                        help="stockage du serveur lancé par le test")
+    parser.add_argument("--concurrency", type=int, default=20, help="utilisateurs virtuels simultanés")
+    parser.add_argument("--duration", type=float, default=30.0, help="durée du test (s)")
+    parser.add_argument("--flows", type=int, help="nombre total de parcours (remplace --duration)")
+    parser.add_argument("--polls", type=int, default=3, help="prévisualisations par parcours")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="graine du générateur d'événements")
+    parser.add_argument("--output", help="fichier JSON du rapport")
+    sys.exit(asyncio.run(main(parser.parse_args())))
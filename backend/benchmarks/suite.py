@@ -0,0 +1,252 @@
+"""
+Suite de benchmarks hors ligne du moteur et des routes critiques de l'API
+
+Tout s'exécute dans le processus, sans réseau ni MongoDB :
+- calculate_event_fields et chaque fonction calculate_*_emissions, sur un cas du
+  snapshot de non-régression (regression_snapshot/cases.json) dont toutes les
+  sections sont saisies ;
+- le coût de démarrage : get_emission_factors() (lecture des JSON) et
+  load_version() (lecture et compilation de la table des facteurs) ;
+- les routes POST /api/events/preview et GET /api/calculate/{event_id} (cache
+  vide puis cache chaud), via un client ASGI httpx, la base étant remplacée
+  par mongomock-motor.
+
+Les résultats (µs : moyenne, p50, p95, p99, min) sont écrits en JSON. Avec
+--baseline, chaque p50 est comparé à celui du fichier de référence : une
+hausse au-delà du seuil du benchmark (et de plus d'une microseconde) est
+signalée et le code de sortie vaut 1.
+benchmarks/baseline.json est la référence versionnée ; la régénérer avec
+--update-baseline quand un changement de performance est voulu, le diff du
+fichier le montre alors à la revue. Les temps dépendent de la machine : ne
+comparer que des mesures prises sur la même machine.
+
+Usage (depuis backend/) :
+    python -m benchmarks.suite [--output results.json] [--baseline benchmarks/baseline.json]
+    python -m benchmarks.suite --only calculate --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from benchmarks import percentile
+from calculation_engine import calculate_general_fields
+from emissions import CATEGORY_CALCULATORS, calculate_category_emissions
+from hypotheses_loader import get_emission_factors
+from hypotheses_store import load_version
+from regression_snapshot import load_corpus
+from regression_snapshot.capture import build_case_footprint
+from repository import MongoEventRepository
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Hausse tolérée du p50 par rapport à la référence
+DEFAULT_THRESHOLD = 0.25
+# Routes : pile ASGI et base simulée, mesures plus bruitées
+ROUTE_THRESHOLD = 0.5
+# Chargement des hypothèses : accès disque
+STARTUP_THRESHOLD = 0.5
+# Écart absolu en deçà duquel une hausse est attribuée au bruit de mesure
+NOISE_FLOOR_US = 1.0
+
+# Cas de référence utilisé pour les fonctions de calcul et les routes
+GOLDEN_CASE = "Evenement_professionnel/Salon professionnel international/taux_inconnus"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], Any]
+    iterations: int
+    threshold: float = DEFAULT_THRESHOLD
+    # Appels par mesure (fonctions de l'ordre de la microseconde)
+    number: int = 1
+    # Appelé avant chaque mesure, hors du temps mesuré
+    before: Optional[Callable[[], Any]] = None
+    is_async: bool = False
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "mean_us": statistics.mean(samples),
+        "p50_us": percentile(samples, 50),
+        "p95_us": percentile(samples, 95),
+        "p99_us": percentile(samples, 99),
+        "min_us": min(samples),
+    }
+
+
+async def measure(benchmark: Benchmark, scale: float) -> Dict[str, Any]:
+    iterations = max(5, int(benchmark.iterations * scale))
+    warmup = max(1, iterations // 10)
+    samples = []
+    for i in range(warmup + iterations):
+        if benchmark.is_async:
+            if benchmark.before:
+                await benchmark.before()
+            start = time.perf_counter()
+            await benchmark.run()
+        else:
+            if benchmark.before:
+                benchmark.before()
+            start = time.perf_counter()
+            for _ in range(benchmark.number):
+                benchmark.run()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed * 1e6 / benchmark.number)
+    return {"iterations": iterations, "threshold": benchmark.threshold, **summarize(samples)}
+
+
+# ==================== MOTEUR ====================
+
+def engine_benchmarks() -> List[Benchmark]:
+    case = next(case for case in load_corpus()["cases"] if case["name"] == GOLDEN_CASE)
+    footprint = build_case_footprint(case["input"])
+    factors = server.hypotheses_store.current.factors
+    event = server.calculate_event_fields(footprint.event)
+
+    benchmarks = [
+        Benchmark("calculate_event_fields", lambda: server.calculate_event_fields(event), 500, number=100)
+    ]
+    for category, (section, calculate, _) in CATEGORY_CALCULATORS.items():
+        doc = getattr(footprint, section)
+        benchmarks.append(Benchmark(
+            calculate.__name__,
+            lambda category=category, doc=doc: calculate_category_emissions(category, event, doc, factors),
+            500,
+            number=200,
+        ))
+    return benchmarks
+
+
+def startup_benchmarks() -> List[Benchmark]:
+    return [
+        Benchmark("get_emission_factors", get_emission_factors, 50, STARTUP_THRESHOLD),
+        Benchmark("load_version", load_version, 50, STARTUP_THRESHOLD),
+    ]
+
+
+# ==================== ROUTES ====================
+
+async def route_benchmarks(stack) -> List[Benchmark]:
+    # Base simulée à la place de MongoDB (pas de $lookup : requêtes concurrentes)
+    server.repository = MongoEventRepository(AsyncMongoMockClient()["benchmarks"])
+    server.repository.use_lookup = False
+
+    case = next(case for case in load_corpus()["cases"] if case["name"] == GOLDEN_CASE)
+    footprint = build_case_footprint(case["input"])
+    calculate_general_fields(footprint.event, server.hypotheses_store.current.general)
+    await server.repository.insert_footprints([footprint])
+    event_id = footprint.event.id
+    preview_payload = {
+        field: value for field, value in case["input"]["event"].items() if field != "id"
+    }
+
+    # Pas de lifespan : les hooks de démarrage (index, surveillance) ne sont pas lancés
+    client = await stack.enter_async_context(httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app), base_url="http://benchmarks",
+    ))
+
+    async def preview():
+        response = await client.post("/api/events/preview", json=preview_payload)
+        response.raise_for_status()
+
+    async def calculate():
+        response = await client.get(f"/api/calculate/{event_id}")
+        response.raise_for_status()
+
+    async def forget():
+        await server.result_cache.invalidate_event(event_id)
+        server.incremental_engine.forget(event_id)
+
+    return [
+        Benchmark("POST /api/events/preview", preview, 2000, ROUTE_THRESHOLD, is_async=True),
+        Benchmark("GET /api/calculate (cache vide)", calculate, 1000, ROUTE_THRESHOLD, before=forget, is_async=True),
+        Benchmark("GET /api/calculate (cache chaud)", calculate, 2000, ROUTE_THRESHOLD, is_async=True),
+    ]
+
+
+# ==================== RAPPORT ====================
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]) -> List[str]:
+    """Benchmarks dont le p50 dépasse la référence au-delà de leur seuil"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline["benchmarks"].get(name)
+        if not reference:
+            continue
+        ratio = result["p50_us"] / reference["p50_us"] - 1
+        if ratio > result["threshold"] and result["p50_us"] - reference["p50_us"] > NOISE_FLOOR_US:
+            regressions.append(
+                f"{name}: p50 {reference['p50_us']:.1f} µs -> {result['p50_us']:.1f} µs "
+                f"(+{ratio:.0%}, seuil +{result['threshold']:.0%})"
+            )
+    return regressions
+
+
+async def main(args) -> int:
+    # Facteurs absents signalés à chaque load_version(), une ligne par requête httpx
+    logging.getLogger("factor_table").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with AsyncExitStack() as stack:
+        benchmarks = engine_benchmarks() + startup_benchmarks() + await route_benchmarks(stack)
+        if args.only:
+            benchmarks = [benchmark for benchmark in benchmarks if args.only in benchmark.name]
+
+        results = {}
+        print(f"{'benchmark':<40}{'p50':>10}{'p95':>10}{'p99':>10}  (µs)")
+        for benchmark in benchmarks:
+            result = await measure(benchmark, args.scale)
+            results[benchmark.name] = result
+            print(f"{benchmark.name:<40}{result['p50_us']:>10.1f}{result['p95_us']:>10.1f}{result['p99_us']:>10.1f}")
+
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    status = 0
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        # --only : seules les entrées mesurées sont remplacées
+        report["benchmarks"] = {**baseline.get("benchmarks", {}), **results}
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Référence mise à jour : {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")))
+        for line in regressions:
+            print(f"✗ {line}")
+        if regressions:
+            status = 1
+        else:
+            print(f"✓ Aucune régression par rapport à {baseline_path}")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="résultats de référence")
+    parser.add_argument("--update-baseline", action="store_true", help="remplacer la référence par ces mesures")
+    parser.add_argument("--only", help="ne lancer que les benchmarks dont le nom contient ce texte")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplicateur du nombre d'itérations")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,8 +1,127 @@
 """
 Moteur de calcul reproduisant exactement les formules Excel
+
+Champs dérivés du module Général (visiteurs et exposants par origine). Les
+valeurs par défaut des taux inconnus proviennent des données OTCP des
+événements professionnels ('Paramètres et hypothèses'!A17:M26), indexées une
+fois au chargement des hypothèses par identifiant et par libellé de sous-type.
 """
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
 from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from models import EventGeneral
+
+PROFESSIONAL = "Evenement_professionnel"
+ATHLETES_ARTISTS_TYPES = ("Evenement_culturel", "Evenement_sportif")
+
+# Taux utilisés si le taux est inconnu et le sous-type absent des données OTCP
+DEFAULT_VISITORS_FOREIGN_SHARE = 0.5
+DEFAULT_VISITORS_IDF_SHARE = 0.12
+DEFAULT_ORGANIZATIONS_FOREIGN_SHARE = 0.5
+DEFAULT_ORGANIZATIONS_IDF_SHARE = 0.12
+
+# Personnes par entreprise exposante ('Paramètres et hypothèses'!B29 et B30)
+DEFAULT_PERSONS_PER_EXHIBITOR_NATIONAL = 5.0
+DEFAULT_PERSONS_PER_EXHIBITOR_FOREIGN = 4.1
+
+
+@dataclass(frozen=True)
+class OtcpProfile:
+    """Données OTCP d'un sous-type d'événement professionnel (parts entre 0 et 1)"""
+    id: str
+    label: str
+    avg_visitors: float
+    visitors_foreign_share: float
+    visitors_national_share: float
+    visitors_idf_share: float
+    avg_duration_days: float
+    exhibiting_organizations: float
+    organizations_foreign_share: float
+    organizations_national_share: float
+    organizations_idf_share: float
+    avg_exhibitors: float
+
+
+# Profil des sous-types inconnus
+DEFAULT_PROFILE = OtcpProfile(
+    id="",
+    label="",
+    avg_visitors=0,
+    visitors_foreign_share=DEFAULT_VISITORS_FOREIGN_SHARE,
+    visitors_national_share=1 - DEFAULT_VISITORS_FOREIGN_SHARE - DEFAULT_VISITORS_IDF_SHARE,
+    visitors_idf_share=DEFAULT_VISITORS_IDF_SHARE,
+    avg_duration_days=0,
+    exhibiting_organizations=0,
+    organizations_foreign_share=DEFAULT_ORGANIZATIONS_FOREIGN_SHARE,
+    organizations_national_share=1 - DEFAULT_ORGANIZATIONS_FOREIGN_SHARE - DEFAULT_ORGANIZATIONS_IDF_SHARE,
+    organizations_idf_share=DEFAULT_ORGANIZATIONS_IDF_SHARE,
+    avg_exhibitors=0,
+)
+
+
+@dataclass(frozen=True)
+class GeneralHypotheses:
+    """Hypothèses du module Général, indexées au chargement"""
+    profiles: Mapping[str, OtcpProfile]   # id et libellé -> profil
+    persons_per_exhibitor_national: float = DEFAULT_PERSONS_PER_EXHIBITOR_NATIONAL
+    persons_per_exhibitor_foreign: float = DEFAULT_PERSONS_PER_EXHIBITOR_FOREIGN
+
+    def profile(self, event_subtype: Optional[str]) -> OtcpProfile:
+        """RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;...) en O(1)"""
+        if not event_subtype:
+            return DEFAULT_PROFILE
+        return self.profiles.get(event_subtype, DEFAULT_PROFILE)
+
+
+def build_otcp_profile(row: Dict[str, Any]) -> OtcpProfile:
+    visitors_foreign = row.get("% visiteurs étrangers", DEFAULT_VISITORS_FOREIGN_SHARE)
+    visitors_idf = row.get("% visiteurs IDF", DEFAULT_VISITORS_IDF_SHARE)
+    organizations_foreign = row.get("% entreprises étrangères", DEFAULT_ORGANIZATIONS_FOREIGN_SHARE)
+    organizations_idf = row.get("% entreprises IDF", DEFAULT_ORGANIZATIONS_IDF_SHARE)
+    return OtcpProfile(
+        id=row["id"],
+        label=row.get("Données évènements professionnels", row["id"]),
+        avg_visitors=row.get("Nb de visiteurs moyen", 0),
+        visitors_foreign_share=visitors_foreign,
+        visitors_national_share=row.get("% visiteurs nationaux non IDF", 1 - visitors_foreign - visitors_idf),
+        visitors_idf_share=visitors_idf,
+        avg_duration_days=row.get("Durée moyenne", 0),
+        exhibiting_organizations=row.get("Nombre d'entreprises exposantes", 0),
+        organizations_foreign_share=organizations_foreign,
+        organizations_national_share=row.get(
+            "% entreprises nationales non IDF", 1 - organizations_foreign - organizations_idf
+        ),
+        organizations_idf_share=organizations_idf,
+        avg_exhibitors=row.get("Nombre d'exposants moyen", 0),
+    )
+
+
+def build_general_hypotheses(hypotheses: Dict[str, Any]) -> GeneralHypotheses:
+    """Indexer les données OTCP (hypotheses['general'] de compile_hypotheses)"""
+    general = hypotheses.get('general', {})
+
+    profiles = {}
+    for row in general.get('otcp', []):
+        profile = build_otcp_profile(row)
+        profiles[profile.id] = profile
+        # Le formulaire envoie le libellé du sous-type
+        profiles[profile.label] = profile
+
+    persons = {
+        row['id']: row['nombre_personnes_par_entreprise_exposante']
+        for row in general.get('personnes_par_exposant', [])
+    }
+    return GeneralHypotheses(
+        profiles=MappingProxyType(profiles),
+        persons_per_exhibitor_national=persons.get('nationale', DEFAULT_PERSONS_PER_EXHIBITOR_NATIONAL),
+        persons_per_exhibitor_foreign=persons.get('etrangere', DEFAULT_PERSONS_PER_EXHIBITOR_FOREIGN),
+    )
+
+
+# Sans données OTCP : valeurs par défaut uniquement
+DEFAULT_GENERAL_HYPOTHESES = GeneralHypotheses(profiles=MappingProxyType({}))
 
 
 def calculate_duration_days(start_date: Optional[str], end_date: Optional[str]) -> int:
@@ -12,304 +131,101 @@ def calculate_duration_days(start_date: Optional[str], end_date: Optional[str])
     """
     if not start_date or not end_date:
         return 0
-    
+
     try:
         start = datetime.fromisoformat(start_date.replace('/', '-'))
         end = datetime.fromisoformat(end_date.replace('/', '-'))
-        
+
         if start == end:
             return 1
         else:
             return (end - start).days + 1
-    except:
+    except ValueError:
         return 0
 
 
-def calculate_visitors_foreign(
-    event_type: str,
-    total_visitors: int,
-    visitors_foreign_pct: float,
-    unknown_foreign_rate: bool,
-    event_subtype: Optional[str],
-    hypotheses: Dict[str, Any]
-) -> int:
+def calculate_general_fields(
+    event: EventGeneral,
+    general: GeneralHypotheses = DEFAULT_GENERAL_HYPOTHESES,
+    truncate: Callable[[Any], Any] = int,
+) -> EventGeneral:
     """
-    Formule: =SIERREUR(SI(C4="Evenement_professionnel";SI.CONDITIONS(C10=VRAI;C7*RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;3;FAUX);C10=FAUX;C7*C8);C7*C8);0)
-    
-    Si événement professionnel ET taux inconnu: utiliser valeur de lookup
-    Sinon: utiliser le pourcentage saisi
+    Calcule tous les champs dérivés du module Général (calculated_*). `truncate`
+    remplace la troncature entière des formules (l'analyse de sensibilité la
+    remplace par une troncature qui conserve les dérivées).
     """
-    try:
-        if event_type == "Evenement_professionnel" and unknown_foreign_rate and event_subtype:
-            # RECHERCHEV dans les données OTCP événements professionnels
-            # Colonne 3 = % visiteurs étrangers
-            otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-            foreign_pct = otcp_data.get(event_subtype, {}).get('pct_visiteurs_etrangers', 0.5)
-            return int(total_visitors * foreign_pct)
+    professional = event.event_type == PROFESSIONAL
+    profile = general.profile(event.event_subtype) if professional else DEFAULT_PROFILE
+
+    # Visiteurs étrangers
+    # =SIERREUR(SI(C4="Evenement_professionnel";SI.CONDITIONS(C10=VRAI;C7*RECHERCHEV(E4;...;3;FAUX);C10=FAUX;C7*C8);C7*C8);0)
+    if professional and event.unknown_foreign_rate:
+        visitors_foreign_share = profile.visitors_foreign_share
+    else:
+        visitors_foreign_share = event.visitors_foreign_pct / 100
+    event.calculated_visitors_foreign = truncate(event.total_visitors * visitors_foreign_share)
+
+    # Visiteurs franciliens
+    # =SIERREUR(SI(C4="Evenement_professionnel";SI.CONDITIONS(C11=VRAI;RECHERCHEV(E4;...;5;FAUX);C11=FAUX;C9)*C7;C7*C9);0)
+    if professional and event.unknown_idf_rate:
+        visitors_idf_share = profile.visitors_idf_share
+    else:
+        visitors_idf_share = event.visitors_idf_pct / 100
+    event.calculated_visitors_idf = truncate(event.total_visitors * visitors_idf_share)
+
+    # Visiteurs nationaux non IDF (formule: =C7-H7-H5)
+    event.calculated_visitors_national_non_idf = (
+        event.total_visitors - event.calculated_visitors_foreign - event.calculated_visitors_idf
+    )
+
+    if professional:
+        # Entreprises exposantes : RECHERCHEV colonnes 8 (% étrangères) et 10 (% IDF)
+        if event.unknown_organizations_foreign_rate:
+            organizations_foreign_share = profile.organizations_foreign_share
         else:
-            return int(total_visitors * (visitors_foreign_pct / 100))
-    except:
-        return 0
-
-
-def calculate_visitors_national_non_idf(
-    total_visitors: int,
-    calculated_foreign: int,
-    calculated_idf: int
-) -> int:
-    """
-    Formule: =C7-H7-H5
-    Nombre de visiteurs nationaux = Total - Etrangers - Franciliens
-    """
-    return total_visitors - calculated_idf - calculated_foreign
-
-
-def calculate_visitors_idf(
-    event_type: str,
-    total_visitors: int,
-    visitors_idf_pct: float,
-    unknown_idf_rate: bool,
-    event_subtype: Optional[str],
-    hypotheses: Dict[str, Any]
-) -> int:
-    """
-    Formule: =SIERREUR(SI(C4="Evenement_professionnel";SI.CONDITIONS(C11=VRAI;RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;5;FAUX);C11=FAUX;C9)*C7;C7*C9);0)
-    """
-    try:
-        if event_type == "Evenement_professionnel":
-            if unknown_idf_rate and event_subtype:
-                # RECHERCHEV colonne 5 = % visiteurs IDF
-                otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-                idf_pct = otcp_data.get(event_subtype, {}).get('pct_visiteurs_idf', 0.12)
-                return int(total_visitors * idf_pct)
-            else:
-                return int(total_visitors * (visitors_idf_pct / 100))
+            organizations_foreign_share = event.organizations_foreign_pct / 100
+        if event.unknown_organizations_idf_rate:
+            organizations_idf_share = profile.organizations_idf_share
         else:
-            return int(total_visitors * (visitors_idf_pct / 100))
-    except:
-        return 0
-
-
-def calculate_exhibitors_foreign(
-    event_type: str,
-    event_subtype: Optional[str],
-    exhibiting_organizations: int,
-    organizations_foreign_pct: float,
-    unknown_organizations_foreign_rate: bool,
-    athletes_artists_count: int,
-    athletes_artists_foreign_pct: float,
-    hypotheses: Dict[str, Any]
-) -> int:
-    """
-    Formule: =SIERREUR(SI.CONDITIONS(C4="Evenement_professionnel";SI.CONDITIONS(C16=VRAI;RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;8;FAUX);C16=FAUX;C14)*C13*'Paramètres et hypothèses'!B30;OU(C4="Evenement_culturel";C4="Evenement_sportif");E13*E14);0)
-    """
-    try:
-        if event_type == "Evenement_professionnel":
-            if unknown_organizations_foreign_rate and event_subtype:
-                # RECHERCHEV colonne 8 = % entreprises étrangères
-                otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-                org_foreign_pct = otcp_data.get(event_subtype, {}).get('pct_entreprises_etrangeres', 0.5)
-            else:
-                org_foreign_pct = organizations_foreign_pct / 100
-            
-            # B30 = Nombre de personnes par entreprise exposante
-            persons_per_org = hypotheses.get('general', {}).get('persons_per_exhibiting_org', 2.4)
-            return int(exhibiting_organizations * org_foreign_pct * persons_per_org)
-        
-        elif event_type in ["Evenement_culturel", "Evenement_sportif"]:
-            return int(athletes_artists_count * (athletes_artists_foreign_pct / 100))
-        
-        return 0
-    except:
-        return 0
+            organizations_idf_share = event.organizations_idf_pct / 100
+        organizations = event.exhibiting_organizations
 
-
-def calculate_exhibitors_national_non_idf(
-    event_type: str,
-    event_subtype: Optional[str],
-    exhibiting_organizations: int,
-    organizations_foreign_pct: float,
-    organizations_idf_pct: float,
-    unknown_organizations_foreign_rate: bool,
-    unknown_organizations_idf_rate: bool,
-    athletes_artists_count: int,
-    athletes_artists_foreign_pct: float,
-    athletes_artists_idf_pct: float,
-    hypotheses: Dict[str, Any]
-) -> int:
-    """
-    Formule complexe: =SIERREUR(SI.CONDITIONS(C4="Evenement_professionnel";(100%-SI.CONDITIONS(C16=VRAI;RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;8;FAUX);C16=FAUX;'Données & calculs'!C14)-SI.CONDITIONS(C17=VRAI;RECHERCHEV('Données & calculs'!E4;'Paramètres et hypothèses'!A17:M26;10;FAUX);C17=FAUX;C15))*'Données & calculs'!C13*'Paramètres et hypothèses'!B29;OU(C4="Evenement_culturel";C4="Evenement_sportif");E13*(100%-E14-E15));0)
-    """
-    try:
-        if event_type == "Evenement_professionnel":
-            # Calculer % étranger
-            if unknown_organizations_foreign_rate and event_subtype:
-                otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-                org_foreign_pct = otcp_data.get(event_subtype, {}).get('pct_entreprises_etrangeres', 0.5) * 100
-            else:
-                org_foreign_pct = organizations_foreign_pct
-            
-            # Calculer % IDF
-            if unknown_organizations_idf_rate and event_subtype:
-                otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-                org_idf_pct = otcp_data.get(event_subtype, {}).get('pct_entreprises_idf', 0.12) * 100
-            else:
-                org_idf_pct = organizations_idf_pct
-            
-            # % national = 100% - % étranger - % IDF
-            org_national_pct = (100 - org_foreign_pct - org_idf_pct) / 100
-            
-            # B29 = Nombre de personnes par entreprise (nationale)
-            persons_per_org = hypotheses.get('general', {}).get('persons_per_exhibiting_org_national', 2.4)
-            return int(exhibiting_organizations * org_national_pct * persons_per_org)
-        
-        elif event_type in ["Evenement_culturel", "Evenement_sportif"]:
-            nat_pct = (100 - athletes_artists_foreign_pct - athletes_artists_idf_pct) / 100
-            return int(athletes_artists_count * nat_pct)
-        
-        return 0
-    except:
-        return 0
-
-
-def calculate_exhibitors_idf(
-    event_type: str,
-    event_subtype: Optional[str],
-    exhibiting_organizations: int,
-    organizations_idf_pct: float,
-    unknown_organizations_idf_rate: bool,
-    athletes_artists_count: int,
-    athletes_artists_idf_pct: float,
-    hypotheses: Dict[str, Any]
-) -> int:
-    """
-    Formule: =SIERREUR(SI.CONDITIONS(C4="Evenement_professionnel";SI.CONDITIONS(C17=VRAI;C13*RECHERCHEV(E4;'Paramètres et hypothèses'!A17:M26;10;FAUX)*'Paramètres et hypothèses'!B29;C17=FAUX;C13*C15*'Paramètres et hypothèses'!B29);OU(C4="Evenement_culturel";C4="Evenement_sportif");E13*E15);0)
-    """
-    try:
-        if event_type == "Evenement_professionnel":
-            if unknown_organizations_idf_rate and event_subtype:
-                # RECHERCHEV colonne 10 = % entreprises IDF
-                otcp_data = hypotheses.get('general', {}).get('otcp_data', {})
-                org_idf_pct = otcp_data.get(event_subtype, {}).get('pct_entreprises_idf', 0.12)
-            else:
-                org_idf_pct = organizations_idf_pct / 100
-            
-            # B29 = Nombre de personnes par entreprise
-            persons_per_org = hypotheses.get('general', {}).get('persons_per_exhibiting_org_national', 2.4)
-            return int(exhibiting_organizations * org_idf_pct * persons_per_org)
-        
-        elif event_type in ["Evenement_culturel", "Evenement_sportif"]:
-            return int(athletes_artists_count * (athletes_artists_idf_pct / 100))
-        
-        return 0
-    except:
-        return 0
-
-
-class CalculationEngine:
-    """Moteur de calcul principal"""
-    
-    def __init__(self, hypotheses: Dict[str, Any]):
-        self.hypotheses = hypotheses
-    
-    def calculate_general_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calcule tous les champs du module Général"""
-        
-        # Durée de l'événement
-        data['calculated_duration_days'] = calculate_duration_days(
-            data.get('start_date'),
-            data.get('end_date')
-        )
-        
-        # Visiteurs étrangers
-        data['calculated_visitors_foreign'] = calculate_visitors_foreign(
-            data.get('event_type', ''),
-            data.get('total_visitors', 0),
-            data.get('visitors_foreign_pct', 0),
-            data.get('unknown_foreign_rate', False),
-            data.get('event_subtype'),
-            self.hypotheses
-        )
-        
-        # Visiteurs franciliens
-        data['calculated_visitors_idf'] = calculate_visitors_idf(
-            data.get('event_type', ''),
-            data.get('total_visitors', 0),
-            data.get('visitors_idf_pct', 0),
-            data.get('unknown_idf_rate', False),
-            data.get('event_subtype'),
-            self.hypotheses
-        )
-        
-        # Visiteurs nationaux non IDF (formule: =C7-H7-H5)
-        data['calculated_visitors_national_non_idf'] = calculate_visitors_national_non_idf(
-            data.get('total_visitors', 0),
-            data['calculated_visitors_foreign'],
-            data['calculated_visitors_idf']
-        )
-        
-        # Exposants étrangers
-        data['calculated_exhibitors_foreign'] = calculate_exhibitors_foreign(
-            data.get('event_type', ''),
-            data.get('event_subtype'),
-            data.get('exhibiting_organizations', 0),
-            data.get('organizations_foreign_pct', 0),
-            data.get('unknown_organizations_foreign_rate', False),
-            data.get('athletes_artists_count', 0),
-            data.get('athletes_artists_foreign_pct', 0),
-            self.hypotheses
-        )
-        
-        # Exposants nationaux non IDF
-        data['calculated_exhibitors_national'] = calculate_exhibitors_national_non_idf(
-            data.get('event_type', ''),
-            data.get('event_subtype'),
-            data.get('exhibiting_organizations', 0),
-            data.get('organizations_foreign_pct', 0),
-            data.get('organizations_idf_pct', 0),
-            data.get('unknown_organizations_foreign_rate', False),
-            data.get('unknown_organizations_idf_rate', False),
-            data.get('athletes_artists_count', 0),
-            data.get('athletes_artists_foreign_pct', 0),
-            data.get('athletes_artists_idf_pct', 0),
-            self.hypotheses
-        )
-        
-        # Exposants franciliens
-        data['calculated_exhibitors_idf'] = calculate_exhibitors_idf(
-            data.get('event_type', ''),
-            data.get('event_subtype'),
-            data.get('exhibiting_organizations', 0),
-            data.get('organizations_idf_pct', 0),
-            data.get('unknown_organizations_idf_rate', False),
-            data.get('athletes_artists_count', 0),
-            data.get('athletes_artists_idf_pct', 0),
-            self.hypotheses
-        )
-        
-        # Total exposants (Formule: =SOMME(H8:H10))
-        data['calculated_total_exhibitors'] = (
-            data['calculated_exhibitors_foreign'] +
-            data['calculated_exhibitors_national'] +
-            data['calculated_exhibitors_idf']
+        # Étrangers : C13 * % * B30 ; nationaux et franciliens : C13 * % * B29
+        event.calculated_exhibitors_foreign = truncate(
+            organizations * organizations_foreign_share * general.persons_per_exhibitor_foreign
         )
-        
-        # Nombre total d'étrangers et DOM-TOM (Formule: =SIERREUR(H8+H5;0))
-        data['calculated_total_foreign'] = (
-            data['calculated_exhibitors_foreign'] +
-            data['calculated_visitors_foreign']
+        event.calculated_exhibitors_national = truncate(
+            organizations * (1 - organizations_foreign_share - organizations_idf_share)
+            * general.persons_per_exhibitor_national
         )
-        
-        # Nombre total de nationaux non IDF (Formule: =SIERREUR(H6+H9;0))
-        data['calculated_total_national'] = (
-            data['calculated_visitors_national_non_idf'] +
-            data['calculated_exhibitors_national']
+        event.calculated_exhibitors_idf = truncate(
+            organizations * organizations_idf_share * general.persons_per_exhibitor_national
         )
-        
-        # Nombre total de franciliens (Formule: =SIERREUR(+H7+H10;0))
-        data['calculated_total_idf'] = (
-            data['calculated_visitors_idf'] +
-            data['calculated_exhibitors_idf']
+    elif event.event_type in ATHLETES_ARTISTS_TYPES:
+        # Sportifs/artistes : E13 * E14, E13 * (100% - E14 - E15), E13 * E15
+        athletes = event.athletes_artists_count
+        event.calculated_exhibitors_foreign = truncate(athletes * (event.athletes_artists_foreign_pct / 100))
+        event.calculated_exhibitors_national = truncate(
+            athletes * ((100 - event.athletes_artists_foreign_pct - event.athletes_artists_idf_pct) / 100)
         )
-        
-        return data
+        event.calculated_exhibitors_idf = truncate(athletes * (event.athletes_artists_idf_pct / 100))
+    else:
+        event.calculated_exhibitors_foreign = 0
+        event.calculated_exhibitors_national = 0
+        event.calculated_exhibitors_idf = 0
+
+    # Total exposants (Formule: =SOMME(H8:H10))
+    event.calculated_total_exhibitors = (
+        event.calculated_exhibitors_foreign +
+        event.calculated_exhibitors_national +
+        event.calculated_exhibitors_idf
+    )
+
+    # Nombre total d'étrangers et DOM-TOM (Formule: =SIERREUR(H8+H5;0))
+    event.calculated_total_foreign = event.calculated_visitors_foreign + event.calculated_exhibitors_foreign
+    # Nombre total de nationaux non IDF (Formule: =SIERREUR(H6+H9;0))
+    event.calculated_total_national = event.calculated_visitors_national_non_idf + event.calculated_exhibitors_national
+    # Nombre total de franciliens (Formule: =SIERREUR(+H7+H10;0))
+    event.calculated_total_idf = event.calculated_visitors_idf + event.calculated_exhibitors_idf
+
+    return event
@@ -0,0 +1,68 @@
+"""
+Migration ponctuelle : archivage des doublons qui empêchent les index uniques
+
+Les anciennes écritures (insert_one) ont pu créer plusieurs documents pour un
+même événement (events.id) ou une même section (<section>.event_id). Pour
+chaque clé, le document le plus ancien, celui que servait find_one, est
+conservé ; les autres sont déplacés dans la collection duplicates_archive
+(document d'origine, collection, clé, document conservé, date). Les index
+uniques sont ensuite créés.
+
+Au démarrage, le serveur ne supprime jamais rien : il signale seulement les
+index qu'il n'a pas pu créer.
+
+En ligne de commande (depuis backend/, MONGO_URL et DB_NAME définis) :
+    python -m deduplicate --dry-run    # lister les doublons sans rien modifier
+    python -m deduplicate
+"""
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from repository import ARCHIVE_COLLECTION, UNIQUE_KEYS, MongoEventRepository
+
+
+async def deduplicate(repository: MongoEventRepository, dry_run: bool = False) -> int:
+    """Nombre de documents archivés (ou à archiver avec dry_run)"""
+    total = 0
+    for collection, field in UNIQUE_KEYS:
+        if dry_run:
+            groups = await repository.find_duplicates(collection, field)
+            count = sum(len(group["ids"]) - 1 for group in groups)
+            for group in groups:
+                print(f"  {collection}.{field}={group['key']}: {len(group['ids'])} documents")
+        else:
+            groups = await repository.archive_duplicates(collection, field)
+            count = sum(len(group["archived"]) for group in groups)
+            for group in groups:
+                print(f"  {collection}.{field}={group['key']}: {len(group['archived'])} archivé(s), "
+                      f"_id {group['kept']} conservé")
+        if groups:
+            print(f"{collection}: {len(groups)} clé(s) en double, {count} document(s) en trop")
+        total += count
+    if not dry_run:
+        await repository.ensure_indexes()
+    return total
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Archiver les doublons et créer les index uniques")
+    parser.add_argument("--dry-run", action="store_true", help="lister les doublons sans rien modifier")
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+    repository = MongoEventRepository.from_url(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+    try:
+        total = await deduplicate(repository, args.dry_run)
+    finally:
+        repository.close()
+    if args.dry_run:
+        print(f"{total} document(s) à archiver (aucune modification)")
+    else:
+        print(f"✓ {total} document(s) archivé(s) dans {ARCHIVE_COLLECTION}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
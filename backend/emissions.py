@@ -0,0 +1,314 @@
+"""
+Calcul des émissions par catégorie à partir de la table compilée des facteurs
+"""
+from typing import Dict
+
+from factor_table import FactorTable
+from models import (
+    EventGeneral,
+    EnergyData,
+    TransportData,
+    CateringData,
+    AccommodationData,
+    WasteData,
+    CommunicationData,
+    FreightData,
+    AmenitiesData,
+    PurchasesData,
+    Top3Emitter,
+    EmissionResult,
+)
+from repository import EventFootprint
+
+# Ordre des catégories du bilan
+CATEGORIES = (
+    "Énergie",
+    "Transport",
+    "Restauration",
+    "Hébergements",
+    "Déchets",
+    "Communication",
+    "Fret",
+    "Aménagements",
+    "Achats et goodies",
+)
+
+# Seuils des classes d'émission (kgCO2e/participant)
+EMISSION_CLASSES = (
+    (30, "A"),
+    (50, "B"),
+    (100, "C"),
+    (200, "D"),
+    (400, "E"),
+    (600, "F"),
+)
+
+# Parts modales des trajets nationaux (70% voiture, 30% train)
+NATIONAL_CAR_SHARE = 0.7
+NATIONAL_TRAIN_SHARE = 0.3
+
+
+def _plane_factor(distance_km: float, factors: FactorTable) -> float:
+    if distance_km > 3000:
+        return factors.plane_long_haul
+    elif distance_km > 1000:
+        return factors.plane_medium_haul
+    return factors.plane_short_haul
+
+
+def calculate_energy_emissions(event: EventGeneral, energy: EnergyData, factors: FactorTable) -> float:
+    total = 0
+
+    if energy.approach == "real":
+        total += energy.gas_kwh * factors.gas_kwh
+        total += energy.fuel_liters * factors.fuel_liter
+        total += energy.electricity_kwh * factors.electricity_kwh
+        total += energy.coal_kg * factors.coal_kg
+    else:  # estimated
+        if energy.building_type and energy.surface_m2:
+            intensity = factors.building_intensity.get(energy.building_type, factors.building_fallback)
+            days_per_year = 365
+            event_fraction = event.event_duration_days / days_per_year
+            total += energy.surface_m2 * event_fraction * intensity
+
+    if energy.has_generators:
+        total += energy.generators_fuel_liters * factors.fuel_liter
+
+    return total
+
+def calculate_transport_emissions(event: EventGeneral, transport: TransportData, factors: FactorTable) -> float:
+    total = 0
+
+    # Utiliser les champs calculés
+    visitors_foreign = event.calculated_visitors_foreign or 0
+    visitors_national = event.calculated_visitors_national_non_idf or 0
+    exhibitors_foreign = event.calculated_exhibitors_foreign or 0
+    exhibitors_national = event.calculated_exhibitors_national or 0
+
+    national_factor = factors.car_average * NATIONAL_CAR_SHARE + factors.train_average * NATIONAL_TRAIN_SHARE
+
+    # Visitors foreign - assume plane for most
+    if transport.visitors_avg_distance_foreign_km > 0 and visitors_foreign > 0:
+        factor = _plane_factor(transport.visitors_avg_distance_foreign_km, factors)
+        total += visitors_foreign * transport.visitors_avg_distance_foreign_km * 2 * factor
+
+    # Visitors national - assume car/train mix (70% car, 30% train)
+    if transport.visitors_avg_distance_national_km > 0 and visitors_national > 0:
+        total += visitors_national * transport.visitors_avg_distance_national_km * 2 * national_factor
+
+    # Exhibitors foreign
+    if transport.exhibitors_avg_distance_foreign_km > 0 and exhibitors_foreign > 0:
+        factor = _plane_factor(transport.exhibitors_avg_distance_foreign_km, factors)
+        total += exhibitors_foreign * transport.exhibitors_avg_distance_foreign_km * 2 * factor
+
+    # Exhibitors national
+    if transport.exhibitors_avg_distance_national_km > 0 and exhibitors_national > 0:
+        total += exhibitors_national * transport.exhibitors_avg_distance_national_km * 2 * national_factor
+
+    # Organizers
+    if transport.organizers_avg_distance_km > 0 and event.organizers_count > 0:
+        total += event.organizers_count * transport.organizers_avg_distance_km * transport.organizers_round_trips * factors.car_average
+
+    # Local transport
+    total += transport.visitors_local_transport_expenses * factors.local_transport_euro_ratio
+    total += transport.exhibitors_local_transport_expenses * factors.local_transport_euro_ratio
+
+    return total
+
+def calculate_catering_emissions(event: EventGeneral, catering: CateringData, factors: FactorTable) -> float:
+    total = 0
+
+    # Breakfasts
+    total += catering.breakfasts_count * factors.breakfast
+
+    # Snacks
+    total += catering.snacks_count * factors.snack
+
+    # Lunches and dinners - facteur moyen pondéré par les régimes
+    meal_factor = (
+        (catering.meals_meat_heavy_pct / 100) * factors.meal_meat_heavy +
+        (catering.meals_balanced_pct / 100) * factors.meal_balanced +
+        (catering.meals_vegetarian_pct / 100) * factors.meal_vegetarian
+    )
+    total += (catering.lunches_count + catering.dinners_count) * meal_factor
+
+    # Beverages
+    total += catering.water_liters * factors.water_liter
+    total += catering.coffee_units * factors.coffee_unit
+    total += catering.soft_drinks_units * factors.soft_drink_unit
+    total += catering.alcohol_units * factors.alcohol_unit
+
+    # Dishes
+    total_meals = catering.breakfasts_count + catering.lunches_count + catering.dinners_count
+    if catering.dishes_type == "disposable":
+        total += total_meals * factors.dishes_disposable_meal
+        total += catering.snacks_count * factors.dishes_disposable_snack
+    else:
+        total += (total_meals + catering.snacks_count) * factors.dishes_reusable
+
+    return total
+
+def _accommodation_group_emissions(visitors: float, nights: float, shares) -> float:
+    """Émissions d'un groupe de visiteurs ; shares = [(pourcentage, facteur), ...]"""
+    emissions = 0
+    for pct, factor in shares:
+        if pct > 0:
+            emissions += visitors * nights * (pct / 100) * factor
+    return emissions
+
+def calculate_accommodation_emissions(event: EventGeneral, accommodation: AccommodationData, factors: FactorTable) -> float:
+    total = 0
+
+    # Utiliser les champs calculés
+    visitors_foreign = event.calculated_visitors_foreign or 0
+    visitors_national = event.calculated_visitors_national_non_idf or 0
+
+    # Foreign visitors
+    if visitors_foreign > 0 and accommodation.foreign_avg_nights > 0:
+        total += _accommodation_group_emissions(visitors_foreign, accommodation.foreign_avg_nights, [
+            (accommodation.foreign_hotel_5star_pct, factors.hotel_5star),
+            (accommodation.foreign_hotel_3star_pct, factors.hotel_3star),
+            (accommodation.foreign_hotel_1star_pct, factors.hotel_1star),
+            (accommodation.foreign_other_accommodation_pct, factors.other_accommodation),
+        ])
+
+    # National non-IDF visitors
+    if visitors_national > 0 and accommodation.national_avg_nights > 0:
+        total += _accommodation_group_emissions(visitors_national, accommodation.national_avg_nights, [
+            (accommodation.national_hotel_5star_pct, factors.hotel_5star),
+            (accommodation.national_hotel_3star_pct, factors.hotel_3star),
+            (accommodation.national_hotel_1star_pct, factors.hotel_1star),
+            (accommodation.national_other_accommodation_pct, factors.other_accommodation),
+        ])
+
+    return total
+
+def calculate_waste_emissions(waste: WasteData, factors: FactorTable) -> float:
+    total = 0
+    total += waste.plastic_kg * factors.waste_plastic
+    total += waste.cardboard_kg * factors.waste_cardboard
+    total += waste.paper_kg * factors.waste_paper
+    total += waste.aluminum_kg * factors.waste_aluminum
+    total += waste.textile_kg * factors.waste_textile
+    total += waste.furniture_kg * factors.waste_furniture
+    return total
+
+def calculate_communication_emissions(communication: CommunicationData, factors: FactorTable) -> float:
+    total = 0
+
+    # Supports physiques
+    total += communication.posters_count * factors.poster
+    total += communication.flyers_count * factors.flyer
+    total += communication.banners_count * factors.banner
+
+    # Streaming
+    if communication.streaming_hours > 0 and communication.streaming_audience > 0:
+        total += (communication.streaming_hours * communication.streaming_audience / 1000 * factors.streaming_hour_per_1000)
+
+    # Ratio monétaire
+    total += communication.communication_expenses * factors.communication_ratio
+
+    return total
+
+def calculate_freight_emissions(freight: FreightData, factors: FactorTable) -> float:
+    total = 0
+
+    # Camion porteur par défaut
+    if freight.decor_weight_kg > 0:
+        total += (freight.decor_weight_kg / 1000) * freight.decor_distance_km * factors.truck_tkm
+    if freight.equipment_weight_kg > 0:
+        total += (freight.equipment_weight_kg / 1000) * freight.equipment_distance_km * factors.truck_tkm
+    if freight.food_weight_kg > 0:
+        total += (freight.food_weight_kg / 1000) * freight.food_distance_km * factors.truck_tkm
+
+    return total
+
+def calculate_amenities_emissions(amenities: AmenitiesData, factors: FactorTable) -> float:
+    total = 0
+
+    # Ratios monétaires en kgCO2e/€
+    total += amenities.site_rental_expenses * factors.site_rental_ratio
+    total += amenities.reception_expenses * factors.reception_ratio
+    total += amenities.construction_expenses * factors.construction_ratio
+    total += amenities.it_expenses * factors.it_ratio
+
+    return total
+
+def calculate_purchases_emissions(event: EventGeneral, purchases: PurchasesData, factors: FactorTable) -> float:
+    total = 0
+
+    # Utiliser les champs calculés
+    total_visitors = event.total_visitors or 0
+    total_exhibitors = event.calculated_total_exhibitors or 0
+
+    # Goodies
+    total_people = total_visitors + total_exhibitors
+    total += total_people * purchases.goodies_expenses_per_person * factors.goodies_ratio
+
+    # Badges
+    badges = purchases.badges_visitors + purchases.badges_exhibitors + purchases.badges_organizers
+    total += badges * factors.badge_factor(purchases.badges_type)
+
+    return total
+
+def get_emission_class(emissions_per_participant: float) -> str:
+    """Classify emissions per participant (kgCO2e/person)"""
+    for threshold, label in EMISSION_CLASSES:
+        if emissions_per_participant < threshold:
+            return label
+    return "G"
+
+# Catégorie -> (section de l'événement, fonction de calcul, reçoit l'événement)
+CATEGORY_CALCULATORS = {
+    "Énergie": ("energy", calculate_energy_emissions, True),
+    "Transport": ("transport", calculate_transport_emissions, True),
+    "Restauration": ("catering", calculate_catering_emissions, True),
+    "Hébergements": ("accommodation", calculate_accommodation_emissions, True),
+    "Déchets": ("waste", calculate_waste_emissions, False),
+    "Communication": ("communication", calculate_communication_emissions, False),
+    "Fret": ("freight", calculate_freight_emissions, False),
+    "Aménagements": ("amenities", calculate_amenities_emissions, False),
+    "Achats et goodies": ("purchases", calculate_purchases_emissions, True),
+}
+
+def calculate_category_emissions(category: str, event: EventGeneral, section, factors: FactorTable) -> float:
+    """Émissions d'une catégorie (0 si sa section n'a pas été saisie)"""
+    if not section:
+        return 0
+    _, calculate, uses_event = CATEGORY_CALCULATORS[category]
+    if uses_event:
+        return calculate(event, section, factors)
+    return calculate(section, factors)
+
+def build_emission_result(event_obj: EventGeneral, emissions_by_category: Dict[str, float]) -> EmissionResult:
+    """Totaux, classe et top 3 à partir des émissions par catégorie"""
+    # Calculate totals
+    total_emissions_kg = sum(emissions_by_category.values())
+    total_participants = (event_obj.total_visitors +
+                         (event_obj.calculated_total_exhibitors or 0) +
+                         event_obj.organizers_count)
+    emissions_per_participant = total_emissions_kg / total_participants if total_participants > 0 else 0
+    emission_class = get_emission_class(emissions_per_participant)
+
+    # Get top 3 emitters
+    sorted_emissions = sorted(emissions_by_category.items(), key=lambda x: x[1], reverse=True)
+    top_3_emitters = [Top3Emitter(category=k, emissions=v) for k, v in sorted_emissions[:3]]
+
+    return EmissionResult(
+        event_id=event_obj.id,
+        event_name=event_obj.event_name,
+        total_emissions_kg=total_emissions_kg,
+        emissions_by_category=emissions_by_category,
+        emissions_per_participant=emissions_per_participant,
+        emission_class=emission_class,
+        top_3_emitters=top_3_emitters
+    )
+
+def compute_emission_result(footprint: EventFootprint, factors: FactorTable) -> EmissionResult:
+    """Calcule le bilan complet d'un événement à partir de ses sections"""
+    event_obj = footprint.event
+    emissions_by_category = {
+        category: calculate_category_emissions(category, event_obj, getattr(footprint, collection), factors)
+        for category, (collection, _, _) in CATEGORY_CALCULATORS.items()
+    }
+    return build_emission_result(event_obj, emissions_by_category)
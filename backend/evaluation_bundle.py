@@ -0,0 +1,231 @@
+"""
+Bundle d'évaluation des hypothèses pour le calcul côté client
+
+Le bundle contient tout ce qu'il faut pour reproduire les calculs du serveur
+sans appel à l'API : table résolue des facteurs d'émission, intensités des
+bâtiments, profils OTCP des sous-types, personnes par exposant, parts modales
+et seuils des classes d'émission. Il est servi en JSON compact, versionné
+(version_id des hypothèses) et identifié par un ETag.
+
+Le bundle ne contient que des données : les formules restent celles de
+calculation_engine.py et emissions.py, qu'un client doit porter lui-même.
+Les vecteurs de conformité sont un snapshot des résultats du moteur serveur
+pour cette version (entrées et résultats attendus) ; ils vérifient qu'un
+portage client reproduit le serveur, pas que les formules du serveur sont
+justes.
+
+Le contrôle d'auto-cohérence rejoue ces vecteurs avec les fonctions du
+serveur, alimentées par le seul bundle : il prouve que le bundle contient
+toutes les données lues par les formules, rien de plus.
+
+Contrôle (depuis backend/) :
+    python -m evaluation_bundle
+"""
+import hashlib
+import json
+import random
+from dataclasses import asdict
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
+
+from calculation_engine import (
+    ATHLETES_ARTISTS_TYPES,
+    DEFAULT_PROFILE,
+    PROFESSIONAL,
+    GeneralHypotheses,
+    OtcpProfile,
+    calculate_general_fields,
+)
+from emissions import EMISSION_CLASSES, NATIONAL_CAR_SHARE, NATIONAL_TRAIN_SHARE, compute_emission_result
+from factor_table import BADGE_FACTORS, FactorTable
+from hypotheses_store import HypothesesVersion
+from models import EventGeneral
+from repository import SECTION_MODELS, EventFootprint
+from vectorized_engine import CALCULATED_EVENT_FIELDS, SECTION_FIELDS
+
+# À incrémenter si la structure du bundle change
+BUNDLE_FORMAT = 1
+
+# Écart relatif toléré entre un évaluateur et les résultats attendus
+CONFORMANCE_TOLERANCE = 1e-9
+CONFORMANCE_CASES = 64
+CONFORMANCE_SEED = 2024
+
+
+def build_bundle(version: HypothesesVersion) -> Dict[str, Any]:
+    """Bundle d'évaluation d'une version des hypothèses"""
+    factors = version.factors
+    general = version.general
+    # Profils indexés par id et par libellé : une seule entrée par profil
+    profiles = {profile.id: profile for profile in general.profiles.values()}
+    return {
+        "format": BUNDLE_FORMAT,
+        "version_id": version.version_id,
+        "factors": factors.as_dict(),
+        "building_intensity": dict(factors.building_intensity),
+        "building_fallback": factors.building_fallback,
+        "badge_factors": BADGE_FACTORS,
+        "national_modal_shares": {"car": NATIONAL_CAR_SHARE, "train": NATIONAL_TRAIN_SHARE},
+        "otcp_profiles": [asdict(profile) for profile in profiles.values()],
+        "default_profile": asdict(DEFAULT_PROFILE),
+        "persons_per_exhibitor": {
+            "national": general.persons_per_exhibitor_national,
+            "foreign": general.persons_per_exhibitor_foreign,
+        },
+        "emission_classes": [[threshold, label] for threshold, label in EMISSION_CLASSES],
+        "default_emission_class": "G",
+    }
+
+
+def serialize(payload: Any) -> Tuple[bytes, str]:
+    """(corps JSON compact, ETag fort dérivé du contenu)"""
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+# ==================== CONTRÔLE D'AUTO-COHÉRENCE ====================
+
+def bundle_factor_table(bundle: Dict[str, Any]) -> FactorTable:
+    return FactorTable(
+        building_intensity=bundle["building_intensity"],
+        building_fallback=bundle["building_fallback"],
+        **bundle["factors"],
+    )
+
+
+def bundle_general_hypotheses(bundle: Dict[str, Any]) -> GeneralHypotheses:
+    profiles = {}
+    for row in bundle["otcp_profiles"]:
+        profile = OtcpProfile(**row)
+        profiles[profile.id] = profile
+        profiles[profile.label] = profile
+    persons = bundle["persons_per_exhibitor"]
+    return GeneralHypotheses(
+        profiles=MappingProxyType(profiles),
+        persons_per_exhibitor_national=persons["national"],
+        persons_per_exhibitor_foreign=persons["foreign"],
+    )
+
+
+def _evaluate(case: Dict[str, Any], factors: FactorTable, general: GeneralHypotheses) -> Dict[str, Any]:
+    event = calculate_general_fields(EventGeneral(**case["event"]), general)
+    sections = {
+        name: SECTION_MODELS[name](event_id=event.id, **fields) for name, fields in case["sections"].items()
+    }
+    result = compute_emission_result(EventFootprint(event=event, **sections), factors)
+    return {
+        "derived": {field: getattr(event, field) for field in CALCULATED_EVENT_FIELDS},
+        "emissions_by_category": result.emissions_by_category,
+        "total_emissions_kg": result.total_emissions_kg,
+        "emissions_per_participant": result.emissions_per_participant,
+        "emission_class": result.emission_class,
+    }
+
+
+def replay(bundle: Dict[str, Any], case: Dict[str, Any]) -> Dict[str, Any]:
+    """Rejouer un cas {"event": {...}, "sections": {...}} avec le moteur serveur et les seules données du bundle"""
+    return _evaluate(case, bundle_factor_table(bundle), bundle_general_hypotheses(bundle))
+
+
+# ==================== VECTEURS DE CONFORMITÉ ====================
+
+def conformance_cases(version: HypothesesVersion, count: int = CONFORMANCE_CASES) -> List[Dict[str, Any]]:
+    """Cas d'entrée déterministes couvrant les branches du calcul"""
+    rng = random.Random(CONFORMANCE_SEED)
+    subtypes = sorted({profile.label for profile in version.general.profiles.values()})
+    building_types = sorted(version.factors.building_intensity) + ["type_inconnu"]
+    event_types = (PROFESSIONAL,) + ATHLETES_ARTISTS_TYPES + ("Autre",)
+
+    cases = []
+    for i in range(count):
+        event_type = event_types[i % len(event_types)]
+        event = {
+            "id": f"conformance-{i}",
+            "event_name": f"Cas {i}",
+            "event_type": event_type,
+            "event_subtype": rng.choice(subtypes + ["Sous-type inconnu"]) if subtypes else None,
+            "event_duration_days": rng.randint(1, 10),
+            "total_visitors": rng.randint(0, 50000),
+            "visitors_foreign_pct": round(rng.uniform(0, 40), 1),
+            "visitors_idf_pct": round(rng.uniform(0, 50), 1),
+            "unknown_foreign_rate": rng.random() < 0.3,
+            "unknown_idf_rate": rng.random() < 0.3,
+            "exhibiting_organizations": rng.randint(0, 500),
+            "organizations_foreign_pct": round(rng.uniform(0, 40), 1),
+            "organizations_idf_pct": round(rng.uniform(0, 50), 1),
+            "unknown_organizations_foreign_rate": rng.random() < 0.3,
+            "unknown_organizations_idf_rate": rng.random() < 0.3,
+            "athletes_artists_count": rng.randint(0, 300),
+            "athletes_artists_foreign_pct": round(rng.uniform(0, 40), 1),
+            "athletes_artists_idf_pct": round(rng.uniform(0, 50), 1),
+            "organizers_count": rng.randint(0, 100),
+        }
+
+        sections = {}
+        for name, fields in SECTION_FIELDS.items():
+            if rng.random() < 0.2:
+                continue
+            model_fields = SECTION_MODELS[name].model_fields
+            values = {}
+            for field in fields:
+                if model_fields[field].annotation is int:
+                    values[field] = rng.choice((0, rng.randint(1, 5000)))
+                else:
+                    values[field] = rng.choice((0.0, round(rng.uniform(0, 100), 2), round(rng.uniform(0, 6000), 1)))
+            sections[name] = values
+        if "energy" in sections:
+            sections["energy"].update(
+                approach=rng.choice(("real", "estimated")),
+                building_type=rng.choice(building_types + [None]),
+                has_generators=rng.random() < 0.5,
+            )
+        if "catering" in sections:
+            sections["catering"]["dishes_type"] = rng.choice(("disposable", "reusable"))
+        if "purchases" in sections:
+            sections["purchases"]["badges_type"] = rng.choice(tuple(BADGE_FACTORS) + ("inconnu",))
+        cases.append({"event": event, "sections": sections})
+    return cases
+
+
+def conformance_vectors(version: HypothesesVersion) -> Dict[str, Any]:
+    """Snapshot des résultats du moteur serveur sur les cas de conformité, pour cette version"""
+    return {
+        "format": BUNDLE_FORMAT,
+        "version_id": version.version_id,
+        "tolerance": CONFORMANCE_TOLERANCE,
+        "vectors": [
+            {"input": case, "expected": _evaluate(case, version.factors, version.general)}
+            for case in conformance_cases(version)
+        ],
+    }
+
+
+def _close(actual: Any, expected: Any) -> bool:
+    if isinstance(expected, dict):
+        return all(_close(actual.get(key), value) for key, value in expected.items())
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        return abs(actual - expected) <= CONFORMANCE_TOLERANCE * max(1.0, abs(expected))
+    return actual == expected
+
+
+def self_consistency_failures(bundle: Dict[str, Any], vectors: Dict[str, Any]) -> List[int]:
+    """Indices des vecteurs que le moteur serveur ne reproduit pas à partir du seul bundle (donnée manquante)"""
+    return [
+        i for i, vector in enumerate(vectors["vectors"])
+        if not _close(replay(bundle, vector["input"]), vector["expected"])
+    ]
+
+
+if __name__ == "__main__":
+    from hypotheses_store import load_version
+
+    version = load_version()
+    # Aller-retour JSON : le moteur ne voit que ce qu'un client recevrait
+    bundle = json.loads(serialize(build_bundle(version))[0])
+    vectors = json.loads(serialize(conformance_vectors(version))[0])
+    failures = self_consistency_failures(bundle, vectors)
+    size = len(serialize(bundle)[0])
+    if failures:
+        print(f"✗ {len(failures)}/{len(vectors['vectors'])} vecteurs non reproduits depuis le bundle: {failures}")
+        raise SystemExit(1)
+    print(f"✓ Bundle {version.version_id[:12]} ({size} octets) complet : {len(vectors['vectors'])} vecteurs reproduits")
@@ -0,0 +1,165 @@
+"""
+Export des bilans en XLSX, CSV ou NDJSON, dans la disposition du classeur Excel
+
+Une ligne par événement : saisies de l'événement, champs calculated_*, saisies
+des sections ("<section>.<champ>", mêmes noms de colonnes que l'import) puis
+émissions de chaque catégorie, total, émissions par participant et classe.
+Le XLSX reprend les onglets du classeur d'origine : "Données & calculs" (les
+lignes) et "Paramètres et hypothèses" (facteurs d'émission, intensités des
+bâtiments et profils OTCP de la version utilisée).
+
+Les événements sont lus par lots depuis un curseur MongoDB et les lignes
+produites au fil de l'eau : la mémoire ne dépend pas du nombre d'événements.
+Le XLSX est écrit en mode write_only dans un fichier temporaire, puis envoyé.
+"""
+import asyncio
+import csv
+import io
+import json
+import tempfile
+from dataclasses import asdict, fields as dataclass_fields
+from typing import Any, AsyncIterator, Callable, List, Tuple
+
+from calculation_engine import OtcpProfile, calculate_general_fields
+from emissions import CATEGORIES, compute_emission_result
+from event_import import SECTION_CREATE_MODELS
+from hypotheses_store import HypothesesVersion
+from models import EventGeneralCreate
+from repository import EventFootprint
+from vectorized_engine import CALCULATED_EVENT_FIELDS
+
+CSV, XLSX, NDJSON = "csv", "xlsx", "ndjson"
+MEDIA_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    NDJSON: "application/x-ndjson",
+}
+
+DATA_SHEET = "Données & calculs"
+PARAMETERS_SHEET = "Paramètres et hypothèses"
+
+# Lignes CSV/NDJSON regroupées par envoi
+STREAM_BATCH_ROWS = 200
+# Au-delà, le XLSX en cours d'écriture passe sur disque
+XLSX_SPOOL_BYTES = 16 * 1024 * 1024
+XLSX_READ_BYTES = 64 * 1024
+
+RESULT_COLUMNS = ("total_emissions_kg", "emissions_per_participant", "emission_class")
+
+
+def _section_getter(section: str, field: str) -> Callable:
+    def get(footprint: EventFootprint, result) -> Any:
+        doc = getattr(footprint, section)
+        return getattr(doc, field) if doc is not None else None
+    return get
+
+
+def _export_columns() -> List[Tuple[str, Callable]]:
+    columns = [("id", lambda footprint, result: footprint.event.id)]
+    for field in list(EventGeneralCreate.model_fields) + list(CALCULATED_EVENT_FIELDS):
+        columns.append((field, lambda footprint, result, field=field: getattr(footprint.event, field)))
+    for section, model in SECTION_CREATE_MODELS.items():
+        for field in model.model_fields:
+            if field != "event_id":
+                columns.append((f"{section}.{field}", _section_getter(section, field)))
+    for category in CATEGORIES:
+        columns.append((category, lambda footprint, result, category=category: result.emissions_by_category[category]))
+    for field in RESULT_COLUMNS:
+        columns.append((field, lambda footprint, result, field=field: getattr(result, field)))
+    return columns
+
+
+EXPORT_COLUMNS = _export_columns()
+EXPORT_HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+async def iter_export_rows(
+    footprints: AsyncIterator[EventFootprint], hypotheses: HypothesesVersion
+) -> AsyncIterator[List[Any]]:
+    """Ligne de chaque événement, bilan calculé avec la version `hypotheses`"""
+    async for footprint in footprints:
+        calculate_general_fields(footprint.event, hypotheses.general)
+        result = compute_emission_result(footprint, hypotheses.factors)
+        yield [get(footprint, result) for _, get in EXPORT_COLUMNS]
+
+
+async def csv_chunks(rows: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    # BOM : Excel ouvre le fichier en UTF-8
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADER)
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % STREAM_BATCH_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+async def ndjson_chunks(rows: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_HEADER, row)), ensure_ascii=False, default=str))
+        if len(lines) >= STREAM_BATCH_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _write_parameters(sheet, hypotheses: HypothesesVersion):
+    factors = hypotheses.factors
+    sheet.append(["Version des hypothèses", hypotheses.version_id])
+    sheet.append([])
+    sheet.append(["Facteur d'émission", "Valeur"])
+    for name, value in factors.as_dict().items():
+        sheet.append([name, value])
+    sheet.append([])
+    sheet.append(["Type de bâtiment", "kgCO2e/m²/an"])
+    for building_type, intensity in factors.building_intensity.items():
+        sheet.append([building_type, intensity])
+    sheet.append(["(repli)", factors.building_fallback])
+    sheet.append([])
+    sheet.append(["Personnes par entreprise exposante nationale", hypotheses.general.persons_per_exhibitor_national])
+    sheet.append(["Personnes par entreprise exposante étrangère", hypotheses.general.persons_per_exhibitor_foreign])
+    sheet.append([])
+    sheet.append([field.name for field in dataclass_fields(OtcpProfile)])
+    # Profils indexés par id et par libellé : une seule ligne par profil
+    for profile in {profile.id: profile for profile in hypotheses.general.profiles.values()}.values():
+        sheet.append(list(asdict(profile).values()))
+
+
+async def xlsx_chunks(rows: AsyncIterator[List[Any]], hypotheses: HypothesesVersion) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    data = workbook.create_sheet(DATA_SHEET)
+    data.append(EXPORT_HEADER)
+    async for row in rows:
+        data.append(row)
+    _write_parameters(workbook.create_sheet(PARAMETERS_SHEET), hypotheses)
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as output:
+        # Compression du classeur hors de la boucle d'événements
+        await asyncio.to_thread(workbook.save, output)
+        output.seek(0)
+        while True:
+            chunk = output.read(XLSX_READ_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_chunks(
+    file_format: str, footprints: AsyncIterator[EventFootprint], hypotheses: HypothesesVersion
+) -> AsyncIterator[bytes]:
+    rows = iter_export_rows(footprints, hypotheses)
+    if file_format == XLSX:
+        return xlsx_chunks(rows, hypotheses)
+    if file_format == NDJSON:
+        return ndjson_chunks(rows)
+    return csv_chunks(rows)
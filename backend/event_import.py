@@ -0,0 +1,331 @@
+"""
+Import en masse d'événements depuis un fichier CSV ou XLSX
+
+Une ligne du fichier = un événement et ses sections. Les colonnes portent le
+nom des champs de EventGeneralCreate (préfixe "event." facultatif) et, pour
+les sections, "<section>.<champ>" (ex. "energy.gas_kwh", "catering.lunches_count").
+Une section n'est créée que si au moins une de ses colonnes est renseignée.
+
+Le fichier est lu en flux (csv, ou openpyxl en lecture seule), validé par
+lots, les champs dérivés sont calculés lot par lot et chaque lot est écrit
+avec un insert_many par collection : la mémoire reste constante quelle que
+soit la taille du fichier. Les lignes invalides sont ignorées et signalées
+dans le rapport (numéro de ligne du fichier).
+
+En ligne de commande (depuis backend/, MONGO_URL et DB_NAME définis) :
+    python -m event_import evenements.xlsx [--dry-run]
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import os
+import re
+from datetime import date
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from calculation_engine import DEFAULT_GENERAL_HYPOTHESES, GeneralHypotheses, calculate_general_fields
+from models import (
+    EventGeneral, EventGeneralCreate,
+    EnergyDataCreate,
+    TransportDataCreate,
+    CateringDataCreate,
+    AccommodationDataCreate,
+    WasteDataCreate,
+    CommunicationDataCreate,
+    FreightDataCreate,
+    AmenitiesDataCreate,
+    PurchasesDataCreate,
+    ImportReport,
+    ImportRowError,
+)
+from repository import SECTION_MODELS, EventFootprint
+
+IMPORT_CHUNK_SIZE = 1000
+# Au-delà, les erreurs sont seulement comptées
+MAX_REPORTED_ERRORS = 1000
+
+SECTION_CREATE_MODELS = {
+    "energy": EnergyDataCreate,
+    "transport": TransportDataCreate,
+    "catering": CateringDataCreate,
+    "accommodation": AccommodationDataCreate,
+    "waste": WasteDataCreate,
+    "communication": CommunicationDataCreate,
+    "freight": FreightDataCreate,
+    "amenities": AmenitiesDataCreate,
+    "purchases": PurchasesDataCreate,
+}
+
+CSV, XLSX = "csv", "xlsx"
+XLSX_CONTENT_TYPES = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",)
+
+# Nombres décimaux à virgule des tableurs français ("12,5")
+DECIMAL_COMMA = re.compile(r"^-?\d+,\d+$")
+
+
+class ImportFormatError(ValueError):
+    """Fichier illisible ou en-tête incorrect"""
+
+
+def _normalize(value: Any) -> Any:
+    # Cellules date des XLSX -> "AAAA-MM-JJ" (format des champs start_date/end_date)
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    if isinstance(value, str):
+        value = value.strip()
+        if DECIMAL_COMMA.match(value):
+            return value.replace(",", ".")
+    return value
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def detect_csv_encoding(stream: IO[bytes], block_size: int = 1 << 16) -> str:
+    """
+    UTF-8 si tout le fichier est de l'UTF-8 valide, sinon Windows-1252 (CSV
+    enregistrés par Excel). Le fichier est parcouru une fois par blocs avec
+    les deux décodeurs puis rembobiné : aucune ligne n'est importée avant de
+    connaître l'encodage. ImportFormatError si aucun des deux ne convient.
+    """
+    decoders = {encoding: codecs.getincrementaldecoder(encoding)() for encoding in ("utf-8", "cp1252")}
+    errors = {}
+    try:
+        for block in iter(lambda: stream.read(block_size), b""):
+            for encoding, decoder in decoders.items():
+                if encoding not in errors:
+                    try:
+                        decoder.decode(block)
+                    except UnicodeDecodeError as e:
+                        errors[encoding] = e
+            if len(errors) == len(decoders):
+                break
+        for encoding, decoder in decoders.items():
+            if encoding not in errors:
+                try:
+                    decoder.decode(b"", final=True)
+                except UnicodeDecodeError as e:
+                    errors[encoding] = e
+    finally:
+        stream.seek(0)
+    if "utf-8" not in errors:
+        return "utf-8-sig"
+    if "cp1252" not in errors:
+        return "cp1252"
+    # Octets sans caractère en Windows-1252 (0x81, 0x8D...) : ni UTF-8 ni Windows-1252
+    raise ImportFormatError(
+        f"Encodage du fichier CSV non reconnu (UTF-8 ou Windows-1252 attendu): {errors['cp1252']}"
+    )
+
+
+def iter_csv_rows(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Lignes d'un CSV (UTF-8 ou Windows-1252, séparateur , ; ou tabulation détecté sur l'en-tête)"""
+    encoding = detect_csv_encoding(stream)
+    text = codecs.getreader(encoding)(stream)
+    header_line = text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    header = check_header(next(csv.reader([header_line], dialect)))
+    for values in csv.reader(text, dialect):
+        if values:
+            yield dict(zip(header, values))
+
+
+def iter_xlsx_rows(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Lignes de la première feuille d'un XLSX, lu en mode read_only"""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Fichier XLSX illisible: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = check_header([str(name).strip() if name is not None else "" for name in next(rows, ())])
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream: IO[bytes], file_format: str) -> Iterator[Dict[str, Any]]:
+    if file_format == XLSX:
+        return iter_xlsx_rows(stream)
+    if file_format == CSV:
+        return iter_csv_rows(stream)
+    raise ImportFormatError(f"Format non pris en charge: {file_format}")
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    if (filename or "").lower().endswith((".xlsx", ".xlsm")) or (content_type or "") in XLSX_CONTENT_TYPES:
+        return XLSX
+    return CSV
+
+
+def check_header(header: List[str]) -> List[str]:
+    """Refuser le fichier si une colonne ne correspond à aucun champ"""
+    unknown = []
+    for column in header:
+        if not column:
+            continue
+        prefix, _, field = column.partition(".")
+        if not field:
+            prefix, field = "event", column
+        model = EventGeneralCreate if prefix == "event" else SECTION_CREATE_MODELS.get(prefix)
+        if model is None or field not in model.model_fields or field == "event_id":
+            unknown.append(column)
+    if unknown:
+        raise ImportFormatError(f"Colonnes inconnues: {', '.join(unknown)}")
+    if not any(column in ("event_name", "event.event_name") for column in header):
+        raise ImportFormatError("Colonne event_name absente")
+    return header
+
+
+def split_row(row: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Répartir les colonnes renseignées entre l'événement et les sections"""
+    event_fields = {}
+    section_fields: Dict[str, Dict[str, Any]] = {}
+    for column, value in row.items():
+        value = _normalize(value)
+        if _empty(value) or not column:
+            continue
+        prefix, _, field = column.partition(".")
+        if not field:
+            event_fields[column] = value
+        elif prefix == "event":
+            event_fields[field] = value
+        else:
+            section_fields.setdefault(prefix, {})[field] = value
+    return event_fields, section_fields
+
+
+def format_errors(error: ValidationError, prefix: str = "") -> List[str]:
+    return [
+        f"{prefix}{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors(include_url=False)
+    ]
+
+
+def build_import_footprint(row: Dict[str, Any]) -> EventFootprint:
+    """Valider une ligne d'un fichier dont l'en-tête a été vérifié (lève ValidationError ou ImportFormatError)"""
+    event_fields, section_fields = split_row(row)
+    event = EventGeneral(**EventGeneralCreate(**event_fields).model_dump())
+    sections = {}
+    errors = []
+    for name, fields in section_fields.items():
+        try:
+            create = SECTION_CREATE_MODELS[name](event_id=event.id, **fields)
+            sections[name] = SECTION_MODELS[name](**create.model_dump())
+        except ValidationError as e:
+            errors.extend(format_errors(e, f"{name}."))
+    if errors:
+        raise ImportFormatError("; ".join(errors))
+    return EventFootprint(event=event, **sections)
+
+
+def iter_chunks(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """Lots de (numéro de ligne du fichier, ligne) ; l'en-tête est la ligne 1"""
+    chunk = []
+    for number, row in enumerate(rows, start=2):
+        chunk.append((number, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(
+    chunk: List[Tuple[int, Dict[str, Any]]], general: GeneralHypotheses
+) -> Tuple[List[Tuple[int, EventFootprint]], List[ImportRowError]]:
+    """Valider un lot et calculer les champs dérivés de ses événements"""
+    valid = []
+    errors = []
+    for number, row in chunk:
+        try:
+            footprint = build_import_footprint(row)
+        except ValidationError as e:
+            errors.append(ImportRowError(row=number, errors=format_errors(e)))
+            continue
+        except ImportFormatError as e:
+            errors.append(ImportRowError(row=number, errors=[str(e)]))
+            continue
+        valid.append((number, footprint))
+    for _, footprint in valid:
+        calculate_general_fields(footprint.event, general)
+    return valid, errors
+
+
+async def import_events(
+    stream: IO[bytes],
+    file_format: str,
+    repository,
+    general: GeneralHypotheses = DEFAULT_GENERAL_HYPOTHESES,
+    dry_run: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportReport:
+    """Importer un fichier ; `dry_run` valide sans rien écrire"""
+    report = ImportReport(dry_run=dry_run)
+
+    def record(error: ImportRowError):
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(error)
+        else:
+            report.errors_truncated = True
+
+    chunks = iter_chunks(iter_rows(stream, file_format), chunk_size)
+    while True:
+        # Lecture et validation hors de la boucle d'événements
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        valid, errors = await asyncio.to_thread(validate_chunk, chunk, general)
+        report.rows += len(chunk)
+        for error in errors:
+            record(error)
+        if not valid:
+            continue
+
+        failed = {} if dry_run else await repository.insert_footprints([footprint for _, footprint in valid])
+        for i, (number, _) in enumerate(valid):
+            if i in failed:
+                record(ImportRowError(row=number, errors=[failed[i]]))
+            else:
+                report.imported += 1
+    return report
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Importer des événements depuis un fichier CSV ou XLSX")
+    parser.add_argument("path")
+    parser.add_argument("--dry-run", action="store_true", help="valider sans écrire en base")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    from hypotheses_store import HypothesesStore
+    from repository import MongoEventRepository
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+    repository = MongoEventRepository.from_url(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+    general = HypothesesStore().current.general
+    try:
+        with open(args.path, 'rb') as f:
+            report = await import_events(
+                f, detect_format(args.path), repository, general, args.dry_run, args.chunk_size,
+            )
+    finally:
+        repository.close()
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
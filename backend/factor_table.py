@@ -0,0 +1,165 @@
+"""
+Table compilée des facteurs d'émission utilisés par le moteur de calcul
+
+Chaque facteur lu par les calculs est résolu une seule fois, au chargement des
+hypothèses, dans un attribut (__slots__) d'un objet en lecture seule. Les clés
+absentes des fichiers JSON sont signalées à ce moment-là et remplacées par la
+valeur par défaut déclarée ci-dessous.
+"""
+import logging
+from types import MappingProxyType
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Facteurs : nom -> (chemin dans get_emission_factors(), valeur par défaut)
+# Un chemin None désigne une constante sans équivalent dans les hypothèses.
+FACTOR_SPECS = {
+    # Énergie
+    "gas_kwh": (("energy", "gas_kwh"), 0.216),
+    "fuel_liter": (("energy", "fuel_liter"), 0.325),
+    "electricity_kwh": (("energy", "electricity_kwh"), 0.043197),
+    "coal_kg": (("energy", "coal_kg"), 0.231),
+    # Transport
+    "plane_long_haul": (("transport", "plane_long_haul"), 0.2247),
+    "plane_medium_haul": (("transport", "plane_medium_haul"), 0.1208),
+    "plane_short_haul": (("transport", "plane_short_haul"), 0.1302),
+    "car_average": (("transport", "car_average"), 0.216),
+    "train_average": (("transport", "train_average"), 0.000127),
+    "local_transport_euro_ratio": (("transport", "local_transport_euro_ratio"), 1.770),
+    # Restauration
+    "breakfast": (("catering", "petit_dejeuner_standard"), 0.5139),
+    "snack": (("catering", "collation_standard"), 0.3),
+    "meal_meat_heavy": (("catering", "a_dominante_animale_avec_boeuf"), 7.26),
+    "meal_balanced": (("catering", "classique"), 3.49),
+    "meal_vegetarian": (("catering", "vegetarien"), 1.5),
+    "water_liter": (None, 0.0003),
+    "coffee_unit": (None, 0.0077),
+    "soft_drink_unit": (None, 0.0033),
+    "alcohol_unit": (None, 1.59),
+    "dishes_disposable_meal": (None, 0.0004049),
+    "dishes_disposable_snack": (None, 0.000485),
+    "dishes_reusable": (None, 0.00005),
+    # Hébergements
+    "hotel_5star": (("accommodation", "hotel_5_etoiles"), 17.11),
+    "hotel_3star": (("accommodation", "hotel_3_etoiles"), 8.47),
+    "hotel_1star": (("accommodation", "hotel_sans_classement"), 4.73),
+    "other_accommodation": (("accommodation", "autre_hebergement_marchand"), 10.04),
+    # Déchets
+    "waste_plastic": (None, 2.99),
+    "waste_cardboard": (None, 0.078),
+    "waste_paper": (None, 0.078),
+    "waste_aluminum": (None, 1.8),
+    "waste_textile": (None, 0.263),
+    "waste_furniture": (None, 1.593),
+    # Communication
+    "poster": (("communication", "affichage_4_m2"), 0.5),
+    "flyer": (("communication", "tract_21x297"), 0.01),
+    "banner": (("communication", "kakemono_200_cm"), 0.202),
+    "streaming_hour_per_1000": (None, 0.0001184),
+    "communication_ratio": (("communication_ratio",), 0.170),
+    # Fret
+    "truck_tkm": (("freight", "distances", "poids_lourd_rigide_12_20_t"), 0.0592),
+    # Aménagements (kgCO2e/k€ dans les hypothèses, convertis en kgCO2e/€)
+    "site_rental_ratio": (("amenities", "location_site"), 170.0),
+    "reception_ratio": (("amenities", "accueil"), 170.0),
+    "construction_ratio": (("amenities", "construction"), 360.0),
+    "it_ratio": (("amenities", "informatique_et_equipements_electroniques"), 400.0),
+    # Achats et goodies
+    "goodies_ratio": (("purchases", "goodies", "fournitures_de_bureau_legeres"), 5.92),
+    "badge_plastic_soft": (("purchases", "badges", "plastique_souple"), 0.130419),
+    "badge_plastic_hard": (("purchases", "badges", "plastique_rigide"), 0.130419),
+    "badge_textile": (("purchases", "badges", "textile"), 0.130419),
+    "badge_paper": (("purchases", "badges", "papier"), 0.130419),
+}
+
+FACTOR_NAMES = tuple(FACTOR_SPECS)
+
+# Ratios exprimés en kgCO2e/k€, divisés par 1000 à la compilation
+PER_THOUSAND_EUROS = ("site_rental_ratio", "reception_ratio", "construction_ratio", "it_ratio")
+
+# Type de badge saisi -> facteur (un type inconnu retombe sur le plastique souple)
+BADGE_FACTORS = {
+    "plastic_soft": "badge_plastic_soft",
+    "plastic_hard": "badge_plastic_hard",
+    "textile": "badge_textile",
+    "paper": "badge_paper",
+}
+
+# Facteurs CEREN (chauffage, électricité, climatisation) si le type de bâtiment est inconnu
+BUILDING_FALLBACK_KEY = "bureaux"
+BUILDING_FALLBACK = {"heating": 12.896, "electricity": 19.7532, "cooling": 5.2313}
+
+_MISSING = object()
+
+
+def _lookup(emission_factors: Dict[str, Any], path) -> Any:
+    value = emission_factors
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _building_intensity(data: Dict[str, float]) -> float:
+    """kgCO2e/m²/an : chauffage + électricité spécifique + climatisation"""
+    return data.get("heating", 0) + data.get("electricity", 0) + data.get("cooling", 0)
+
+
+class FactorTable:
+    """Facteurs d'émission résolus, en lecture seule"""
+
+    __slots__ = FACTOR_NAMES + ("building_intensity", "building_fallback", "missing")
+
+    def __init__(self, building_intensity: Dict[str, float], building_fallback: float, missing=(), **factors: float):
+        for name in FACTOR_NAMES:
+            object.__setattr__(self, name, factors[name])
+        object.__setattr__(self, "building_intensity", MappingProxyType(dict(building_intensity)))
+        object.__setattr__(self, "building_fallback", building_fallback)
+        object.__setattr__(self, "missing", tuple(missing))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FactorTable est en lecture seule")
+
+    def __delattr__(self, name):
+        raise AttributeError("FactorTable est en lecture seule")
+
+    def badge_factor(self, badges_type: str) -> float:
+        return getattr(self, BADGE_FACTORS.get(badges_type, "badge_plastic_soft"))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in FACTOR_NAMES}
+
+
+def compile_factor_table(emission_factors: Dict[str, Any]) -> FactorTable:
+    """Résoudre tous les facteurs du moteur ; les clés manquantes sont signalées une seule fois"""
+    factors = {}
+    missing = []
+    for name, (path, default) in FACTOR_SPECS.items():
+        value = default if path is None else _lookup(emission_factors, path)
+        if value is _MISSING:
+            missing.append(".".join(path))
+            value = default
+        if name in PER_THOUSAND_EUROS:
+            value = value / 1000
+        factors[name] = value
+
+    buildings = emission_factors.get("building_estimation", {})
+    if BUILDING_FALLBACK_KEY in buildings:
+        building_fallback = _building_intensity(buildings[BUILDING_FALLBACK_KEY])
+    else:
+        missing.append(f"building_estimation.{BUILDING_FALLBACK_KEY}")
+        building_fallback = _building_intensity(BUILDING_FALLBACK)
+
+    if missing:
+        logger.warning(
+            "Facteurs absents des hypothèses, valeurs par défaut utilisées : %s", ", ".join(missing)
+        )
+
+    return FactorTable(
+        building_intensity={key: _building_intensity(data) for key, data in buildings.items()},
+        building_fallback=building_fallback,
+        missing=missing,
+        **factors,
+    )
@@ -1,75 +1,82 @@
 """
 Module pour charger les hypothèses depuis les fichiers JSON
 """
-import json
-from pathlib import Path
-
-HYPOTHESES_DIR = Path(__file__).parent / "hypotheses"
-
-def load_json(filepath):
-    """Charger un fichier JSON"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+from hypotheses_snapshot import load_hypotheses
 
 def load_all_hypotheses():
-    """Charger toutes les hypothèses depuis les fichiers JSON"""
+    """
+    Charger toutes les hypothèses, depuis le snapshot binaire s'il est à jour,
+    sinon depuis les fichiers JSON (voir hypotheses_snapshot.py)
+    """
+    _, hypotheses = load_hypotheses()
+    return hypotheses
+
+def compile_hypotheses(tables):
+    """Extraire les hypothèses utilisées des tables JSON (indexées par chemin relatif)"""
     hypotheses = {}
     
+    # Général
+    hypotheses['general'] = {
+        'otcp': tables['general/donnees_otcp_evenements_professionnels.json']['data'],
+        'personnes_par_exposant': tables['general/entreprise_personnes_par_exposant.json']['data'],
+    }
+    
     # Énergie
     hypotheses['energie'] = {
-        'combustibles': load_json(HYPOTHESES_DIR / 'energie' / 'combustibles.json')['data'],
-        'facteurs_ceren': load_json(HYPOTHESES_DIR / 'energie' / 'facteurs_ceren.json')['data'],
+        'combustibles': tables['energie/combustibles.json']['data'],
+        'facteurs_ceren': tables['energie/facteurs_ceren.json']['data'],
     }
     
     # Transport
     hypotheses['transport'] = {
-        'organisateurs_facteurs': load_json(HYPOTHESES_DIR / 'transport' / 'organisateurs_facteurs.json')['data'],
-        'ratios_moyens': load_json(HYPOTHESES_DIR / 'transport' / 'ratios_moyens.json')['data'],
+        'organisateurs_facteurs': tables['transport/organisateurs_facteurs.json']['data'],
+        'ratios_moyens': tables['transport/ratios_moyens.json']['data'],
     }
     
     # Restauration
     hypotheses['restauration'] = {
-        'regimes': load_json(HYPOTHESES_DIR / 'restauration' / 'regimes.json')['data'],
-        'petit_dej_collation': load_json(HYPOTHESES_DIR / 'restauration' / 'petit_dej_collation.json')['data'],
-        'vaisselle_facteurs': load_json(HYPOTHESES_DIR / 'restauration' / 'vaisselle_facteurs_emissions.json')['data'],
-        'ratio_monetaire': load_json(HYPOTHESES_DIR / 'restauration' / 'ratio_monetaire.json')['data'],
+        'regimes': tables['restauration/regimes.json']['data'],
+        'petit_dej_collation': tables['restauration/petit_dej_collation.json']['data'],
+        'vaisselle_facteurs': tables['restauration/vaisselle_facteurs_emissions.json']['data'],
+        'ratio_monetaire': tables['restauration/ratio_monetaire.json']['data'],
     }
     
     # Hébergements
     hypotheses['hebergements'] = {
-        'facteurs_emissions': load_json(HYPOTHESES_DIR / 'hebergements' / 'facteurs_emissions.json')['data'],
+        'facteurs_emissions': tables['hebergements/facteurs_emissions.json']['data'],
     }
     
     # Communication
     hypotheses['communication'] = {
-        'supports_physiques': load_json(HYPOTHESES_DIR / 'communication' / 'supports_physiques.json')['data'],
-        'supports_numeriques': load_json(HYPOTHESES_DIR / 'communication' / 'supports_numeriques.json')['data'],
-        'ratio_monetaire': load_json(HYPOTHESES_DIR / 'communication' / 'ratio_monetaire.json')['data'],
+        'supports_physiques': tables['communication/supports_physiques.json']['data'],
+        'supports_numeriques': tables['communication/supports_numeriques.json']['data'],
+        'ratio_monetaire': tables['communication/ratio_monetaire.json']['data'],
     }
     
     # Achats/Goodies
     hypotheses['achats_goodies'] = {
-        'badges_intensite': load_json(HYPOTHESES_DIR / 'achats_goodies' / 'badges_intensite.json')['data'],
-        'ratio_categorie': load_json(HYPOTHESES_DIR / 'achats_goodies' / 'ratio_categorie.json')['data'],
+        'badges_intensite': tables['achats_goodies/badges_intensite.json']['data'],
+        'ratio_categorie': tables['achats_goodies/ratio_categorie.json']['data'],
     }
     
     # Fret
     hypotheses['fret'] = {
-        'approche_distances': load_json(HYPOTHESES_DIR / 'fret' / 'approche_par_les_distances.json')['data'],
-        'approche_depenses': load_json(HYPOTHESES_DIR / 'fret' / 'approche_par_les_depenses.json')['data'],
+        'approche_distances': tables['fret/approche_par_les_distances.json']['data'],
+        'approche_depenses': tables['fret/approche_par_les_depenses.json']['data'],
     }
     
     # Aménagements
     hypotheses['amenagements'] = {
-        'ratio_monetaire': load_json(HYPOTHESES_DIR / 'amenagements_accueil' / 'ratio_monetaire.json')['data'],
+        'ratio_monetaire': tables['amenagements_accueil/ratio_monetaire.json']['data'],
     }
     
     return hypotheses
 
-def get_emission_factors():
+def get_emission_factors(hyp=None):
     """Obtenir les facteurs d'émission formatés pour le backend"""
     try:
-        hyp = load_all_hypotheses()
+        if hyp is None:
+            hyp = load_all_hypotheses()
         
         # Helper pour créer dict des badges
         badges_dict = {}
@@ -0,0 +1,148 @@
+"""
+Snapshot binaire des hypothèses pour accélérer le démarrage des workers
+
+Les hypothèses extraites des tables JSON de hypotheses/ sont compilées dans un
+unique fichier pickle versionné, accompagné d'une empreinte SHA-256 du contenu
+des JSON. Au démarrage, le snapshot n'est utilisé que si cette empreinte
+correspond toujours aux fichiers ; sinon les JSON sont relus. Pour ne pas
+relire les fichiers à chaque démarrage, le snapshot mémorise aussi la taille
+et la date de modification de chaque JSON et de chaque répertoire (ajout ou
+suppression de table) : l'empreinte n'est recalculée que si l'une d'elles a
+changé.
+
+Construction (depuis backend/) :
+    python -m hypotheses_snapshot
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HYPOTHESES_DIR = Path(__file__).parent / "hypotheses"
+SNAPSHOT_PATH = Path(__file__).parent / "hypotheses.snapshot"
+
+# À incrémenter si la structure du snapshot ou de compile_hypotheses() change
+SNAPSHOT_FORMAT = 2
+
+
+def hypothesis_files(directory: Path = HYPOTHESES_DIR) -> List[Tuple[str, str]]:
+    """(chemin relatif, chemin complet) des fichiers JSON des hypothèses, triés"""
+    files = []
+    for root, _, filenames in os.walk(directory):
+        prefix = os.path.relpath(root, directory).replace(os.sep, "/")
+        for name in filenames:
+            if name.endswith(".json"):
+                relative = name if prefix == "." else f"{prefix}/{name}"
+                files.append((relative, os.path.join(root, name)))
+    return sorted(files)
+
+
+def file_manifest(directory: Path = HYPOTHESES_DIR) -> Dict[str, Tuple[int, int]]:
+    """Taille et date de modification (ns) de chaque table et de chaque répertoire"""
+    manifest = {}
+    for root, _, _ in os.walk(directory):
+        relative = os.path.relpath(root, directory).replace(os.sep, "/")
+        stat = os.stat(root)
+        manifest[relative + "/"] = (0, stat.st_mtime_ns)
+    for relative, path in hypothesis_files(directory):
+        stat = os.stat(path)
+        manifest[relative] = (stat.st_size, stat.st_mtime_ns)
+    return manifest
+
+
+def manifest_matches(manifest: Dict[str, Tuple[int, int]], directory: Path = HYPOTHESES_DIR) -> bool:
+    """Vérifier le manifeste sans parcourir l'arborescence (un stat par entrée)"""
+    for relative, (size, mtime_ns) in manifest.items():
+        try:
+            stat = os.stat(os.path.join(directory, relative))
+        except OSError:
+            return False
+        if stat.st_mtime_ns != mtime_ns or (not relative.endswith("/") and stat.st_size != size):
+            return False
+    return True
+
+
+def content_hash(directory: Path = HYPOTHESES_DIR) -> str:
+    """Empreinte SHA-256 des chemins et du contenu de toutes les tables"""
+    digest = hashlib.sha256()
+    for relative, path in hypothesis_files(directory):
+        digest.update(relative.encode("utf-8"))
+        digest.update(b"\0")
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def read_json_tables(directory: Path = HYPOTHESES_DIR) -> Dict[str, Any]:
+    """Lire toutes les tables JSON, indexées par chemin relatif (ex. 'energie/combustibles.json')"""
+    tables = {}
+    for relative, path in hypothesis_files(directory):
+        with open(path, 'r', encoding='utf-8') as f:
+            tables[relative] = json.load(f)
+    return tables
+
+
+def compile_from_json(directory: Path = HYPOTHESES_DIR) -> Dict[str, Any]:
+    """Hypothèses compilées directement depuis les fichiers JSON"""
+    # Import local : hypotheses_loader importe ce module
+    from hypotheses_loader import compile_hypotheses
+    return compile_hypotheses(read_json_tables(directory))
+
+
+def build_snapshot(directory: Path = HYPOTHESES_DIR, path: Path = SNAPSHOT_PATH) -> str:
+    """Compiler les hypothèses dans le snapshot (écriture atomique) et renvoyer l'empreinte"""
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "content_hash": content_hash(directory),
+        "manifest": file_manifest(directory),
+        "hypotheses": compile_from_json(directory),
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return snapshot["content_hash"]
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Charger le snapshot, None s'il est absent, illisible ou d'un autre format"""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Snapshot des hypothèses illisible ({path}): {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def load_hypotheses(directory: Path = HYPOTHESES_DIR, path: Path = SNAPSHOT_PATH) -> Tuple[str, Dict[str, Any]]:
+    """
+    Renvoyer (empreinte, hypothèses) : depuis le snapshot s'il correspond aux
+    fichiers JSON actuels, sinon en relisant les JSON.
+    """
+    snapshot = read_snapshot(path)
+    if snapshot and manifest_matches(snapshot["manifest"], directory):
+        return snapshot["content_hash"], snapshot["hypotheses"]
+
+    # Fichiers touchés (ou snapshot absent) : seule l'empreinte du contenu fait foi
+    current_hash = content_hash(directory)
+    if snapshot and snapshot["content_hash"] == current_hash:
+        return current_hash, snapshot["hypotheses"]
+    if snapshot:
+        logger.info("Snapshot des hypothèses obsolète, lecture des fichiers JSON")
+    return current_hash, compile_from_json(directory)
+
+
+if __name__ == "__main__":
+    snapshot_hash = build_snapshot()
+    print(f"✓ Snapshot des hypothèses écrit dans {SNAPSHOT_PATH} ({snapshot_hash[:12]})")
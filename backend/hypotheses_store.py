@@ -0,0 +1,106 @@
+"""
+Store versionné des hypothèses, rechargeable sans redémarrer les workers
+
+Chaque chargement produit un HypothesesVersion immuable (facteurs bruts et
+table compilée), identifié par l'empreinte du contenu des fichiers JSON. Le
+rechargement construit entièrement la nouvelle version puis remplace la
+référence `current` en une seule affectation : la lecture ne prend aucun
+verrou, et une requête qui a capturé `current` à son début garde cette
+version jusqu'à la fin, même si un rechargement intervient entre-temps.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from calculation_engine import DEFAULT_GENERAL_HYPOTHESES, GeneralHypotheses, build_general_hypotheses
+from factor_table import FactorTable, compile_factor_table
+from hypotheses_loader import get_emission_factors
+from hypotheses_snapshot import HYPOTHESES_DIR, load_hypotheses
+
+logger = logging.getLogger(__name__)
+
+# Identifiant de la version utilisée quand les hypothèses n'ont pas pu être lues
+DEFAULT_VERSION_ID = "defaults"
+
+
+@dataclass(frozen=True)
+class HypothesesVersion:
+    """Hypothèses chargées à un instant donné (ne jamais modifier)"""
+    version_id: str
+    emission_factors: Dict[str, Any]
+    factors: FactorTable
+    general: GeneralHypotheses = DEFAULT_GENERAL_HYPOTHESES
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def load_version(directory: Path = HYPOTHESES_DIR) -> HypothesesVersion:
+    """Charger et compiler les hypothèses ; lève une exception si elles sont illisibles"""
+    version_id, hypotheses = load_hypotheses(directory)
+    emission_factors = get_emission_factors(hypotheses)
+    if not emission_factors:
+        raise ValueError("Hypothèses incomplètes, facteurs d'émission non construits")
+    return HypothesesVersion(
+        version_id=version_id,
+        emission_factors=emission_factors,
+        factors=compile_factor_table(emission_factors),
+        general=build_general_hypotheses(hypotheses),
+    )
+
+
+class HypothesesStore:
+    """Version active des hypothèses ; `current` est remplacé atomiquement au rechargement"""
+
+    def __init__(self, directory: Path = HYPOTHESES_DIR):
+        self.directory = directory
+        # Sérialise les rechargements entre eux, jamais les lectures
+        self._reload_lock = threading.Lock()
+        try:
+            self.current = load_version(directory)
+            print("✓ Hypothèses chargées depuis les fichiers JSON")
+        except Exception as e:
+            print(f"⚠ Erreur lors du chargement des hypothèses: {e}")
+            print("Utilisation des facteurs par défaut")
+            self.current = HypothesesVersion(
+                version_id=DEFAULT_VERSION_ID,
+                emission_factors={},
+                factors=compile_factor_table({}),
+            )
+
+    @property
+    def version_id(self) -> str:
+        return self.current.version_id
+
+    def reload(self) -> Tuple[HypothesesVersion, bool]:
+        """
+        Relire les hypothèses et activer la nouvelle version si le contenu a changé.
+        Renvoie (version active, changement). En cas d'erreur, la version active est
+        conservée et l'exception est propagée.
+        """
+        with self._reload_lock:
+            version = load_version(self.directory)
+            previous = self.current
+            if version.version_id == previous.version_id:
+                return previous, False
+            self.current = version
+        logger.info(f"Hypothèses rechargées : {previous.version_id[:12]} -> {version.version_id[:12]}")
+        return version, True
+
+    async def watch(self, on_change: Optional[Callable[[HypothesesVersion], Awaitable[None]]] = None):
+        """
+        Recharger à chaque modification des fichiers JSON (nécessite watchfiles).
+        on_change est attendu après chaque changement de version.
+        """
+        from watchfiles import awatch
+
+        async for _ in awatch(self.directory):
+            try:
+                version, changed = await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error(f"Rechargement des hypothèses refusé, version {self.version_id[:12]} conservée: {e}")
+                continue
+            if changed and on_change:
+                await on_change(version)
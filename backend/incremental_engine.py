@@ -0,0 +1,111 @@
+"""
+Recalcul incrémental du bilan, catégorie par catégorie
+
+Chaque catégorie dépend de sa section et, pour certaines, de champs de
+l'événement calculés par calculate_general_fields (visiteurs étrangers,
+exposants...). Le sous-total d'une catégorie est conservé avec l'empreinte de
+ses entrées : à la saisie d'une section, seule la catégorie correspondante est
+recalculée, et les catégories dépendant de l'événement ne le sont que si les
+champs qu'elles lisent ont changé. Les empreintes contiennent les valeurs
+elles-mêmes (pas de hachage), donc aucune collision possible.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from calculation_engine import calculate_general_fields
+from emissions import CATEGORY_CALCULATORS, build_emission_result, calculate_category_emissions
+from hypotheses_store import HypothesesVersion
+from models import EmissionResult, EventGeneral
+from repository import SECTION_MODELS, FootprintDocs, parse_dates
+
+# Champs de l'événement lus par chaque catégorie (en plus de sa section)
+CATEGORY_EVENT_FIELDS = {
+    "Énergie": ("event_duration_days",),
+    "Transport": (
+        "calculated_visitors_foreign",
+        "calculated_visitors_national_non_idf",
+        "calculated_exhibitors_foreign",
+        "calculated_exhibitors_national",
+        "organizers_count",
+    ),
+    "Restauration": (),
+    "Hébergements": ("calculated_visitors_foreign", "calculated_visitors_national_non_idf"),
+    "Déchets": (),
+    "Communication": (),
+    "Fret": (),
+    "Aménagements": (),
+    "Achats et goodies": ("total_visitors", "calculated_total_exhibitors"),
+}
+
+# Champs des sections sans effet sur le calcul
+IGNORED_SECTION_FIELDS = ("_id", "id", "event_id", "created_at", "updated_at")
+
+
+def section_fingerprint(doc: Optional[Dict[str, Any]]) -> Optional[tuple]:
+    if not doc:
+        return None
+    return tuple(sorted((k, v) for k, v in doc.items() if k not in IGNORED_SECTION_FIELDS))
+
+
+class IncrementalEngine:
+    """Sous-totaux par catégorie des derniers événements calculés (LRU)"""
+
+    def __init__(self, max_events: int = 10000):
+        self.max_events = max_events
+        # event_id -> (version des hypothèses, {catégorie: (empreinte, sous-total)})
+        self._subtotals: "OrderedDict[str, tuple]" = OrderedDict()
+        self.recomputed = 0
+        self.reused = 0
+
+    def compute(self, docs: FootprintDocs, hypotheses: HypothesesVersion) -> EmissionResult:
+        """Bilan d'un événement, en ne recalculant que les catégories dont les entrées ont changé"""
+        event_doc, section_docs = docs
+        # Champs dérivés recalculés avec les données OTCP de cette version
+        event = calculate_general_fields(EventGeneral(**parse_dates(dict(event_doc))), hypotheses.general)
+        return self.compute_event(event, section_docs, hypotheses)
+
+    def compute_event(
+        self, event: EventGeneral, section_docs: Dict[str, Any], hypotheses: HypothesesVersion
+    ) -> EmissionResult:
+        """Comme compute, pour un événement dont les champs dérivés sont déjà calculés"""
+        cached = self._subtotals.get(event.id)
+        previous = cached[1] if cached and cached[0] == hypotheses.version_id else {}
+        subtotals = {}
+        emissions_by_category = {}
+        for category, (collection, _, _) in CATEGORY_CALCULATORS.items():
+            doc = section_docs.get(collection)
+            fingerprint = (
+                section_fingerprint(doc),
+                tuple(getattr(event, field) for field in CATEGORY_EVENT_FIELDS[category]),
+            )
+            entry = previous.get(category)
+            if entry and entry[0] == fingerprint:
+                value = entry[1]
+                self.reused += 1
+            else:
+                section = SECTION_MODELS[collection](**parse_dates(dict(doc))) if doc else None
+                value = calculate_category_emissions(category, event, section, hypotheses.factors)
+                self.recomputed += 1
+            subtotals[category] = (fingerprint, value)
+            emissions_by_category[category] = value
+
+        self._subtotals[event.id] = (hypotheses.version_id, subtotals)
+        self._subtotals.move_to_end(event.id)
+        while len(self._subtotals) > self.max_events:
+            self._subtotals.popitem(last=False)
+
+        return build_emission_result(event, emissions_by_category)
+
+    def forget(self, event_id: str):
+        self._subtotals.pop(event_id, None)
+
+    def clear(self):
+        self._subtotals.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": len(self._subtotals),
+            "max_events": self.max_events,
+            "categories_recomputed": self.recomputed,
+            "categories_reused": self.reused,
+        }
@@ -0,0 +1,102 @@
+"""
+Sessions de calcul en direct du formulaire (WebSocket /api/ws/live)
+
+Le serveur garde l'état du formulaire (événement et sections saisies) pour
+la durée de la connexion. Le client envoie des correctifs champ par champ ;
+seule la section modifiée est validée, le bilan est recalculé par le moteur
+incrémental (seules les catégories dont les entrées ont changé), et la
+réponse ne contient que les champs dérivés et totaux qui ont changé.
+"""
+import uuid
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+
+from calculation_engine import calculate_general_fields
+from hypotheses_store import HypothesesVersion
+from incremental_engine import IGNORED_SECTION_FIELDS, IncrementalEngine
+from models import EventGeneral
+from repository import SECTION_MODELS, FootprintDocs, parse_dates
+from vectorized_engine import CALCULATED_EVENT_FIELDS
+
+EVENT_SECTION = "event"
+
+# Valeurs provisoires des champs obligatoires tant qu'ils ne sont pas saisis
+LIVE_EVENT_DEFAULTS = {"event_name": "", "event_type": "", "event_duration_days": 0, "total_visitors": 0}
+
+SUMMARY_FIELDS = ("total_emissions_kg", "emissions_per_participant", "emission_class")
+
+
+class LiveSessionError(ValueError):
+    """Correctif refusé (section inconnue ou valeurs invalides)"""
+
+    def __init__(self, detail: str, errors: Optional[list] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.errors = errors or []
+
+
+class LiveSession:
+    """État du formulaire d'une connexion et dernier résultat envoyé"""
+
+    def __init__(self, docs: Optional[FootprintDocs] = None):
+        event_doc, section_docs = docs or ({}, {})
+        self.event_doc = {**LIVE_EVENT_DEFAULTS, **event_doc}
+        self.event_doc.setdefault("id", str(uuid.uuid4()))
+        self.section_docs = {name: doc for name, doc in section_docs.items() if doc}
+        # Un seul événement par session : les sous-totaux des catégories non modifiées sont réutilisés
+        self.engine = IncrementalEngine(max_events=1)
+        self.sent: Dict[str, Dict[str, Any]] = {"derived": {}, "categories": {}, "summary": {}}
+
+    @property
+    def event_id(self) -> str:
+        return self.event_doc["id"]
+
+    def apply(self, section: str, fields: Dict[str, Any]):
+        """Valider et appliquer un correctif ; l'état est inchangé en cas d'erreur"""
+        if not isinstance(fields, dict):
+            raise LiveSessionError("Champ 'fields' invalide")
+        fields = {k: v for k, v in fields.items() if k not in IGNORED_SECTION_FIELDS}
+
+        if section == EVENT_SECTION:
+            model_class, current = EventGeneral, self.event_doc
+        elif section in SECTION_MODELS:
+            model_class, current = SECTION_MODELS[section], self.section_docs.get(section, {})
+        else:
+            raise LiveSessionError(f"Section inconnue: {section}")
+
+        candidate = {**current, **fields}
+        if section != EVENT_SECTION:
+            candidate["event_id"] = self.event_id
+        try:
+            model_class(**parse_dates(dict(candidate)))
+        except ValidationError as e:
+            raise LiveSessionError(
+                "Valeurs invalides",
+                e.errors(include_url=False, include_context=False, include_input=False),
+            )
+
+        if section == EVENT_SECTION:
+            self.event_doc = candidate
+        else:
+            self.section_docs[section] = candidate
+
+    def compute(self, hypotheses: HypothesesVersion) -> Dict[str, Dict[str, Any]]:
+        """Champs dérivés, émissions par catégorie et synthèse de l'état actuel"""
+        event = calculate_general_fields(EventGeneral(**parse_dates(dict(self.event_doc))), hypotheses.general)
+        result = self.engine.compute_event(event, self.section_docs, hypotheses)
+        return {
+            "derived": {field: getattr(event, field) for field in CALCULATED_EVENT_FIELDS},
+            "categories": dict(result.emissions_by_category),
+            "summary": {field: getattr(result, field) for field in SUMMARY_FIELDS},
+        }
+
+    def changes(self, hypotheses: HypothesesVersion) -> Dict[str, Dict[str, Any]]:
+        """Valeurs modifiées depuis le dernier envoi (tout au premier appel)"""
+        current = self.compute(hypotheses)
+        changed = {
+            group: {k: v for k, v in values.items() if k not in self.sent[group] or self.sent[group][k] != v}
+            for group, values in current.items()
+        }
+        self.sent = current
+        return changed
@@ -0,0 +1,47 @@
+"""
+Retard de la boucle d'événements
+
+Une tâche se réveille à intervalle fixe ; l'écart entre le réveil prévu et le
+réveil effectif est le temps pendant lequel la boucle était occupée (calcul
+synchrone dans une route, sérialisation...) et ne traitait aucune requête.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+DEFAULT_INTERVAL = 0.01
+MAX_SAMPLES = 100000
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = DEFAULT_INTERVAL, max_samples: int = MAX_SAMPLES):
+        self.interval = interval
+        # (horodatage time.time(), retard en secondes)
+        self.samples: "deque[tuple]" = deque(maxlen=max_samples)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append((time.time(), max(0.0, loop.time() - expected)))
+
+    def stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Retards en ms depuis `since` (horodatage Unix), tous les échantillons sinon"""
+        lags = sorted(lag for at, lag in self.samples if since is None or at >= since)
+        if not lags:
+            return {"interval_ms": self.interval * 1000, "samples": 0}
+
+        def pct(p: float) -> float:
+            return lags[min(len(lags) - 1, int(round(p / 100 * (len(lags) - 1))))] * 1000
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": len(lags),
+            "mean_ms": sum(lags) / len(lags) * 1000,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": lags[-1] * 1000,
+        }
@@ -0,0 +1,440 @@
+"""
+Modèles Pydantic de l'API (événement, sections et résultats)
+"""
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Any, List, Optional, Dict
+import uuid
+from datetime import datetime, timezone
+
+
+class EventGeneral(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_name: str
+    event_type: str  # Evenement_culturel, Evenement_professionnel, Evenement_sportif
+    event_subtype: Optional[str] = None  # Pour "Préciser" (Exposition, Conférence, etc.)
+    event_duration_days: int
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    
+    # Visiteurs
+    total_visitors: int
+    visitors_foreign_pct: float = 0  # Pourcentage
+    visitors_idf_pct: float = 0  # Pourcentage
+    unknown_foreign_rate: bool = False
+    unknown_idf_rate: bool = False
+    
+    # Organisations exposantes (événements professionnels)
+    exhibiting_organizations: int = 0
+    organizations_foreign_pct: float = 0
+    organizations_idf_pct: float = 0
+    unknown_organizations_foreign_rate: bool = False
+    unknown_organizations_idf_rate: bool = False
+    
+    # Sportifs/Artistes (événements culturels/sportifs)
+    athletes_artists_count: int = 0
+    athletes_artists_foreign_pct: float = 0
+    athletes_artists_idf_pct: float = 0
+    
+    # Champs calculés automatiquement (stockés pour référence)
+    calculated_visitors_foreign: Optional[int] = None
+    calculated_visitors_national_non_idf: Optional[int] = None
+    calculated_visitors_idf: Optional[int] = None
+    calculated_exhibitors_foreign: Optional[int] = None
+    calculated_exhibitors_national: Optional[int] = None
+    calculated_exhibitors_idf: Optional[int] = None
+    calculated_total_exhibitors: Optional[int] = None
+    calculated_total_foreign: Optional[int] = None
+    calculated_total_national: Optional[int] = None
+    calculated_total_idf: Optional[int] = None
+    
+    organizers_count: int = 0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class EventGeneralCreate(BaseModel):
+    event_name: str
+    event_type: str
+    event_subtype: Optional[str] = None
+    event_duration_days: int
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    total_visitors: int
+    visitors_foreign_pct: float = 0
+    visitors_idf_pct: float = 0
+    unknown_foreign_rate: bool = False
+    unknown_idf_rate: bool = False
+    exhibiting_organizations: int = 0
+    organizations_foreign_pct: float = 0
+    organizations_idf_pct: float = 0
+    unknown_organizations_foreign_rate: bool = False
+    unknown_organizations_idf_rate: bool = False
+    athletes_artists_count: int = 0
+    athletes_artists_foreign_pct: float = 0
+    athletes_artists_idf_pct: float = 0
+    organizers_count: int = 0
+
+class EnergyData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    approach: str  # "real" or "estimated"
+    
+    # Real consumption
+    gas_kwh: float = 0
+    fuel_liters: float = 0
+    electricity_kwh: float = 0
+    coal_kg: float = 0
+    
+    # Estimated consumption
+    building_type: Optional[str] = None
+    surface_m2: Optional[float] = None
+    
+    # Generators
+    has_generators: bool = False
+    generators_fuel_liters: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class EnergyDataCreate(BaseModel):
+    event_id: str
+    approach: str
+    gas_kwh: float = 0
+    fuel_liters: float = 0
+    electricity_kwh: float = 0
+    coal_kg: float = 0
+    building_type: Optional[str] = None
+    surface_m2: Optional[float] = None
+    has_generators: bool = False
+    generators_fuel_liters: float = 0
+
+class TransportData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Visitors transport
+    visitors_avg_distance_foreign_km: float = 0
+    visitors_avg_distance_national_km: float = 0
+    visitors_local_transport_expenses: float = 0
+    
+    # Exhibitors transport
+    exhibitors_avg_distance_foreign_km: float = 0
+    exhibitors_avg_distance_national_km: float = 0
+    exhibitors_local_transport_expenses: float = 0
+    
+    # Organizers transport
+    organizers_avg_distance_km: float = 0
+    organizers_round_trips: int = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TransportDataCreate(BaseModel):
+    event_id: str
+    visitors_avg_distance_foreign_km: float = 0
+    visitors_avg_distance_national_km: float = 0
+    visitors_local_transport_expenses: float = 0
+    exhibitors_avg_distance_foreign_km: float = 0
+    exhibitors_avg_distance_national_km: float = 0
+    exhibitors_local_transport_expenses: float = 0
+    organizers_avg_distance_km: float = 0
+    organizers_round_trips: int = 0
+
+class CateringData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Meals
+    breakfasts_count: int = 0
+    lunches_count: int = 0
+    dinners_count: int = 0
+    snacks_count: int = 0
+    
+    # Meal types
+    meals_meat_heavy_pct: float = 50
+    meals_balanced_pct: float = 30
+    meals_vegetarian_pct: float = 20
+    
+    # Dishes
+    dishes_type: str = "disposable"  # "disposable" or "reusable"
+    
+    # Beverages
+    water_liters: float = 0
+    coffee_units: int = 0
+    soft_drinks_units: int = 0
+    alcohol_units: int = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class CateringDataCreate(BaseModel):
+    event_id: str
+    breakfasts_count: int = 0
+    lunches_count: int = 0
+    dinners_count: int = 0
+    snacks_count: int = 0
+    meals_meat_heavy_pct: float = 50
+    meals_balanced_pct: float = 30
+    meals_vegetarian_pct: float = 20
+    dishes_type: str = "disposable"
+    water_liters: float = 0
+    coffee_units: int = 0
+    soft_drinks_units: int = 0
+    alcohol_units: int = 0
+
+class AccommodationData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Foreign visitors
+    foreign_hotel_5star_pct: float = 0
+    foreign_hotel_3star_pct: float = 0
+    foreign_hotel_1star_pct: float = 0
+    foreign_other_accommodation_pct: float = 0
+    foreign_family_pct: float = 0
+    foreign_avg_nights: float = 0
+    
+    # National non-IDF visitors
+    national_hotel_5star_pct: float = 0
+    national_hotel_3star_pct: float = 0
+    national_hotel_1star_pct: float = 0
+    national_other_accommodation_pct: float = 0
+    national_family_pct: float = 0
+    national_avg_nights: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class AccommodationDataCreate(BaseModel):
+    event_id: str
+    foreign_hotel_5star_pct: float = 0
+    foreign_hotel_3star_pct: float = 0
+    foreign_hotel_1star_pct: float = 0
+    foreign_other_accommodation_pct: float = 0
+    foreign_family_pct: float = 0
+    foreign_avg_nights: float = 0
+    national_hotel_5star_pct: float = 0
+    national_hotel_3star_pct: float = 0
+    national_hotel_1star_pct: float = 0
+    national_other_accommodation_pct: float = 0
+    national_family_pct: float = 0
+    national_avg_nights: float = 0
+
+class WasteData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Waste by type (kg)
+    plastic_kg: float = 0
+    cardboard_kg: float = 0
+    paper_kg: float = 0
+    aluminum_kg: float = 0
+    textile_kg: float = 0
+    furniture_kg: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class WasteDataCreate(BaseModel):
+    event_id: str
+    plastic_kg: float = 0
+    cardboard_kg: float = 0
+    paper_kg: float = 0
+    aluminum_kg: float = 0
+    textile_kg: float = 0
+    furniture_kg: float = 0
+
+class CommunicationData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Physical supports
+    posters_count: int = 0
+    flyers_count: int = 0
+    banners_count: int = 0
+    
+    # Digital supports
+    streaming_hours: float = 0
+    streaming_audience: int = 0
+    
+    # Expenses
+    communication_expenses: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class CommunicationDataCreate(BaseModel):
+    event_id: str
+    posters_count: int = 0
+    flyers_count: int = 0
+    banners_count: int = 0
+    streaming_hours: float = 0
+    streaming_audience: int = 0
+    communication_expenses: float = 0
+
+class FreightData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Freight by type
+    decor_weight_kg: float = 0
+    decor_distance_km: float = 0
+    equipment_weight_kg: float = 0
+    equipment_distance_km: float = 0
+    food_weight_kg: float = 0
+    food_distance_km: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class FreightDataCreate(BaseModel):
+    event_id: str
+    decor_weight_kg: float = 0
+    decor_distance_km: float = 0
+    equipment_weight_kg: float = 0
+    equipment_distance_km: float = 0
+    food_weight_kg: float = 0
+    food_distance_km: float = 0
+
+class AmenitiesData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Expenses
+    site_rental_expenses: float = 0
+    reception_expenses: float = 0
+    construction_expenses: float = 0
+    it_expenses: float = 0
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class AmenitiesDataCreate(BaseModel):
+    event_id: str
+    site_rental_expenses: float = 0
+    reception_expenses: float = 0
+    construction_expenses: float = 0
+    it_expenses: float = 0
+
+class PurchasesData(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    event_id: str
+    
+    # Goodies
+    goodies_expenses_per_person: float = 0
+    
+    # Badges
+    badges_visitors: int = 0
+    badges_exhibitors: int = 0
+    badges_organizers: int = 0
+    badges_type: str = "plastic_soft"  # "plastic_soft", "plastic_hard", "textile", "paper"
+    
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class PurchasesDataCreate(BaseModel):
+    event_id: str
+    goodies_expenses_per_person: float = 0
+    badges_visitors: int = 0
+    badges_exhibitors: int = 0
+    badges_organizers: int = 0
+    badges_type: str = "plastic_soft"
+
+class Top3Emitter(BaseModel):
+    category: str
+    emissions: float
+
+class EmissionResult(BaseModel):
+    event_id: str
+    event_name: str
+    total_emissions_kg: float
+    emissions_by_category: Dict[str, float]
+    emissions_per_participant: float
+    emission_class: str  # A, B, C, D, E, F, G
+    top_3_emitters: List[Top3Emitter]
+
+class BatchCalculationRequest(BaseModel):
+    event_ids: List[str]
+
+class HypothesesVersionInfo(BaseModel):
+    version_id: str
+    loaded_at: datetime
+    missing_factors: List[str] = []
+    changed: bool = False  # Renseigné par le rechargement
+
+class DistributionSummary(BaseModel):
+    mean: float
+    std: float
+    p5: float
+    p50: float
+    p95: float
+
+class UncertaintyResult(BaseModel):
+    event_id: str
+    event_name: str
+    draws: int
+    seed: Optional[int] = None
+    total_emissions_kg: float  # Valeur ponctuelle (facteurs centraux)
+    total: DistributionSummary
+    emissions_per_participant: DistributionSummary
+    emissions_by_category: Dict[str, DistributionSummary]
+    emission_class_probabilities: Dict[str, float]
+
+class ScenarioRequest(BaseModel):
+    # "section.champ" -> valeurs ; les variantes sont le produit cartésien de la grille
+    grid: Dict[str, List[Any]] = {}
+    # Variantes explicites, ajoutées après celles de la grille
+    variants: List[Dict[str, Any]] = []
+    include_categories: bool = False
+
+class ScenarioResult(BaseModel):
+    event_id: str
+    event_name: str
+    base_total_emissions_kg: float
+    base_emission_class: str
+    parameters: List[str]
+    # Tableau compact : une ligne par variante, valeurs dans l'ordre de `parameters`
+    values: List[List[Any]]
+    total_emissions_kg: List[float]
+    emissions_per_participant: List[float]
+    emission_class: List[str]
+    emissions_by_category: Optional[Dict[str, List[float]]] = None
+
+class SensitivityItem(BaseModel):
+    name: str  # "section.champ" (saisie) ou "factor.nom" (facteur d'émission)
+    kind: str  # "input" ou "factor"
+    value: float
+    derivative: float  # ∂total/∂valeur (kgCO2e par unité)
+    contribution: float  # valeur × dérivée (kgCO2e)
+    low: float  # total pour valeur × (1 - variation)
+    high: float  # total pour valeur × (1 + variation)
+    swing: float  # |high - low|
+
+class SensitivityResult(BaseModel):
+    event_id: str
+    event_name: str
+    total_emissions_kg: float
+    variation_pct: float
+    items: List[SensitivityItem]  # Triés par swing décroissant (diagramme tornade)
+
+class ImportRowError(BaseModel):
+    row: int  # Numéro de ligne dans le fichier (en-tête = 1)
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    rows: int = 0
+    imported: int = 0  # Lignes écrites (lignes valides en dry_run)
+    failed: int = 0
+    dry_run: bool = False
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
@@ -0,0 +1,36 @@
+"""
+Snapshot de non-régression des moteurs de calcul
+
+cases.json contient des cas d'entrée couvrant toutes les combinaisons
+event_type / event_subtype, les résultats attendus (champs calculated_*,
+émissions par catégorie, total, émissions par participant et classe) et le
+bundle d'évaluation des hypothèses avec lesquelles ils ont été figés : les
+cas ne dépendent pas des hypothèses en cours.
+
+Les résultats attendus sont ceux qu'a produits le moteur scalaire lors de la
+capture, pas des valeurs relevées dans le classeur Excel : le snapshot
+détecte tout changement de comportement des moteurs, il ne prouve pas leur
+parité avec le classeur. Il est figé : ne pas le régénérer, un écart est à
+corriger dans le code.
+
+    python -m regression_snapshot   # diff des deux moteurs et temps par cas
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+SNAPSHOT_DIR = Path(__file__).parent
+CASES_PATH = SNAPSHOT_DIR / "cases.json"
+# Temps des exécutions précédentes (python -m regression_snapshot --record), non versionné
+HISTORY_PATH = SNAPSHOT_DIR / "history.jsonl"
+
+# À incrémenter si la structure de cases.json change
+SNAPSHOT_FORMAT = 1
+
+
+def load_corpus(path: Path = CASES_PATH) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    if corpus.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Format du snapshot non pris en charge: {corpus.get('format')}")
+    return corpus
@@ -0,0 +1,207 @@
+"""
+Diff du snapshot de non-régression contre les deux moteurs, avec le temps de chaque cas
+
+Chaque cas est calculé en mémoire par le moteur scalaire (calculate_general_fields
+et compute_emission_result) et par le moteur vectorisé (un événement, puis tous
+les cas en un seul lot). Tous les champs calculated_*, les émissions de chaque
+catégorie, le total, les émissions par participant et la classe sont comparés
+aux résultats attendus. Le temps médian de chaque cas est mesuré pour chaque
+moteur ; avec --record il est ajouté à regression_snapshot/history.jsonl et comparé à
+l'exécution enregistrée précédente.
+
+Usage (depuis backend/) :
+    python -m regression_snapshot [--repeat 20] [--record] [--verbose]
+
+Code de sortie 1 si un cas n'est pas reproduit.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from emissions import CATEGORIES
+from evaluation_bundle import CONFORMANCE_TOLERANCE, bundle_factor_table, bundle_general_hypotheses
+from repository import EventFootprint
+from vectorized_engine import (
+    CALCULATED_EVENT_FIELDS,
+    columns_from_footprints,
+    compute_emissions,
+    compute_general_columns,
+    resolve_factor_vector,
+)
+
+from regression_snapshot import CASES_PATH, HISTORY_PATH, load_corpus
+from regression_snapshot.capture import build_case_footprint, run_scalar
+
+# Un cas est signalé s'il est plus lent que lors de l'exécution précédente
+# au-delà de ce rapport et de cet écart absolu (bruit de mesure)
+REGRESSION_RATIO = 1.5
+REGRESSION_MIN_US = 5.0
+SLOWEST_REPORTED = 5
+
+
+def run_vectorized(footprints: List[EventFootprint], factor_vector, general) -> List[Dict[str, Any]]:
+    columns = columns_from_footprints(footprints)
+    derived = compute_general_columns(columns, general)
+    columns.update(derived)
+    result = compute_emissions(columns, factor_vector)
+    return [
+        {
+            "derived": {field: int(derived[field][i]) for field in CALCULATED_EVENT_FIELDS},
+            "emissions_by_category": {
+                category: float(result.emissions_by_category[category][i]) for category in CATEGORIES
+            },
+            "total_emissions_kg": float(result.total_emissions_kg[i]),
+            "emissions_per_participant": float(result.emissions_per_participant[i]),
+            "emission_class": str(result.emission_class[i]),
+        }
+        for i in range(len(footprints))
+    ]
+
+
+def diff(actual: Dict[str, Any], expected: Dict[str, Any], path: str = "") -> List[str]:
+    """Écarts entre un résultat et le résultat attendu, un message par champ"""
+    differences = []
+    for key, value in expected.items():
+        name = f"{path}{key}"
+        got = actual.get(key)
+        if isinstance(value, dict):
+            differences.extend(diff(got or {}, value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if got is None or abs(got - value) > CONFORMANCE_TOLERANCE * max(1.0, abs(value)):
+                differences.append(f"{name}: attendu {value!r}, obtenu {got!r}")
+        elif got != value:
+            differences.append(f"{name}: attendu {value!r}, obtenu {got!r}")
+    return differences
+
+
+def median_us(function: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def run(corpus: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Diff et temps de chaque cas ({"failures": {...}, "timings": {...}, "batch_us": ...})"""
+    bundle = corpus["hypotheses"]
+    factors, general = bundle_factor_table(bundle), bundle_general_hypotheses(bundle)
+    factor_vector = resolve_factor_vector(factors)
+    cases = corpus["cases"]
+
+    failures: Dict[str, List[str]] = {}
+    timings: Dict[str, Dict[str, float]] = {}
+    footprints = []
+    for case in cases:
+        footprint = build_case_footprint(case["input"])
+        footprints.append(footprint)
+        expected = case["expected"]
+        for engine, actual in (
+            ("scalaire", run_scalar(footprint, factors, general)),
+            ("vectorisé", run_vectorized([footprint], factor_vector, general)[0]),
+        ):
+            differences = diff(actual, expected)
+            if differences:
+                failures.setdefault(case["name"], []).extend(f"[{engine}] {d}" for d in differences)
+        timings[case["name"]] = {
+            "scalar_us": median_us(lambda: run_scalar(footprint, factors, general), repeat),
+            "vectorized_us": median_us(lambda: run_vectorized([footprint], factor_vector, general), repeat),
+        }
+
+    # Tous les cas en un lot : encodage des catégories et sélections sur plusieurs lignes
+    for case, actual in zip(cases, run_vectorized(footprints, factor_vector, general)):
+        differences = diff(actual, case["expected"])
+        if differences:
+            failures.setdefault(case["name"], []).extend(f"[lot] {d}" for d in differences)
+    batch_us = median_us(lambda: run_vectorized(footprints, factor_vector, general), repeat)
+    return {"failures": failures, "timings": timings, "batch_us": batch_us}
+
+
+def last_record(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+
+def regressions(timings: Dict[str, Dict[str, float]], previous: Dict[str, Any]) -> List[str]:
+    """Cas nettement plus lents que lors de l'exécution enregistrée précédente"""
+    slower = []
+    for name, current in timings.items():
+        before = previous["cases"].get(name)
+        if not before:
+            continue
+        for key, value in current.items():
+            old = before.get(key)
+            if old and value > old * REGRESSION_RATIO and value - old > REGRESSION_MIN_US:
+                slower.append(f"{name} [{key}]: {old:.1f} µs -> {value:.1f} µs")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Non-régression des moteurs contre le snapshot figé")
+    parser.add_argument("--cases", default=str(CASES_PATH))
+    parser.add_argument("--repeat", type=int, default=20, help="mesures par cas (médiane)")
+    parser.add_argument("--record", action="store_true", help="ajouter les temps à l'historique")
+    parser.add_argument("--history", default=str(HISTORY_PATH))
+    parser.add_argument("--verbose", action="store_true", help="afficher le temps de chaque cas")
+    args = parser.parse_args()
+
+    corpus = load_corpus(Path(args.cases))
+    report = run(corpus, args.repeat)
+    failures, timings = report["failures"], report["timings"]
+
+    for name, differences in failures.items():
+        print(f"✗ {name}")
+        for difference in differences:
+            print(f"    {difference}")
+
+    if args.verbose:
+        print(f"\n{'cas':<90} {'scalaire':>10} {'vectorisé':>10}")
+        for name, timing in timings.items():
+            print(f"{name:<90} {timing['scalar_us']:>8.1f}µs {timing['vectorized_us']:>8.1f}µs")
+
+    print(f"\nTemps médian par cas ({args.repeat} mesures, {len(timings)} cas)")
+    for key, label in (("scalar_us", "scalaire"), ("vectorized_us", "vectorisé (1 événement)")):
+        values = [timing[key] for timing in timings.values()]
+        print(f"  {label:<25} médiane {statistics.median(values):>8.1f} µs   max {max(values):>8.1f} µs")
+    print(f"  {'vectorisé (lot complet)':<25} {report['batch_us']:>8.1f} µs "
+          f"({report['batch_us'] / len(timings):.1f} µs/cas)")
+    slowest = sorted(timings.items(), key=lambda item: item[1]["scalar_us"], reverse=True)[:SLOWEST_REPORTED]
+    print("  Cas les plus lents (scalaire) : " + ", ".join(f"{name} ({t['scalar_us']:.1f} µs)" for name, t in slowest))
+
+    history = Path(args.history)
+    previous = last_record(history)
+    if previous:
+        slower = regressions(timings, previous)
+        print(f"\nComparaison avec l'exécution du {previous['date']} : "
+              f"{len(slower)} cas plus lents (>{REGRESSION_RATIO:g}x)")
+        for line in slower:
+            print(f"  {line}")
+    if args.record:
+        with open(history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "version_id": corpus["version_id"],
+                "repeat": args.repeat,
+                "batch_us": report["batch_us"],
+                "cases": timings,
+            }, ensure_ascii=False) + "\n")
+
+    if failures:
+        print(f"\n✗ {len(failures)}/{len(corpus['cases'])} cas non reproduits")
+        raise SystemExit(1)
+    print(f"\n✓ {len(corpus['cases'])} cas reproduits par les moteurs scalaire et vectorisé")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Capture du snapshot de non-régression (regression_snapshot/cases.json)
+
+Chaque combinaison event_type / event_subtype (sous-types OTCP, sous-type
+inconnu et absent) est déclinée en deux variantes : taux saisis et taux
+inconnus (repli sur le profil OTCP). S'y ajoutent des cas limites : aucune
+section, aucun participant, parts supérieures à 100 %, dates sans durée.
+Les valeurs saisies sont tirées d'un générateur à graine fixe : une nouvelle
+capture produit les mêmes entrées.
+
+Les résultats attendus sont ceux du moteur scalaire (calculate_general_fields
+et compute_emission_result) avec la version courante des hypothèses : une
+capture fige le comportement du moteur, elle ne le compare pas au classeur.
+Le snapshot versionné est figé et n'est pas écrasé sans --force ; une
+nouvelle capture ne se justifie que pour une évolution voulue des formules,
+le diff de cases.json montre alors les résultats modifiés.
+
+Usage (depuis backend/) :
+    python -m regression_snapshot.capture --output /tmp/cases.json
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+from calculation_engine import ATHLETES_ARTISTS_TYPES, PROFESSIONAL, calculate_general_fields
+from emissions import compute_emission_result
+from evaluation_bundle import build_bundle, bundle_factor_table, bundle_general_hypotheses
+from factor_table import BADGE_FACTORS
+from hypotheses_store import load_version
+from models import EventGeneral
+from repository import SECTION_MODELS, EventFootprint
+from vectorized_engine import CALCULATED_EVENT_FIELDS, SECTION_FIELDS
+
+from regression_snapshot import CASES_PATH, SNAPSHOT_FORMAT
+
+CAPTURE_SEED = 1789
+
+# Types de la liste déroulante du classeur, et un type hors liste (branche SINON)
+EVENT_TYPES = (PROFESSIONAL,) + ATHLETES_ARTISTS_TYPES + ("Autre",)
+UNKNOWN_SUBTYPE = "Sous-type inconnu"
+
+
+def _sections(rng: random.Random, building_types: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Toutes les sections saisies, valeurs entières ou décimales selon le modèle"""
+    sections = {}
+    for name, fields in SECTION_FIELDS.items():
+        model_fields = SECTION_MODELS[name].model_fields
+        values = {}
+        for field in fields:
+            if model_fields[field].annotation is int:
+                values[field] = rng.choice((0, rng.randint(1, 5000)))
+            else:
+                values[field] = rng.choice((0.0, round(rng.uniform(0, 100), 2), round(rng.uniform(0, 6000), 1)))
+        sections[name] = values
+    sections["energy"].update(
+        approach=rng.choice(("real", "estimated")),
+        building_type=rng.choice(building_types + [None]),
+        has_generators=rng.random() < 0.5,
+    )
+    sections["catering"]["dishes_type"] = rng.choice(("disposable", "reusable"))
+    sections["purchases"]["badges_type"] = rng.choice(tuple(BADGE_FACTORS) + ("inconnu",))
+    return sections
+
+
+def _event(rng: random.Random, index: int, name: str, event_type: str, subtype, unknown_rates: bool) -> Dict[str, Any]:
+    # Identifiant utilisable dans une URL (/api/calculate/{event_id}), inchangé
+    # depuis la première capture pour ne pas modifier les cas
+    return {
+        "id": f"golden-{index:03d}",
+        "event_name": name,
+        "event_type": event_type,
+        "event_subtype": subtype,
+        "event_duration_days": rng.randint(1, 10),
+        "total_visitors": rng.randint(1, 50000),
+        "visitors_foreign_pct": round(rng.uniform(0, 40), 1),
+        "visitors_idf_pct": round(rng.uniform(0, 50), 1),
+        "unknown_foreign_rate": unknown_rates,
+        "unknown_idf_rate": unknown_rates,
+        "exhibiting_organizations": rng.randint(0, 500),
+        "organizations_foreign_pct": round(rng.uniform(0, 40), 1),
+        "organizations_idf_pct": round(rng.uniform(0, 50), 1),
+        "unknown_organizations_foreign_rate": unknown_rates,
+        "unknown_organizations_idf_rate": unknown_rates,
+        "athletes_artists_count": rng.randint(0, 300),
+        "athletes_artists_foreign_pct": round(rng.uniform(0, 40), 1),
+        "athletes_artists_idf_pct": round(rng.uniform(0, 50), 1),
+        "organizers_count": rng.randint(0, 100),
+    }
+
+
+def build_cases(subtypes: List[str], building_types: List[str]) -> List[Dict[str, Any]]:
+    """Cas d'entrée {"name", "input": {"event", "sections"}}"""
+    rng = random.Random(CAPTURE_SEED)
+    cases = []
+    for event_type in EVENT_TYPES:
+        for subtype in subtypes + [UNKNOWN_SUBTYPE, None]:
+            for variant, unknown_rates in (("taux_saisis", False), ("taux_inconnus", True)):
+                name = f"{event_type}/{subtype or '-'}/{variant}"
+                cases.append({
+                    "name": name,
+                    "input": {
+                        "event": _event(rng, len(cases), name, event_type, subtype, unknown_rates),
+                        "sections": _sections(rng, building_types),
+                    },
+                })
+
+    def edge(name: str, event_type: str, sections: Dict[str, Any], **event_fields):
+        event = _event(rng, len(cases), name, event_type, subtypes[0] if subtypes else None, False)
+        event.update(event_fields)
+        cases.append({"name": f"limite/{name}", "input": {"event": event, "sections": sections}})
+
+    edge("sans_section", PROFESSIONAL, {})
+    edge("sans_participant", PROFESSIONAL, _sections(rng, building_types),
+         total_visitors=0, exhibiting_organizations=0, organizers_count=0)
+    edge("parts_au_dela_de_100", PROFESSIONAL, _sections(rng, building_types),
+         visitors_foreign_pct=80.0, visitors_idf_pct=60.0,
+         organizations_foreign_pct=70.0, organizations_idf_pct=50.0)
+    edge("sportifs_parts_au_dela_de_100", ATHLETES_ARTISTS_TYPES[1], _sections(rng, building_types),
+         athletes_artists_foreign_pct=90.0, athletes_artists_idf_pct=40.0)
+    edge("dates_sans_duree", ATHLETES_ARTISTS_TYPES[0], _sections(rng, building_types),
+         start_date="2024-06-01", end_date="2024-06-03", event_duration_days=0)
+    zero = _sections(rng, building_types)
+    for name, fields in SECTION_FIELDS.items():
+        zero[name].update(dict.fromkeys(fields, 0))
+    edge("sections_a_zero", PROFESSIONAL, zero)
+    return cases
+
+
+def build_case_footprint(case_input: Dict[str, Any]) -> EventFootprint:
+    event = EventGeneral(**case_input["event"])
+    sections = {
+        name: SECTION_MODELS[name](event_id=event.id, **fields) for name, fields in case_input["sections"].items()
+    }
+    return EventFootprint(event=event, **sections)
+
+
+def run_scalar(footprint: EventFootprint, factors, general) -> Dict[str, Any]:
+    """Résultats du moteur scalaire pour un cas"""
+    calculate_general_fields(footprint.event, general)
+    result = compute_emission_result(footprint, factors)
+    return {
+        "derived": {field: getattr(footprint.event, field) for field in CALCULATED_EVENT_FIELDS},
+        "emissions_by_category": dict(result.emissions_by_category),
+        "total_emissions_kg": result.total_emissions_kg,
+        "emissions_per_participant": result.emissions_per_participant,
+        "emission_class": result.emission_class,
+    }
+
+
+def capture() -> Dict[str, Any]:
+    version = load_version()
+    # Aller-retour JSON : les cas sont figés avec les valeurs telles qu'elles seront relues
+    bundle = json.loads(json.dumps(build_bundle(version)))
+    factors, general = bundle_factor_table(bundle), bundle_general_hypotheses(bundle)
+    subtypes = sorted({profile.label for profile in general.profiles.values()})
+    cases = build_cases(subtypes, sorted(factors.building_intensity) + ["type_inconnu"])
+    for case in cases:
+        case["expected"] = run_scalar(build_case_footprint(case["input"]), factors, general)
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version_id": version.version_id,
+        "hypotheses": bundle,
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capturer les résultats du moteur scalaire")
+    parser.add_argument("--output", default=str(CASES_PATH))
+    parser.add_argument("--force", action="store_true", help="écraser un fichier existant (dont le snapshot versionné)")
+    args = parser.parse_args()
+
+    if Path(args.output).exists() and not args.force:
+        parser.error(f"{args.output} existe déjà (--force pour l'écraser)")
+    corpus = capture()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"✓ {len(corpus['cases'])} cas figés (hypothèses {corpus['version_id'][:12]}) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,687 @@
+"""
+Couche d'accès aux données : chargement d'un événement et de ses sections
+
+EventRepository définit les opérations utilisées par les routes et les
+traitements par lots ; MongoEventRepository (Motor) et InMemoryEventRepository
+(documents en mémoire, sans base) les implémentent.
+"""
+import asyncio
+import base64
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from models import (
+    EventGeneral,
+    EnergyData,
+    TransportData,
+    CateringData,
+    AccommodationData,
+    WasteData,
+    CommunicationData,
+    FreightData,
+    AmenitiesData,
+    PurchasesData,
+)
+
+logger = logging.getLogger(__name__)
+
+# Collection MongoDB de chaque section -> modèle Pydantic
+SECTION_MODELS = {
+    "energy": EnergyData,
+    "transport": TransportData,
+    "catering": CateringData,
+    "accommodation": AccommodationData,
+    "waste": WasteData,
+    "communication": CommunicationData,
+    "freight": FreightData,
+    "amenities": AmenitiesData,
+    "purchases": PurchasesData,
+}
+
+# Documents bruts d'un événement : (événement, {collection: section ou None})
+FootprintDocs = Tuple[Dict[str, Any], Dict[str, Optional[Dict[str, Any]]]]
+# Sections d'un lot d'événements : {collection: {event_id: section}}
+SectionDocs = Dict[str, Dict[str, Dict[str, Any]]]
+
+# Ordre de pagination des événements (clé de curseur)
+EVENT_SORT = [("created_at", ASCENDING), ("id", ASCENDING)]
+
+# Clés uniques : id des événements, event_id de chaque section (une par événement)
+UNIQUE_KEYS = [("events", "id")] + [(collection, "event_id") for collection in SECTION_MODELS]
+
+# Doublons retirés par la migration python -m deduplicate
+ARCHIVE_COLLECTION = "duplicates_archive"
+
+# Préfixe des champs ajoutés par les $lookup (évite toute collision avec l'événement)
+LOOKUP_PREFIX = "__section_"
+
+
+@dataclass
+class EventFootprint:
+    """Événement et ses sections (None si la section n'a pas été saisie)"""
+    event: EventGeneral
+    energy: Optional[EnergyData] = None
+    transport: Optional[TransportData] = None
+    catering: Optional[CateringData] = None
+    accommodation: Optional[AccommodationData] = None
+    waste: Optional[WasteData] = None
+    communication: Optional[CommunicationData] = None
+    freight: Optional[FreightData] = None
+    amenities: Optional[AmenitiesData] = None
+    purchases: Optional[PurchasesData] = None
+
+
+def parse_dates(doc: Dict[str, Any], fields=("created_at", "updated_at")) -> Dict[str, Any]:
+    """Convertir les dates stockées en ISO 8601 en datetime"""
+    for field in fields:
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+
+def build_footprint(event_doc: Dict[str, Any], section_docs: Dict[str, Optional[Dict[str, Any]]]) -> EventFootprint:
+    """Construire l'objet typé à partir des documents MongoDB bruts"""
+    sections = {}
+    for collection, model in SECTION_MODELS.items():
+        doc = section_docs.get(collection)
+        sections[collection] = model(**parse_dates(doc)) if doc else None
+    return EventFootprint(event=EventGeneral(**parse_dates(event_doc)), **sections)
+
+
+def event_document(event: EventGeneral) -> Dict[str, Any]:
+    """Document stocké d'un événement (dates en ISO 8601)"""
+    doc = event.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc['updated_at'] = doc['updated_at'].isoformat()
+    return doc
+
+
+def section_document(section: BaseModel) -> Dict[str, Any]:
+    doc = section.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    return doc
+
+
+def encode_cursor(event_doc: Dict[str, Any]) -> str:
+    """Curseur opaque désignant la position après event_doc"""
+    raw = json.dumps([event_doc["created_at"], event_doc["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Lève ValueError si le curseur est invalide"""
+    try:
+        created_at, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Curseur invalide")
+    if not isinstance(created_at, str) or not isinstance(event_id, str):
+        raise ValueError("Curseur invalide")
+    return created_at, event_id
+
+
+def event_projection(fields: Optional[Sequence[str]]) -> Dict[str, int]:
+    """Projection MongoDB ; id et created_at sont toujours inclus (clé du curseur)"""
+    projection = {"_id": 0}
+    if fields:
+        for field in ("id", "created_at", *fields):
+            projection[field] = 1
+    return projection
+
+
+def footprint_pipeline(event_id: str) -> list:
+    """
+    Pipeline d'agrégation chargeant l'événement et ses 9 sections en un seul aller-retour.
+    Chaque $lookup garde le premier document de la section, comme le faisait find_one.
+    """
+    pipeline = [
+        {"$match": {"id": event_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0}},
+    ]
+    for collection in SECTION_MODELS:
+        pipeline.append({
+            "$lookup": {
+                "from": collection,
+                "localField": "id",
+                "foreignField": "event_id",
+                "pipeline": [{"$limit": 1}, {"$project": {"_id": 0}}],
+                "as": LOOKUP_PREFIX + collection,
+            }
+        })
+    return pipeline
+
+
+class EventRepository(ABC):
+    """
+    Événements et sections d'une source de données. Les documents sont ceux
+    stockés (dates en ISO 8601), sans _id.
+    """
+
+    async def ensure_indexes(self):
+        pass
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    async def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_section(self, collection: str, event_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def list_events(
+        self, limit: int, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Page d'événements triés par (created_at, id), documents bruts éventuellement
+        projetés. Renvoie (événements, curseur de la page suivante ou None).
+        """
+
+    @abstractmethod
+    def iter_events(
+        self, fields: Optional[Sequence[str]] = None, batch_size: int = 500, query: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Tous les événements (ou ceux du filtre `query`), lus par lots sans les garder en mémoire"""
+
+    async def iter_footprints(
+        self, query: Optional[Dict[str, Any]] = None, batch_size: int = 500
+    ) -> AsyncIterator[EventFootprint]:
+        """
+        Événements du filtre avec leurs sections : les événements lus par
+        iter_events sont gardés, seules les sections sont chargées par lots
+        """
+        batch = []
+        async for event_doc in self.iter_events(batch_size=batch_size, query=query):
+            batch.append(event_doc)
+            if len(batch) >= batch_size:
+                for docs in attach_sections(batch, await self.get_sections([doc["id"] for doc in batch])):
+                    yield build_footprint(*docs)
+                batch = []
+        if batch:
+            for docs in attach_sections(batch, await self.get_sections([doc["id"] for doc in batch])):
+                yield build_footprint(*docs)
+
+    @abstractmethod
+    async def insert_event(self, event: EventGeneral) -> EventGeneral:
+        ...
+
+    @abstractmethod
+    async def save_section(self, collection: str, section: BaseModel) -> BaseModel:
+        """
+        Enregistrer la section d'un événement (une seule par événement) : la saisie
+        remplace la précédente, l'id et la date de création d'origine sont conservés.
+        """
+
+    @abstractmethod
+    async def upsert_many(self, collection: str, items: Sequence[BaseModel]) -> int:
+        """
+        Enregistrer un lot d'événements (collection "events", clé id) ou de sections
+        (clé event_id) ; comme save_section, l'id et la date de création des
+        documents existants sont conservés. Nombre de documents créés.
+        """
+
+    @abstractmethod
+    async def insert_footprints(self, footprints: List[EventFootprint]) -> Dict[int, str]:
+        """
+        Insérer un lot d'événements et leurs sections. Renvoie {indice dans le lot:
+        erreur} des événements refusés (id déjà existant, section déjà existante
+        pour cet event_id) ; rien n'est conservé d'un événement refusé.
+        """
+
+    @abstractmethod
+    async def get_footprint_docs(self, event_id: str) -> Optional[FootprintDocs]:
+        """Documents bruts (événement, sections par collection), None si l'événement n'existe pas"""
+
+    @abstractmethod
+    async def get_sections(self, event_ids: Sequence[str]) -> SectionDocs:
+        """Sections d'un lot d'événements, par collection puis par event_id (absentes omises)"""
+
+    @abstractmethod
+    async def get_many(self, event_ids: Sequence[str]) -> Dict[str, FootprintDocs]:
+        """Documents bruts d'un lot d'événements, dans l'ordre de la demande (absents omis)"""
+
+    async def get_footprint(self, event_id: str) -> Optional[EventFootprint]:
+        """Charger l'événement et toutes ses sections, None si l'événement n'existe pas"""
+        docs = await self.get_footprint_docs(event_id)
+        if docs is None:
+            return None
+        return build_footprint(*docs)
+
+    async def get_footprints(self, event_ids: List[str]) -> Dict[str, EventFootprint]:
+        return {event_id: build_footprint(*docs) for event_id, docs in (await self.get_many(event_ids)).items()}
+
+
+def attach_sections(event_docs: Sequence[Dict[str, Any]], sections: SectionDocs) -> List[FootprintDocs]:
+    """Associer à chaque événement ses sections"""
+    return [
+        (event_doc, {collection: sections[collection].get(event_doc["id"]) for collection in SECTION_MODELS})
+        for event_doc in event_docs
+    ]
+
+
+def _upsert_key(collection: str) -> str:
+    return "id" if collection == "events" else "event_id"
+
+
+def _stored_document(collection: str, item: BaseModel) -> Dict[str, Any]:
+    return event_document(item) if collection == "events" else section_document(item)
+
+
+class MongoEventRepository(EventRepository):
+    """
+    Accès aux événements et à leurs sections dans MongoDB. Avec from_url, le
+    client Motor n'est créé qu'au premier accès à la base.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+        self._client = None
+        self._url: Optional[str] = None
+        self._db_name: Optional[str] = None
+        # $lookup avec localField + pipeline nécessite MongoDB >= 5.0
+        self.use_lookup = True
+
+    @classmethod
+    def from_url(cls, url: Optional[str], db_name: Optional[str]) -> "MongoEventRepository":
+        repository = cls()
+        repository._url, repository._db_name = url, db_name
+        return repository
+
+    @property
+    def db(self):
+        if self._db is None:
+            if not self._url or not self._db_name:
+                raise RuntimeError("MONGO_URL et DB_NAME doivent être définis pour utiliser MongoDB")
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self._client = AsyncIOMotorClient(self._url)
+            self._db = self._client[self._db_name]
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+    async def ensure_indexes(self):
+        """
+        Index uniques : id dans events, event_id dans chaque section. Aucun document
+        n'est supprimé : si des doublons empêchent la création d'un index, il est
+        ignoré avec un avertissement (migration : python -m deduplicate).
+        """
+        for collection, field in UNIQUE_KEYS:
+            try:
+                await self.db[collection].create_index(field, unique=True, name=f"{field}_unique")
+            except (DuplicateKeyError, OperationFailure) as e:
+                logger.warning(
+                    f"Index unique {collection}.{field} non créé, doublons présents "
+                    f"(les archiver avec python -m deduplicate): {e}"
+                )
+        # Pagination par curseur de GET /api/events
+        await self.db.events.create_index(EVENT_SORT, name="created_at_id")
+
+    async def find_duplicates(self, collection: str, field: str) -> List[Dict[str, Any]]:
+        """
+        Groupes {"key", "ids"} de documents partageant la même clé, _id dans l'ordre
+        d'insertion : le premier est celui que servait find_one.
+        """
+        pipeline = [
+            {"$sort": {"_id": ASCENDING}},
+            {"$group": {"_id": f"${field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+        return [
+            {"key": group["_id"], "ids": group["ids"]}
+            async for group in self.db[collection].aggregate(pipeline, allowDiskUse=True)
+        ]
+
+    async def archive_duplicates(self, collection: str, field: str) -> List[Dict[str, Any]]:
+        """
+        Déplacer dans ARCHIVE_COLLECTION tous les doublons sauf le plus ancien de
+        chaque clé. Renvoie les groupes traités ({"key", "kept", "archived"}).
+        """
+        archived = []
+        for group in await self.find_duplicates(collection, field):
+            kept, extra = group["ids"][0], group["ids"][1:]
+            docs = await self.db[collection].find({"_id": {"$in": extra}}).to_list(None)
+            archived_at = datetime.now(timezone.utc).isoformat()
+            # Archive écrite avant la suppression : une interruption ne perd aucun document
+            await self.db[ARCHIVE_COLLECTION].insert_many([
+                {"collection": collection, "key": group["key"], "kept": kept, "archived_at": archived_at, "document": doc}
+                for doc in docs
+            ])
+            await self.db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+            archived.append({"key": group["key"], "kept": kept, "archived": [doc["_id"] for doc in docs]})
+        return archived
+
+    async def list_events(
+        self, limit: int, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query = {}
+        if cursor:
+            created_at, event_id = decode_cursor(cursor)
+            query = {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "id": {"$gt": event_id}},
+            ]}
+        # Un document de plus pour savoir s'il reste une page
+        docs = await self.db.events.find(query, event_projection(fields)).sort(EVENT_SORT).limit(limit + 1).to_list(limit + 1)
+        if len(docs) > limit:
+            docs = docs[:limit]
+            return docs, encode_cursor(docs[-1])
+        return docs, None
+
+    async def iter_events(
+        self, fields: Optional[Sequence[str]] = None, batch_size: int = 500, query: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        cursor = self.db.events.find(query or {}, event_projection(fields)).sort(EVENT_SORT).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        return await self.db.events.find_one({"id": event_id}, {"_id": 0})
+
+    async def get_section(self, collection: str, event_id: str) -> Optional[Dict[str, Any]]:
+        return await self.db[collection].find_one({"event_id": event_id}, {"_id": 0})
+
+    async def insert_event(self, event: EventGeneral) -> EventGeneral:
+        await self.db.events.insert_one(event_document(event))
+        return event
+
+    async def save_section(self, collection: str, section: BaseModel) -> BaseModel:
+        doc = section_document(section)
+        on_insert = {"id": doc.pop("id"), "created_at": doc.pop("created_at")}
+        stored = await self.db[collection].find_one_and_update(
+            {"event_id": doc["event_id"]},
+            {"$set": doc, "$setOnInsert": on_insert},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return SECTION_MODELS[collection](**parse_dates(stored))
+
+    async def upsert_many(self, collection: str, items: Sequence[BaseModel]) -> int:
+        """Une seule requête bulk_write non ordonnée pour tout le lot"""
+        if not items:
+            return 0
+        key = _upsert_key(collection)
+        operations = []
+        for item in items:
+            doc = _stored_document(collection, item)
+            on_insert = {"created_at": doc.pop("created_at")}
+            if key != "id":
+                on_insert["id"] = doc.pop("id")
+            operations.append(UpdateOne({key: doc[key]}, {"$set": doc, "$setOnInsert": on_insert}, upsert=True))
+        result = await self.db[collection].bulk_write(operations, ordered=False)
+        return result.upserted_count
+
+    async def insert_footprints(self, footprints: List[EventFootprint]) -> Dict[int, str]:
+        """
+        insert_many non ordonné, une requête par collection. Un événement dont une
+        section est refusée est retiré, avec ses autres sections.
+        """
+        failed = {}
+        if not footprints:
+            return failed
+        event_docs = [event_document(footprint.event) for footprint in footprints]
+        try:
+            await self.db.events.insert_many(event_docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = error.get("errmsg", "Erreur d'écriture")
+
+        # Par collection : documents et indice dans le lot de l'événement de chacun
+        section_docs = {collection: ([], []) for collection in SECTION_MODELS}
+        for i, footprint in enumerate(footprints):
+            if i in failed:
+                continue
+            for collection in SECTION_MODELS:
+                section = getattr(footprint, collection)
+                if section is not None:
+                    docs, indexes = section_docs[collection]
+                    docs.append(section_document(section))
+                    indexes.append(i)
+        section_errors = await asyncio.gather(*(
+            self._insert_sections(collection, docs, indexes)
+            for collection, (docs, indexes) in section_docs.items() if docs
+        ))
+
+        rejected = {}
+        for errors in section_errors:
+            for i, message in errors.items():
+                rejected.setdefault(i, message)
+        if rejected:
+            await self._remove_footprints([footprints[i] for i in rejected])
+            failed.update(rejected)
+        return failed
+
+    async def _insert_sections(self, collection: str, docs: List[Dict[str, Any]], indexes: List[int]) -> Dict[int, str]:
+        """{indice de l'événement dans le lot: erreur} des sections refusées"""
+        try:
+            await self.db[collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = {}
+            for error in e.details.get("writeErrors", []):
+                message = error.get("errmsg", "Erreur d'écriture")
+                errors[indexes[error["index"]]] = f"{collection}: {message}"
+            return errors
+        return {}
+
+    async def _remove_footprints(self, footprints: List[EventFootprint]):
+        """Supprimer des événements insérés par insert_footprints et leurs sections (par id, jamais par event_id)"""
+        await self.db.events.delete_many({"id": {"$in": [footprint.event.id for footprint in footprints]}})
+        for collection in SECTION_MODELS:
+            ids = [
+                getattr(footprint, collection).id
+                for footprint in footprints if getattr(footprint, collection) is not None
+            ]
+            if ids:
+                await self.db[collection].delete_many({"id": {"$in": ids}})
+
+    async def get_footprint_docs(self, event_id: str) -> Optional[FootprintDocs]:
+        if self.use_lookup:
+            try:
+                return await self._get_docs_lookup(event_id)
+            except OperationFailure as e:
+                logger.warning(f"$lookup indisponible, repli sur des requêtes concurrentes: {e}")
+                self.use_lookup = False
+        return await self._get_docs_concurrent(event_id)
+
+    async def _get_docs_lookup(self, event_id: str) -> Optional[FootprintDocs]:
+        docs = await self.db.events.aggregate(footprint_pipeline(event_id)).to_list(1)
+        if not docs:
+            return None
+        event_doc = docs[0]
+        section_docs = {}
+        for collection in SECTION_MODELS:
+            matches = event_doc.pop(LOOKUP_PREFIX + collection, [])
+            section_docs[collection] = matches[0] if matches else None
+        return event_doc, section_docs
+
+    async def _get_docs_concurrent(self, event_id: str) -> Optional[FootprintDocs]:
+        event_doc, *docs = await asyncio.gather(
+            self.db.events.find_one({"id": event_id}, {"_id": 0}),
+            *(
+                self.db[collection].find_one({"event_id": event_id}, {"_id": 0})
+                for collection in SECTION_MODELS
+            ),
+        )
+        if not event_doc:
+            return None
+        return event_doc, dict(zip(SECTION_MODELS, docs))
+
+    async def get_sections(self, event_ids: Sequence[str]) -> SectionDocs:
+        """
+        Une requête $in par collection ; en cas de doublon, le premier document
+        est gardé, comme find_one
+        """
+        event_ids = list(event_ids)
+        section_lists = await asyncio.gather(*(
+            self.db[collection].find({"event_id": {"$in": event_ids}}, {"_id": 0}).to_list(None)
+            for collection in SECTION_MODELS
+        ))
+        sections = {}
+        for collection, docs in zip(SECTION_MODELS, section_lists):
+            first_docs = {}
+            for doc in docs:
+                first_docs.setdefault(doc["event_id"], doc)
+            sections[collection] = first_docs
+        return sections
+
+    async def get_many(self, event_ids: Sequence[str]) -> Dict[str, FootprintDocs]:
+        """
+        Événements et sections en parallèle : 10 requêtes au total, quelle que
+        soit la taille du lot
+        """
+        event_ids = list(event_ids)
+        event_docs, sections = await asyncio.gather(
+            self.db.events.find({"id": {"$in": event_ids}}, {"_id": 0}).to_list(None),
+            self.get_sections(event_ids),
+        )
+        events = {}
+        for doc in event_docs:
+            events.setdefault(doc["id"], doc)
+        found = [events[event_id] for event_id in event_ids if event_id in events]
+        return {docs[0]["id"]: docs for docs in attach_sections(found, sections)}
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Filtres d'égalité et $in, seuls utilisés par les routes"""
+    for field, condition in query.items():
+        if isinstance(condition, dict):
+            if doc.get(field) not in condition["$in"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Copie du document (les appelants convertissent les dates sur place)"""
+    if not fields:
+        return dict(doc)
+    return {field: doc[field] for field in event_projection(fields) if field in doc}
+
+
+class InMemoryEventRepository(EventRepository):
+    """
+    Documents gardés en mémoire dans le processus, sans persistance : tests de
+    charge, benchmarks et utilisation du moteur sans MongoDB.
+    """
+
+    def __init__(self):
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.sections: Dict[str, Dict[str, Dict[str, Any]]] = {collection: {} for collection in SECTION_MODELS}
+
+    def _sorted_events(self, query: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        docs = [doc for doc in self.events.values() if not query or _matches(doc, query)]
+        return sorted(docs, key=lambda doc: (doc["created_at"], doc["id"]))
+
+    async def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.events.get(event_id)
+        return dict(doc) if doc else None
+
+    async def get_section(self, collection: str, event_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.sections[collection].get(event_id)
+        return dict(doc) if doc else None
+
+    async def list_events(
+        self, limit: int, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        docs = self._sorted_events()
+        if cursor:
+            position = decode_cursor(cursor)
+            docs = [doc for doc in docs if (doc["created_at"], doc["id"]) > position]
+        page = [_project(doc, fields) for doc in docs[:limit]]
+        if len(docs) > limit:
+            return page, encode_cursor(page[-1])
+        return page, None
+
+    async def iter_events(
+        self, fields: Optional[Sequence[str]] = None, batch_size: int = 500, query: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        for doc in self._sorted_events(query):
+            yield _project(doc, fields)
+
+    async def insert_event(self, event: EventGeneral) -> EventGeneral:
+        if event.id in self.events:
+            raise DuplicateKeyError(f"Événement déjà existant: {event.id}")
+        self.events[event.id] = event_document(event)
+        return event
+
+    def _upsert(self, collection: str, doc: Dict[str, Any]) -> bool:
+        key = _upsert_key(collection)
+        store = self.events if collection == "events" else self.sections[collection]
+        previous = store.get(doc[key])
+        if previous:
+            doc["id"], doc["created_at"] = previous["id"], previous["created_at"]
+        store[doc[key]] = doc
+        return previous is None
+
+    async def save_section(self, collection: str, section: BaseModel) -> BaseModel:
+        doc = section_document(section)
+        self._upsert(collection, doc)
+        return SECTION_MODELS[collection](**parse_dates(dict(doc)))
+
+    async def upsert_many(self, collection: str, items: Sequence[BaseModel]) -> int:
+        return sum(self._upsert(collection, _stored_document(collection, item)) for item in items)
+
+    async def insert_footprints(self, footprints: List[EventFootprint]) -> Dict[int, str]:
+        failed = {}
+        for i, footprint in enumerate(footprints):
+            if footprint.event.id in self.events:
+                failed[i] = f"Événement déjà existant: {footprint.event.id}"
+                continue
+            sections = {
+                collection: getattr(footprint, collection)
+                for collection in SECTION_MODELS if getattr(footprint, collection) is not None
+            }
+            # Index unique event_id de chaque section
+            existing = [
+                collection for collection, section in sections.items()
+                if section.event_id in self.sections[collection]
+            ]
+            if existing:
+                failed[i] = f"{existing[0]}: section déjà existante pour l'événement {footprint.event.id}"
+                continue
+            self.events[footprint.event.id] = event_document(footprint.event)
+            for collection, section in sections.items():
+                self.sections[collection][section.event_id] = section_document(section)
+        return failed
+
+    def _docs(self, event_doc: Dict[str, Any]) -> FootprintDocs:
+        """Copies : build_footprint convertit les dates sur place"""
+        event_id = event_doc["id"]
+        return dict(event_doc), {
+            collection: dict(docs[event_id]) if event_id in docs else None
+            for collection, docs in self.sections.items()
+        }
+
+    async def get_footprint_docs(self, event_id: str) -> Optional[FootprintDocs]:
+        event_doc = self.events.get(event_id)
+        if event_doc is None:
+            return None
+        return self._docs(event_doc)
+
+    async def get_sections(self, event_ids: Sequence[str]) -> SectionDocs:
+        return {
+            collection: {event_id: dict(docs[event_id]) for event_id in event_ids if event_id in docs}
+            for collection, docs in self.sections.items()
+        }
+
+    async def get_many(self, event_ids: Sequence[str]) -> Dict[str, FootprintDocs]:
+        return {event_id: self._docs(self.events[event_id]) for event_id in event_ids if event_id in self.events}
@@ -0,0 +1,142 @@
+"""
+Cache des bilans d'émissions calculés par /api/calculate
+
+Un bilan est identifié par (event_id, empreinte des documents de l'événement et
+de ses sections, version des hypothèses) : tant que ni les saisies ni les
+hypothèses ne changent, il est resservi sans recalcul. Deux niveaux :
+  - un LRU en mémoire, propre à chaque worker ;
+  - un niveau partagé optionnel (collection MongoDB), commun aux workers.
+
+L'empreinte des documents suffit à ne jamais servir un bilan périmé, y compris
+après une écriture reçue par un autre worker ; l'invalidation explicite
+(écriture d'une section, rechargement des hypothèses) libère les entrées
+devenues inutiles.
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from models import EmissionResult
+from repository import FootprintDocs
+
+logger = logging.getLogger(__name__)
+
+# Champs sans effet sur le bilan, exclus de l'empreinte
+VOLATILE_FIELDS = ("_id", "created_at", "updated_at")
+
+
+def footprint_hash(docs: FootprintDocs) -> str:
+    """Empreinte stable des documents bruts d'un événement (avant conversion des dates)"""
+    event_doc, section_docs = docs
+    payload = [event_doc] + [section_docs[collection] for collection in sorted(section_docs)]
+    payload = [
+        {key: value for key, value in doc.items() if key not in VOLATILE_FIELDS} if doc else None
+        for doc in payload
+    ]
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Cache à deux niveaux des EmissionResult"""
+
+    def __init__(self, max_entries: int = 10000, shared_collection=None):
+        self.max_entries = max_entries
+        # event_id -> (empreinte, version, bilan) : une seule entrée utile par événement
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.shared = shared_collection
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def setup(self, ttl_seconds: int):
+        """Index d'expiration du niveau partagé"""
+        if self.shared is not None:
+            await self.shared.create_index("created_at", expireAfterSeconds=ttl_seconds)
+            await self.shared.create_index("event_id")
+
+    @staticmethod
+    def shared_key(event_id: str, docs_hash: str, version_id: str) -> str:
+        return f"{event_id}:{docs_hash}:{version_id}"
+
+    async def get(self, event_id: str, docs_hash: str, version_id: str) -> Optional[EmissionResult]:
+        entry = self._entries.get(event_id)
+        if entry and entry[0] == docs_hash and entry[1] == version_id:
+            self._entries.move_to_end(event_id)
+            self.hits += 1
+            return entry[2]
+
+        if self.shared is not None:
+            try:
+                doc = await self.shared.find_one({"_id": self.shared_key(event_id, docs_hash, version_id)})
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+                doc = None
+            if doc:
+                result = EmissionResult(**doc["result"])
+                self._store(event_id, docs_hash, version_id, result)
+                self.shared_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    async def put(self, event_id: str, docs_hash: str, version_id: str, result: EmissionResult):
+        self._store(event_id, docs_hash, version_id, result)
+        if self.shared is not None:
+            try:
+                await self.shared.replace_one(
+                    {"_id": self.shared_key(event_id, docs_hash, version_id)},
+                    {
+                        "event_id": event_id,
+                        "version_id": version_id,
+                        "result": result.model_dump(),
+                        "created_at": datetime.now(timezone.utc),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+
+    def _store(self, event_id: str, docs_hash: str, version_id: str, result: EmissionResult):
+        self._entries[event_id] = (docs_hash, version_id, result)
+        self._entries.move_to_end(event_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate_event(self, event_id: str):
+        """Oublier les bilans d'un événement (après écriture de l'une de ses données)"""
+        self._entries.pop(event_id, None)
+        self.invalidations += 1
+        if self.shared is not None:
+            try:
+                await self.shared.delete_many({"event_id": event_id})
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+
+    async def invalidate_version(self, version_id: str):
+        """Oublier les bilans calculés avec d'autres hypothèses que version_id"""
+        self._entries.clear()
+        self.invalidations += 1
+        if self.shared is not None:
+            try:
+                await self.shared.delete_many({"version_id": {"$ne": version_id}})
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "shared": self.shared is not None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,203 @@
+"""
+Grilles de scénarios « et si » évaluées en un seul passage vectorisé
+
+Une variante est un ensemble de surcharges "section.champ" -> valeur appliquées
+à l'événement de base (ex. "catering.meals_vegetarian_pct": 50). Les N
+variantes deviennent N lignes de colonnes NumPy, les champs dérivés du module
+Général sont recalculés, puis toutes les catégories sont évaluées d'un coup.
+Rien n'est écrit en base.
+"""
+import itertools
+import math
+from dataclasses import replace
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from calculation_engine import GeneralHypotheses
+from emissions import CATEGORIES
+from models import EventGeneral, ScenarioRequest, ScenarioResult
+from repository import SECTION_MODELS, EventFootprint
+from vectorized_engine import (
+    BOOLEAN_EVENT_FIELDS,
+    BOOLEAN_SECTION_FIELDS,
+    CATEGORICAL_FIELDS,
+    NUMERIC_EVENT_FIELDS,
+    SECTION_FIELDS,
+    FactorVector,
+    columns_from_footprints,
+    compute_emissions,
+    compute_general_columns,
+)
+
+MAX_SCENARIO_VARIANTS = 50000
+
+# Type de colonne de chaque paramètre surchargeable
+NUMERIC, BOOLEAN, CATEGORICAL = "numeric", "boolean", "categorical"
+SCENARIO_PARAMETERS: Dict[str, Tuple[str, str]] = {}
+for _field in NUMERIC_EVENT_FIELDS:
+    SCENARIO_PARAMETERS[f"event.{_field}"] = (_field, NUMERIC)
+for _field in BOOLEAN_EVENT_FIELDS:
+    SCENARIO_PARAMETERS[f"event.{_field}"] = (_field, BOOLEAN)
+for _section, _fields in SECTION_FIELDS.items():
+    for _field in _fields:
+        SCENARIO_PARAMETERS[f"{_section}.{_field}"] = (_field, NUMERIC)
+for _section, _fields in BOOLEAN_SECTION_FIELDS.items():
+    for _field in _fields:
+        SCENARIO_PARAMETERS[f"{_section}.{_field}"] = (_field, BOOLEAN)
+for _section, _fields in CATEGORICAL_FIELDS.items():
+    for _field in _fields:
+        SCENARIO_PARAMETERS[f"{_section}.{_field}"] = (_field, CATEGORICAL)
+
+
+class ScenarioError(ValueError):
+    """Grille de scénarios invalide (paramètre inconnu, valeur incorrecte, trop de variantes)"""
+
+
+def expand_variants(request: ScenarioRequest) -> Tuple[List[str], List[List[Any]]]:
+    """(paramètres, valeurs par variante) : produit cartésien de la grille puis variantes explicites"""
+    parameters = list(request.grid)
+    for variant in request.variants:
+        parameters.extend(name for name in variant if name not in parameters)
+    unknown = [name for name in parameters if name not in SCENARIO_PARAMETERS]
+    if unknown:
+        raise ScenarioError(f"Paramètres inconnus: {', '.join(unknown)}")
+
+    grid_size = 1
+    for values in request.grid.values():
+        grid_size *= len(values)
+    total = (grid_size if request.grid else 0) + len(request.variants)
+    if total == 0:
+        raise ScenarioError("Aucune variante à évaluer")
+    if total > MAX_SCENARIO_VARIANTS:
+        raise ScenarioError(f"{total} variantes demandées, maximum {MAX_SCENARIO_VARIANTS}")
+
+    # None = valeur de l'événement de base
+    rows = []
+    if request.grid:
+        padding = [None] * (len(parameters) - len(request.grid))
+        for combination in itertools.product(*request.grid.values()):
+            rows.append(list(combination) + padding)
+    for variant in request.variants:
+        rows.append([variant.get(name) for name in parameters])
+    return parameters, rows
+
+
+def _with_overridden_sections(footprint: EventFootprint, parameters: List[str]) -> EventFootprint:
+    """Créer, avec leurs valeurs par défaut, les sections non saisies mais surchargées"""
+    sections = {}
+    for name in parameters:
+        section = name.split(".", 1)[0]
+        if section in SECTION_MODELS and getattr(footprint, section) is None and section not in sections:
+            try:
+                sections[section] = SECTION_MODELS[section](event_id=footprint.event.id)
+            except ValidationError:
+                raise ScenarioError(f"Section '{section}' non saisie pour cet événement")
+    if not sections:
+        return footprint
+    return replace(footprint, **sections)
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(name: str) -> TypeAdapter:
+    """Validation d'une surcharge selon le type du champ dans le modèle de sa section"""
+    section, _ = name.split(".", 1)
+    field, _ = SCENARIO_PARAMETERS[name]
+    model = EventGeneral if section == "event" else SECTION_MODELS[section]
+    return TypeAdapter(model.model_fields[field].annotation)
+
+
+def _validate_override(value: Any, name: str) -> Any:
+    """Valeur convertie au type du champ ("false" -> False, 3.0 -> 3) ; ScenarioError si invalide"""
+    try:
+        value = _field_adapter(name).validate_python(value)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise ScenarioError(f"Valeur invalide pour {name} ({error['input']!r}): {error['msg']}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ScenarioError(f"Valeur non finie pour {name}")
+    return value
+
+
+def validate_rows(parameters: List[str], rows: List[List[Any]]) -> List[List[Any]]:
+    """Variantes dont chaque surcharge est convertie au type de son champ (valeurs réellement calculées)"""
+    columns = []
+    for i, name in enumerate(parameters):
+        # Une grille répète les mêmes valeurs : chacune n'est validée qu'une fois
+        validated: Dict[Any, Any] = {}
+        converted = []
+        for row in rows:
+            value = row[i]
+            if value is None:
+                converted.append(None)
+                continue
+            try:
+                key = (type(value), value)
+                if key not in validated:
+                    validated[key] = _validate_override(value, name)
+                converted.append(validated[key])
+            except TypeError:   # valeur non hachable (liste, objet) : rejetée par la validation
+                converted.append(_validate_override(value, name))
+        columns.append(converted)
+    return [list(row) for row in zip(*columns)] if columns else [[] for _ in rows]
+
+
+def _column(values: List[Any], base: np.ndarray, kind: str) -> np.ndarray:
+    mask = np.array([value is not None for value in values])
+    if kind == NUMERIC:
+        overrides = np.array([float(value) if value is not None else 0.0 for value in values])
+        return np.where(mask, overrides, base)
+    if kind == BOOLEAN:
+        return np.where(mask, np.array([bool(value) for value in values]), base)
+    column = base.copy()
+    column[mask] = np.array([value for value in values if value is not None], dtype=object)
+    return column
+
+
+def build_scenario_columns(
+    footprint: EventFootprint, general: GeneralHypotheses, parameters: List[str], rows: List[List[Any]]
+) -> Dict[str, np.ndarray]:
+    """Colonnes des N variantes (surcharges déjà validées), champs dérivés recalculés"""
+    footprint = _with_overridden_sections(footprint, parameters)
+    base = columns_from_footprints([footprint])
+    count = len(rows)
+    columns = {name: np.repeat(values, count) for name, values in base.items()}
+
+    for i, name in enumerate(parameters):
+        field, kind = SCENARIO_PARAMETERS[name]
+        columns[field] = _column([row[i] for row in rows], columns[field], kind)
+
+    columns.update(compute_general_columns(columns, general))
+    return columns
+
+
+def run_scenarios(
+    footprint: EventFootprint,
+    factors: FactorVector,
+    general: GeneralHypotheses,
+    request: ScenarioRequest,
+) -> ScenarioResult:
+    """Évaluer l'événement de base et toutes les variantes de la requête"""
+    parameters, rows = expand_variants(request)
+    rows = validate_rows(parameters, rows)
+    # Ligne 0 : événement de base, sans surcharge
+    columns = build_scenario_columns(footprint, general, parameters, [[None] * len(parameters)] + rows)
+    result = compute_emissions(columns, factors)
+
+    by_category = None
+    if request.include_categories:
+        by_category = {category: result.emissions_by_category[category][1:].tolist() for category in CATEGORIES}
+    return ScenarioResult(
+        event_id=footprint.event.id,
+        event_name=footprint.event.event_name,
+        base_total_emissions_kg=float(result.total_emissions_kg[0]),
+        base_emission_class=str(result.emission_class[0]),
+        parameters=parameters,
+        values=rows,
+        total_emissions_kg=result.total_emissions_kg[1:].tolist(),
+        emissions_per_participant=result.emissions_per_participant[1:].tolist(),
+        emission_class=result.emission_class[1:].tolist(),
+        emissions_by_category=by_category,
+    )
@@ -0,0 +1,191 @@
+"""
+Analyse de sensibilité exacte par différentiation automatique (mode direct)
+
+Les fonctions calculate_*_emissions de emissions.py sont exécutées une seule
+fois sur des nombres duaux : chaque saisie et chaque facteur d'émission porte
+sa propre direction de dérivation, et le total obtenu contient toutes les
+dérivées partielles exactes. Les calculs étant linéaires par morceaux en
+chaque variable, l'effet d'une variation de ±X % d'une variable est exact
+tant qu'elle ne franchit pas un seuil (tranches de distance des vols, valeurs
+nulles).
+
+Les champs calculés du module Général (calculated_*) ne sont pas des
+variables : calculate_general_fields est rejoué sur les duaux, si bien que les
+dérivées remontent jusqu'aux saisies brutes du formulaire (total_visitors,
+visitors_foreign_pct...). Les troncatures entières gardent la valeur tronquée
+et la dérivée de la formule non tronquée.
+"""
+from typing import Dict, List, Optional
+
+from calculation_engine import GeneralHypotheses, calculate_general_fields
+from emissions import CATEGORY_CALCULATORS, calculate_category_emissions
+from factor_table import FACTOR_NAMES, FactorTable
+from models import SensitivityItem, SensitivityResult
+from repository import EventFootprint
+
+DEFAULT_VARIATION_PCT = 10.0
+
+
+class Dual:
+    """Valeur et gradient creux {variable: dérivée}"""
+
+    __slots__ = ("value", "grad")
+
+    def __init__(self, value: float, grad: Optional[Dict[str, float]] = None):
+        self.value = value
+        self.grad = grad or {}
+
+    @classmethod
+    def variable(cls, name: str, value: float) -> "Dual":
+        return cls(value, {name: 1.0})
+
+    @staticmethod
+    def _parts(other):
+        if isinstance(other, Dual):
+            return other.value, other.grad
+        return other, {}
+
+    def __add__(self, other):
+        value, grad = self._parts(other)
+        merged = dict(self.grad)
+        for name, derivative in grad.items():
+            merged[name] = merged.get(name, 0.0) + derivative
+        return Dual(self.value + value, merged)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Dual(-self.value, {name: -d for name, d in self.grad.items()})
+
+    def __sub__(self, other):
+        return self + (-other if isinstance(other, Dual) else -other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        value, grad = self._parts(other)
+        merged = {name: d * value for name, d in self.grad.items()}
+        for name, derivative in grad.items():
+            merged[name] = merged.get(name, 0.0) + derivative * self.value
+        return Dual(self.value * value, merged)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        value, grad = self._parts(other)
+        merged = {name: d / value for name, d in self.grad.items()}
+        for name, derivative in grad.items():
+            merged[name] = merged.get(name, 0.0) - derivative * self.value / (value * value)
+        return Dual(self.value / value, merged)
+
+    def __rtruediv__(self, other):
+        return Dual(other) / self
+
+    # Les branches (seuils, sections vides) suivent la valeur
+    def __bool__(self):
+        return bool(self.value)
+
+    def __gt__(self, other):
+        return self.value > self._parts(other)[0]
+
+    def __ge__(self, other):
+        return self.value >= self._parts(other)[0]
+
+    def __lt__(self, other):
+        return self.value < self._parts(other)[0]
+
+    def __le__(self, other):
+        return self.value <= self._parts(other)[0]
+
+    def __float__(self):
+        return float(self.value)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _truncate(value):
+    """Troncature entière de calculate_general_fields, dérivées conservées"""
+    if isinstance(value, Dual):
+        return Dual(int(value.value), value.grad)
+    return int(value)
+
+
+def _dual_model(model, prefix: str, variables: Dict[str, float]):
+    """Copie non validée du modèle dont chaque champ numérique saisi est une variable"""
+    values = {}
+    for field in type(model).model_fields:
+        value = getattr(model, field)
+        if _is_number(value) and not field.startswith("calculated_"):
+            name = f"{prefix}.{field}"
+            variables[name] = value
+            value = Dual.variable(name, value)
+        values[field] = value
+    return type(model).model_construct(**values)
+
+
+def _dual_factors(factors: FactorTable, variables: Dict[str, float]) -> FactorTable:
+    duals = {}
+    for name in FACTOR_NAMES:
+        variables[f"factor.{name}"] = getattr(factors, name)
+        duals[name] = Dual.variable(f"factor.{name}", getattr(factors, name))
+    # Intensités des bâtiments : une variable par type
+    building_intensity = {}
+    for building_type, intensity in factors.building_intensity.items():
+        variables[f"factor.building.{building_type}"] = intensity
+        building_intensity[building_type] = Dual.variable(f"factor.building.{building_type}", intensity)
+    variables["factor.building_fallback"] = factors.building_fallback
+    return FactorTable(
+        building_intensity=building_intensity,
+        building_fallback=Dual.variable("factor.building_fallback", factors.building_fallback),
+        missing=factors.missing,
+        **duals,
+    )
+
+
+def run_sensitivity(
+    footprint: EventFootprint,
+    factors: FactorTable,
+    general: GeneralHypotheses,
+    variation_pct: float = DEFAULT_VARIATION_PCT,
+) -> SensitivityResult:
+    """Dérivées du total par rapport à toutes les saisies et facteurs, en un seul calcul"""
+    variables: Dict[str, float] = {}
+    event = calculate_general_fields(_dual_model(footprint.event, "event", variables), general, _truncate)
+    dual_factors = _dual_factors(factors, variables)
+
+    total = Dual(0.0)
+    for category, (collection, _, _) in CATEGORY_CALCULATORS.items():
+        section = getattr(footprint, collection)
+        if section is not None:
+            section = _dual_model(section, collection, variables)
+        total = total + calculate_category_emissions(category, event, section, dual_factors)
+
+    variation = variation_pct / 100
+    items: List[SensitivityItem] = []
+    for name, derivative in total.grad.items():
+        if derivative == 0:
+            continue
+        value = variables[name]
+        delta = value * variation * derivative
+        items.append(SensitivityItem(
+            name=name,
+            kind="factor" if name.startswith("factor.") else "input",
+            value=value,
+            derivative=derivative,
+            contribution=value * derivative,
+            low=total.value - delta,
+            high=total.value + delta,
+            swing=abs(2 * delta),
+        ))
+    items.sort(key=lambda item: item.swing, reverse=True)
+
+    return SensitivityResult(
+        event_id=footprint.event.id,
+        event_name=footprint.event.event_name,
+        total_emissions_kg=float(total.value),
+        variation_pct=variation_pct,
+        items=items,
+    )
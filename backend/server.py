@@ -1,33 +1,69 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import json
+import asyncio
 import logging
+import tempfile
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict
-import uuid
-from datetime import datetime, timezone
-
-# Import des hypothèses
-try:
-    from hypotheses_loader import get_emission_factors
-    EMISSION_FACTORS = get_emission_factors()
-    print("✓ Hypothèses chargées depuis les fichiers JSON")
-except Exception as e:
-    print(f"⚠ Erreur lors du chargement des hypothèses: {e}")
-    print("Utilisation des facteurs par défaut")
-    EMISSION_FACTORS = {}
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from models import (
+    EventGeneral, EventGeneralCreate,
+    EnergyData, EnergyDataCreate,
+    TransportData, TransportDataCreate,
+    CateringData, CateringDataCreate,
+    AccommodationData, AccommodationDataCreate,
+    WasteData, WasteDataCreate,
+    CommunicationData, CommunicationDataCreate,
+    FreightData, FreightDataCreate,
+    AmenitiesData, AmenitiesDataCreate,
+    PurchasesData, PurchasesDataCreate,
+    EmissionResult,
+    BatchCalculationRequest,
+    HypothesesVersionInfo,
+    UncertaintyResult,
+    ScenarioRequest,
+    ScenarioResult,
+    SensitivityResult,
+    ImportReport,
+)
+from repository import EventRepository, InMemoryEventRepository, MongoEventRepository
+from loop_monitor import LoopLagMonitor
+from hypotheses_store import HypothesesStore, HypothesesVersion
+from result_cache import ResultCache, footprint_hash
+from incremental_engine import IncrementalEngine
+from emissions import compute_emission_result
+from calculation_engine import calculate_general_fields
+from uncertainty import DEFAULT_DRAWS, MAX_DRAWS, run_uncertainty
+from scenarios import ScenarioError, run_scenarios
+from sensitivity import DEFAULT_VARIATION_PCT, run_sensitivity
+from live_session import LiveSession, LiveSessionError
+import evaluation_bundle
+from event_import import ImportFormatError, detect_format, import_events
+import event_export
+from vectorized_engine import resolve_factor_vector
+
+# Hypothèses versionnées : facteurs bruts et table compilée, rechargeables à chaud
+hypotheses_store = HypothesesStore()
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Source des événements : MongoDB (client Motor créé au premier accès) ou
+# EVENT_REPOSITORY=memory, événements gardés en mémoire (tests de charge, sans base)
+EVENT_REPOSITORY = os.environ.get('EVENT_REPOSITORY', 'mongo').lower()
+
+def create_repository() -> EventRepository:
+    if EVENT_REPOSITORY == 'memory':
+        return InMemoryEventRepository()
+    return MongoEventRepository.from_url(os.environ.get('MONGO_URL'), os.environ.get('DB_NAME'))
+
+repository = create_repository()
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -35,771 +71,61 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Cache des bilans : LRU par worker + niveau partagé MongoDB optionnel
+RESULT_CACHE_SHARED = os.environ.get('RESULT_CACHE_SHARED', '').lower() in ('1', 'true', 'yes')
+# (le niveau partagé est raccordé au démarrage, avec la base du dépôt)
+result_cache = ResultCache(max_entries=int(os.environ.get('RESULT_CACHE_SIZE', '10000')))
 
-# ==================== MODELS ====================
+# Sous-totaux par catégorie : en cas d'échec du cache, seules les catégories
+# dont les entrées ont changé sont recalculées
+incremental_engine = IncrementalEngine(max_events=int(os.environ.get('RESULT_CACHE_SIZE', '10000')))
 
-class EventGeneral(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_name: str
-    event_type: str  # Evenement_culturel, Evenement_professionnel, Evenement_sportif
-    event_subtype: Optional[str] = None  # Pour "Préciser" (Exposition, Conférence, etc.)
-    event_duration_days: int
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    
-    # Visiteurs
-    total_visitors: int
-    visitors_foreign_pct: float = 0  # Pourcentage
-    visitors_idf_pct: float = 0  # Pourcentage
-    unknown_foreign_rate: bool = False
-    unknown_idf_rate: bool = False
-    
-    # Organisations exposantes (événements professionnels)
-    exhibiting_organizations: int = 0
-    organizations_foreign_pct: float = 0
-    organizations_idf_pct: float = 0
-    unknown_organizations_foreign_rate: bool = False
-    unknown_organizations_idf_rate: bool = False
-    
-    # Sportifs/Artistes (événements culturels/sportifs)
-    athletes_artists_count: int = 0
-    athletes_artists_foreign_pct: float = 0
-    athletes_artists_idf_pct: float = 0
-    
-    # Champs calculés automatiquement (stockés pour référence)
-    calculated_visitors_foreign: Optional[int] = None
-    calculated_visitors_national_non_idf: Optional[int] = None
-    calculated_visitors_idf: Optional[int] = None
-    calculated_exhibitors_foreign: Optional[int] = None
-    calculated_exhibitors_national: Optional[int] = None
-    calculated_exhibitors_idf: Optional[int] = None
-    calculated_total_exhibitors: Optional[int] = None
-    calculated_total_foreign: Optional[int] = None
-    calculated_total_national: Optional[int] = None
-    calculated_total_idf: Optional[int] = None
-    
-    organizers_count: int = 0
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class EventGeneralCreate(BaseModel):
-    event_name: str
-    event_type: str
-    event_subtype: Optional[str] = None
-    event_duration_days: int
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    total_visitors: int
-    visitors_foreign_pct: float = 0
-    visitors_idf_pct: float = 0
-    unknown_foreign_rate: bool = False
-    unknown_idf_rate: bool = False
-    exhibiting_organizations: int = 0
-    organizations_foreign_pct: float = 0
-    organizations_idf_pct: float = 0
-    unknown_organizations_foreign_rate: bool = False
-    unknown_organizations_idf_rate: bool = False
-    athletes_artists_count: int = 0
-    athletes_artists_foreign_pct: float = 0
-    athletes_artists_idf_pct: float = 0
-    organizers_count: int = 0
-
-class EnergyData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    approach: str  # "real" or "estimated"
-    
-    # Real consumption
-    gas_kwh: float = 0
-    fuel_liters: float = 0
-    electricity_kwh: float = 0
-    coal_kg: float = 0
-    
-    # Estimated consumption
-    building_type: Optional[str] = None
-    surface_m2: Optional[float] = None
-    
-    # Generators
-    has_generators: bool = False
-    generators_fuel_liters: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class EnergyDataCreate(BaseModel):
-    event_id: str
-    approach: str
-    gas_kwh: float = 0
-    fuel_liters: float = 0
-    electricity_kwh: float = 0
-    coal_kg: float = 0
-    building_type: Optional[str] = None
-    surface_m2: Optional[float] = None
-    has_generators: bool = False
-    generators_fuel_liters: float = 0
-
-class TransportData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Visitors transport
-    visitors_avg_distance_foreign_km: float = 0
-    visitors_avg_distance_national_km: float = 0
-    visitors_local_transport_expenses: float = 0
-    
-    # Exhibitors transport
-    exhibitors_avg_distance_foreign_km: float = 0
-    exhibitors_avg_distance_national_km: float = 0
-    exhibitors_local_transport_expenses: float = 0
-    
-    # Organizers transport
-    organizers_avg_distance_km: float = 0
-    organizers_round_trips: int = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class TransportDataCreate(BaseModel):
-    event_id: str
-    visitors_avg_distance_foreign_km: float = 0
-    visitors_avg_distance_national_km: float = 0
-    visitors_local_transport_expenses: float = 0
-    exhibitors_avg_distance_foreign_km: float = 0
-    exhibitors_avg_distance_national_km: float = 0
-    exhibitors_local_transport_expenses: float = 0
-    organizers_avg_distance_km: float = 0
-    organizers_round_trips: int = 0
-
-class CateringData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Meals
-    breakfasts_count: int = 0
-    lunches_count: int = 0
-    dinners_count: int = 0
-    snacks_count: int = 0
-    
-    # Meal types
-    meals_meat_heavy_pct: float = 50
-    meals_balanced_pct: float = 30
-    meals_vegetarian_pct: float = 20
-    
-    # Dishes
-    dishes_type: str = "disposable"  # "disposable" or "reusable"
-    
-    # Beverages
-    water_liters: float = 0
-    coffee_units: int = 0
-    soft_drinks_units: int = 0
-    alcohol_units: int = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class CateringDataCreate(BaseModel):
-    event_id: str
-    breakfasts_count: int = 0
-    lunches_count: int = 0
-    dinners_count: int = 0
-    snacks_count: int = 0
-    meals_meat_heavy_pct: float = 50
-    meals_balanced_pct: float = 30
-    meals_vegetarian_pct: float = 20
-    dishes_type: str = "disposable"
-    water_liters: float = 0
-    coffee_units: int = 0
-    soft_drinks_units: int = 0
-    alcohol_units: int = 0
-
-class AccommodationData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Foreign visitors
-    foreign_hotel_5star_pct: float = 0
-    foreign_hotel_3star_pct: float = 0
-    foreign_hotel_1star_pct: float = 0
-    foreign_other_accommodation_pct: float = 0
-    foreign_family_pct: float = 0
-    foreign_avg_nights: float = 0
-    
-    # National non-IDF visitors
-    national_hotel_5star_pct: float = 0
-    national_hotel_3star_pct: float = 0
-    national_hotel_1star_pct: float = 0
-    national_other_accommodation_pct: float = 0
-    national_family_pct: float = 0
-    national_avg_nights: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class AccommodationDataCreate(BaseModel):
-    event_id: str
-    foreign_hotel_5star_pct: float = 0
-    foreign_hotel_3star_pct: float = 0
-    foreign_hotel_1star_pct: float = 0
-    foreign_other_accommodation_pct: float = 0
-    foreign_family_pct: float = 0
-    foreign_avg_nights: float = 0
-    national_hotel_5star_pct: float = 0
-    national_hotel_3star_pct: float = 0
-    national_hotel_1star_pct: float = 0
-    national_other_accommodation_pct: float = 0
-    national_family_pct: float = 0
-    national_avg_nights: float = 0
-
-class WasteData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Waste by type (kg)
-    plastic_kg: float = 0
-    cardboard_kg: float = 0
-    paper_kg: float = 0
-    aluminum_kg: float = 0
-    textile_kg: float = 0
-    furniture_kg: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class WasteDataCreate(BaseModel):
-    event_id: str
-    plastic_kg: float = 0
-    cardboard_kg: float = 0
-    paper_kg: float = 0
-    aluminum_kg: float = 0
-    textile_kg: float = 0
-    furniture_kg: float = 0
-
-class CommunicationData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Physical supports
-    posters_count: int = 0
-    flyers_count: int = 0
-    banners_count: int = 0
-    
-    # Digital supports
-    streaming_hours: float = 0
-    streaming_audience: int = 0
-    
-    # Expenses
-    communication_expenses: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class CommunicationDataCreate(BaseModel):
-    event_id: str
-    posters_count: int = 0
-    flyers_count: int = 0
-    banners_count: int = 0
-    streaming_hours: float = 0
-    streaming_audience: int = 0
-    communication_expenses: float = 0
-
-class FreightData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Freight by type
-    decor_weight_kg: float = 0
-    decor_distance_km: float = 0
-    equipment_weight_kg: float = 0
-    equipment_distance_km: float = 0
-    food_weight_kg: float = 0
-    food_distance_km: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class FreightDataCreate(BaseModel):
-    event_id: str
-    decor_weight_kg: float = 0
-    decor_distance_km: float = 0
-    equipment_weight_kg: float = 0
-    equipment_distance_km: float = 0
-    food_weight_kg: float = 0
-    food_distance_km: float = 0
-
-class AmenitiesData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Expenses
-    site_rental_expenses: float = 0
-    reception_expenses: float = 0
-    construction_expenses: float = 0
-    it_expenses: float = 0
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+# Pagination de GET /events : la page par défaut garde la taille de l'ancienne
+# liste non paginée (1000), pour les clients qui ne lisent pas X-Next-Cursor
+EVENTS_PAGE_SIZE = 1000
+EVENTS_MAX_PAGE_SIZE = 1000
 
-class AmenitiesDataCreate(BaseModel):
-    event_id: str
-    site_rental_expenses: float = 0
-    reception_expenses: float = 0
-    construction_expenses: float = 0
-    it_expenses: float = 0
+# Nombre d'événements chargés par lot pour /calculate/batch
+BATCH_CHUNK_SIZE = 500
 
-class PurchasesData(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    event_id: str
-    
-    # Goodies
-    goodies_expenses_per_person: float = 0
-    
-    # Badges
-    badges_visitors: int = 0
-    badges_exhibitors: int = 0
-    badges_organizers: int = 0
-    badges_type: str = "plastic_soft"  # "plastic_soft", "plastic_hard", "textile", "paper"
-    
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class PurchasesDataCreate(BaseModel):
-    event_id: str
-    goodies_expenses_per_person: float = 0
-    badges_visitors: int = 0
-    badges_exhibitors: int = 0
-    badges_organizers: int = 0
-    badges_type: str = "plastic_soft"
-
-class Top3Emitter(BaseModel):
-    category: str
-    emissions: float
-
-class EmissionResult(BaseModel):
-    event_id: str
-    event_name: str
-    total_emissions_kg: float
-    emissions_by_category: Dict[str, float]
-    emissions_per_participant: float
-    emission_class: str  # A, B, C, D, E, F, G
-    top_3_emitters: List[Top3Emitter]
+# Taille au-delà de laquelle un fichier importé est mis en attente sur disque
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Surveillance des fichiers d'hypothèses (rechargement automatique)
+HYPOTHESES_WATCH = os.environ.get('HYPOTHESES_WATCH', '').lower() in ('1', 'true', 'yes')
+# Jeton requis par POST /api/admin/hypotheses/reload s'il est défini
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Mesure du retard de la boucle d'événements (GET /api/loop-lag)
+LOOP_LAG_MONITOR = os.environ.get('LOOP_LAG_MONITOR', '').lower() in ('1', 'true', 'yes')
+loop_monitor = LoopLagMonitor()
+
+# Bundle d'évaluation et vecteurs de conformité sérialisés : (type, version) -> (corps, ETag)
+serialized_payloads: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
 
 
 # ==================== EMISSION FACTORS ====================
-# Les facteurs d'émission sont maintenant chargés depuis les fichiers JSON
-# via EMISSION_FACTORS = get_emission_factors()
+# Les facteurs d'émission sont chargés depuis les fichiers JSON puis compilés
+# dans hypotheses_store.current ; les calculs par catégorie sont dans emissions.py.
+# Chaque requête capture la version active une seule fois, à son début.
+
+def version_info(version: HypothesesVersion, changed: bool = False) -> HypothesesVersionInfo:
+    return HypothesesVersionInfo(
+        version_id=version.version_id,
+        loaded_at=version.loaded_at,
+        missing_factors=list(version.factors.missing),
+        changed=changed,
+    )
 
 
 # ==================== AUTO-CALCULATION FUNCTIONS ====================
 
 def calculate_event_fields(event: EventGeneral) -> EventGeneral:
     """
-    Calcule automatiquement tous les champs dérivés selon les formules Excel
+    Calcule automatiquement tous les champs dérivés selon les formules Excel,
+    avec les données OTCP de la version active des hypothèses
     """
-    # Nombre de visiteurs étrangers et DOM-TOM
-    if event.unknown_foreign_rate:
-        # Si taux inconnu, utiliser valeurs par défaut selon type événement (à implémenter)
-        event.calculated_visitors_foreign = int(event.total_visitors * 0.5)  # 50% par défaut
-    else:
-        event.calculated_visitors_foreign = int(event.total_visitors * (event.visitors_foreign_pct / 100))
-    
-    # Nombre de visiteurs franciliens
-    if event.unknown_idf_rate:
-        event.calculated_visitors_idf = int(event.total_visitors * 0.12)  # 12% par défaut
-    else:
-        event.calculated_visitors_idf = int(event.total_visitors * (event.visitors_idf_pct / 100))
-    
-    # Nombre de visiteurs nationaux non IDF
-    # = Total - Etrangers - Franciliens
-    event.calculated_visitors_national_non_idf = (
-        event.total_visitors - event.calculated_visitors_foreign - event.calculated_visitors_idf
-    )
-    
-    # Exposants/Sportifs/Artistes selon le type d'événement
-    if event.event_type == "Evenement_professionnel":
-        # Nombre moyen de personnes par exposant (hypothèse: paramètre des hypothèses)
-        persons_per_organization = 2.4  # Valeur par défaut, à charger depuis hypothèses
-        
-        if event.unknown_organizations_foreign_rate:
-            org_foreign_pct = 50.0  # Par défaut
-        else:
-            org_foreign_pct = event.organizations_foreign_pct
-        
-        if event.unknown_organizations_idf_rate:
-            org_idf_pct = 12.0  # Par défaut
-        else:
-            org_idf_pct = event.organizations_idf_pct
-        
-        # Calcul des exposants
-        event.calculated_exhibitors_foreign = int(
-            event.exhibiting_organizations * (org_foreign_pct / 100) * persons_per_organization
-        )
-        event.calculated_exhibitors_idf = int(
-            event.exhibiting_organizations * (org_idf_pct / 100) * persons_per_organization
-        )
-        event.calculated_exhibitors_national = int(
-            event.exhibiting_organizations * 
-            ((100 - org_foreign_pct - org_idf_pct) / 100) * 
-            persons_per_organization
-        )
-        
-    elif event.event_type in ["Evenement_culturel", "Evenement_sportif"]:
-        # Pour événements culturels/sportifs, utiliser directement le nombre d'artistes/sportifs
-        event.calculated_exhibitors_foreign = int(
-            event.athletes_artists_count * (event.athletes_artists_foreign_pct / 100)
-        )
-        event.calculated_exhibitors_idf = int(
-            event.athletes_artists_count * (event.athletes_artists_idf_pct / 100)
-        )
-        event.calculated_exhibitors_national = int(
-            event.athletes_artists_count * 
-            ((100 - event.athletes_artists_foreign_pct - event.athletes_artists_idf_pct) / 100)
-        )
-    else:
-        event.calculated_exhibitors_foreign = 0
-        event.calculated_exhibitors_idf = 0
-        event.calculated_exhibitors_national = 0
-    
-    # Total exposants/sportifs/artistes
-    event.calculated_total_exhibitors = (
-        event.calculated_exhibitors_foreign + 
-        event.calculated_exhibitors_national + 
-        event.calculated_exhibitors_idf
-    )
-    
-    # Totaux généraux
-    event.calculated_total_foreign = event.calculated_visitors_foreign + event.calculated_exhibitors_foreign
-    event.calculated_total_national = event.calculated_visitors_national_non_idf + event.calculated_exhibitors_national
-    event.calculated_total_idf = event.calculated_visitors_idf + event.calculated_exhibitors_idf
-    
-    return event
-
-
-# ==================== CALCULATION ENGINE ====================
-
-def calculate_energy_emissions(event: EventGeneral, energy: EnergyData) -> float:
-    total = 0
-    
-    if energy.approach == "real":
-        total += energy.gas_kwh * EMISSION_FACTORS.get("energy", {}).get("gas_kwh", 0.216)
-        total += energy.fuel_liters * EMISSION_FACTORS.get("energy", {}).get("fuel_liter", 0.325)
-        total += energy.electricity_kwh * EMISSION_FACTORS.get("energy", {}).get("electricity_kwh", 0.043197)
-        total += energy.coal_kg * EMISSION_FACTORS.get("energy", {}).get("coal_kg", 0.231)
-    else:  # estimated
-        if energy.building_type and energy.surface_m2:
-            building_factors = EMISSION_FACTORS.get("building_estimation", {}).get(
-                energy.building_type, EMISSION_FACTORS.get("building_estimation", {}).get("bureaux", {
-                    "heating": 12.896,
-                    "electricity": 19.7532,
-                    "cooling": 5.2313
-                })
-            )
-            days_per_year = 365
-            event_fraction = event.event_duration_days / days_per_year
-            total += energy.surface_m2 * event_fraction * (
-                building_factors.get("heating", 0) + 
-                building_factors.get("electricity", 0) + 
-                building_factors.get("cooling", 0)
-            )
-    
-    if energy.has_generators:
-        total += energy.generators_fuel_liters * EMISSION_FACTORS.get("energy", {}).get("fuel_liter", 0.325)
-    
-    return total
-
-def calculate_transport_emissions(event: EventGeneral, transport: TransportData) -> float:
-    total = 0
-    
-    # Utiliser les champs calculés
-    visitors_foreign = event.calculated_visitors_foreign or 0
-    visitors_national = event.calculated_visitors_national_non_idf or 0
-    exhibitors_foreign = event.calculated_exhibitors_foreign or 0
-    exhibitors_national = event.calculated_exhibitors_national or 0
-    
-    # Visitors foreign - assume plane for most
-    if transport.visitors_avg_distance_foreign_km > 0 and visitors_foreign > 0:
-        if transport.visitors_avg_distance_foreign_km > 3000:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_long_haul", 0.2247)
-        elif transport.visitors_avg_distance_foreign_km > 1000:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_medium_haul", 0.1208)
-        else:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_short_haul", 0.1302)
-        total += visitors_foreign * transport.visitors_avg_distance_foreign_km * 2 * factor
-    
-    # Visitors national - assume car/train mix (70% car, 30% train)
-    if transport.visitors_avg_distance_national_km > 0 and visitors_national > 0:
-        car_factor = EMISSION_FACTORS.get("transport", {}).get("car_average", 0.216) * 0.7
-        train_factor = EMISSION_FACTORS.get("transport", {}).get("train_average", 0.000127) * 0.3
-        total += visitors_national * transport.visitors_avg_distance_national_km * 2 * (car_factor + train_factor)
-    
-    # Exhibitors foreign
-    if transport.exhibitors_avg_distance_foreign_km > 0 and exhibitors_foreign > 0:
-        if transport.exhibitors_avg_distance_foreign_km > 3000:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_long_haul", 0.2247)
-        elif transport.exhibitors_avg_distance_foreign_km > 1000:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_medium_haul", 0.1208)
-        else:
-            factor = EMISSION_FACTORS.get("transport", {}).get("plane_short_haul", 0.1302)
-        total += exhibitors_foreign * transport.exhibitors_avg_distance_foreign_km * 2 * factor
-    
-    # Exhibitors national
-    if transport.exhibitors_avg_distance_national_km > 0 and exhibitors_national > 0:
-        car_factor = EMISSION_FACTORS.get("transport", {}).get("car_average", 0.216) * 0.7
-        train_factor = EMISSION_FACTORS.get("transport", {}).get("train_average", 0.000127) * 0.3
-        total += exhibitors_national * transport.exhibitors_avg_distance_national_km * 2 * (car_factor + train_factor)
-    
-    # Organizers
-    if transport.organizers_avg_distance_km > 0 and event.organizers_count > 0:
-        car_factor = EMISSION_FACTORS.get("transport", {}).get("car_average", 0.216)
-        total += event.organizers_count * transport.organizers_avg_distance_km * transport.organizers_round_trips * car_factor
-    
-    # Local transport
-    local_ratio = EMISSION_FACTORS.get("transport", {}).get("local_transport_euro_ratio", 1.770)
-    total += transport.visitors_local_transport_expenses * local_ratio
-    total += transport.exhibitors_local_transport_expenses * local_ratio
-    
-    return total
-
-def calculate_catering_emissions(event: EventGeneral, catering: CateringData) -> float:
-    total = 0
-    
-    # Mapping des types de repas vers les IDs des hypothèses
-    regime_mapping = {
-        'meat_heavy': 'a_dominante_animale_avec_boeuf',
-        'balanced': 'classique',
-        'vegetarian': 'vegetarien',
-    }
-    
-    # Petit-déjeuner et collation
-    petit_dej_factor = EMISSION_FACTORS.get("catering", {}).get('petit_dejeuner_standard', 0.5139)
-    collation_factor = EMISSION_FACTORS.get("catering", {}).get('collation_standard', 0.3)
-    
-    # Breakfasts
-    total += catering.breakfasts_count * petit_dej_factor
-    
-    # Snacks
-    total += catering.snacks_count * collation_factor
-    
-    # Lunches - utiliser les nouveaux facteurs d'émission
-    meat_heavy_factor = EMISSION_FACTORS.get("catering", {}).get(regime_mapping['meat_heavy'], 7.26)
-    balanced_factor = EMISSION_FACTORS.get("catering", {}).get(regime_mapping['balanced'], 3.49)
-    vegetarian_factor = EMISSION_FACTORS.get("catering", {}).get(regime_mapping['vegetarian'], 1.5)
-    
-    meat_heavy_lunches = catering.lunches_count * (catering.meals_meat_heavy_pct / 100)
-    balanced_lunches = catering.lunches_count * (catering.meals_balanced_pct / 100)
-    vegetarian_lunches = catering.lunches_count * (catering.meals_vegetarian_pct / 100)
-    
-    total += meat_heavy_lunches * meat_heavy_factor
-    total += balanced_lunches * balanced_factor
-    total += vegetarian_lunches * vegetarian_factor
-    
-    # Dinners - mêmes facteurs que les déjeuners
-    meat_heavy_dinners = catering.dinners_count * (catering.meals_meat_heavy_pct / 100)
-    balanced_dinners = catering.dinners_count * (catering.meals_balanced_pct / 100)
-    vegetarian_dinners = catering.dinners_count * (catering.meals_vegetarian_pct / 100)
-    
-    total += meat_heavy_dinners * meat_heavy_factor
-    total += balanced_dinners * balanced_factor
-    total += vegetarian_dinners * vegetarian_factor
-    
-    # Beverages - valeurs par défaut
-    total += catering.water_liters * 0.0003
-    total += catering.coffee_units * 0.0077
-    total += catering.soft_drinks_units * 0.0033
-    total += catering.alcohol_units * 1.59
-    
-    # Dishes - valeurs par défaut
-    total_meals = catering.breakfasts_count + catering.lunches_count + catering.dinners_count
-    if catering.dishes_type == "disposable":
-        total += total_meals * 0.0004049
-        total += catering.snacks_count * 0.000485
-    else:
-        total += (total_meals + catering.snacks_count) * 0.00005
-    
-    return total
-
-def calculate_accommodation_emissions(event: EventGeneral, accommodation: AccommodationData) -> float:
-    total = 0
-    
-    # Utiliser les champs calculés
-    visitors_foreign = event.calculated_visitors_foreign or 0
-    visitors_national = event.calculated_visitors_national_non_idf or 0
-    
-    # Mapping des clés vers les IDs des hypothèses
-    hotel_mapping = {
-        'hotel_5star': 'hotel_5_etoiles',
-        'hotel_3star': 'hotel_3_etoiles',
-        'hotel_1star': 'hotel_sans_classement',  # ou hotel_2_etoiles selon le besoin
-        'other_accommodation': 'autre_hebergement_marchand',
-        'family': 'chez_la_famille_ou_des_amis',
-    }
-    
-    # Foreign visitors
-    if visitors_foreign > 0 and accommodation.foreign_avg_nights > 0:
-        emissions = 0
-        if accommodation.foreign_hotel_5star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_5star'], 17.11)
-            emissions += visitors_foreign * accommodation.foreign_avg_nights * (accommodation.foreign_hotel_5star_pct / 100) * factor
-        if accommodation.foreign_hotel_3star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_3star'], 8.47)
-            emissions += visitors_foreign * accommodation.foreign_avg_nights * (accommodation.foreign_hotel_3star_pct / 100) * factor
-        if accommodation.foreign_hotel_1star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_1star'], 4.73)
-            emissions += visitors_foreign * accommodation.foreign_avg_nights * (accommodation.foreign_hotel_1star_pct / 100) * factor
-        if accommodation.foreign_other_accommodation_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['other_accommodation'], 10.04)
-            emissions += visitors_foreign * accommodation.foreign_avg_nights * (accommodation.foreign_other_accommodation_pct / 100) * factor
-        total += emissions
-    
-    # National non-IDF visitors
-    if visitors_national > 0 and accommodation.national_avg_nights > 0:
-        emissions = 0
-        if accommodation.national_hotel_5star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_5star'], 17.11)
-            emissions += visitors_national * accommodation.national_avg_nights * (accommodation.national_hotel_5star_pct / 100) * factor
-        if accommodation.national_hotel_3star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_3star'], 8.47)
-            emissions += visitors_national * accommodation.national_avg_nights * (accommodation.national_hotel_3star_pct / 100) * factor
-        if accommodation.national_hotel_1star_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['hotel_1star'], 4.73)
-            emissions += visitors_national * accommodation.national_avg_nights * (accommodation.national_hotel_1star_pct / 100) * factor
-        if accommodation.national_other_accommodation_pct > 0:
-            factor = EMISSION_FACTORS.get("accommodation", {}).get(hotel_mapping['other_accommodation'], 10.04)
-            emissions += visitors_national * accommodation.national_avg_nights * (accommodation.national_other_accommodation_pct / 100) * factor
-        total += emissions
-    
-    return total
-
-def calculate_waste_emissions(waste: WasteData) -> float:
-    # Utiliser des facteurs par défaut car non présents dans les nouvelles hypothèses
-    waste_factors = {
-        "plastic": 2.99,
-        "cardboard": 0.078,
-        "paper": 0.078,
-        "aluminum": 1.8,
-        "textile": 0.263,
-        "furniture": 1.593,
-    }
-    
-    total = 0
-    total += waste.plastic_kg * waste_factors["plastic"]
-    total += waste.cardboard_kg * waste_factors["cardboard"]
-    total += waste.paper_kg * waste_factors["paper"]
-    total += waste.aluminum_kg * waste_factors["aluminum"]
-    total += waste.textile_kg * waste_factors["textile"]
-    total += waste.furniture_kg * waste_factors["furniture"]
-    return total
-
-def calculate_communication_emissions(communication: CommunicationData) -> float:
-    total = 0
-    
-    # Supports physiques - utiliser les nouveaux facteurs
-    poster_factor = EMISSION_FACTORS.get("communication", {}).get("affichage_4_m2", 0.5)
-    flyer_factor = EMISSION_FACTORS.get("communication", {}).get("tract_21x297", 0.01)
-    banner_factor = EMISSION_FACTORS.get("communication", {}).get("kakemono_200_cm", 0.202)
-    
-    total += communication.posters_count * poster_factor
-    total += communication.flyers_count * flyer_factor
-    total += communication.banners_count * banner_factor
-    
-    # Streaming - valeur par défaut
-    if communication.streaming_hours > 0 and communication.streaming_audience > 0:
-        total += (communication.streaming_hours * communication.streaming_audience / 1000 * 0.0001184)
-    
-    # Ratio monétaire
-    comm_ratio = EMISSION_FACTORS.get("communication_ratio", 0.170)
-    total += communication.communication_expenses * comm_ratio
-    
-    return total
-
-def calculate_freight_emissions(freight: FreightData) -> float:
-    total = 0
-    
-    # Utiliser les facteurs du fret - camion par défaut
-    truck_factor = EMISSION_FACTORS.get("freight", {}).get("distances", {}).get("poids_lourd_rigide_12_20_t", 0.0592)
-    
-    if freight.decor_weight_kg > 0:
-        total += (freight.decor_weight_kg / 1000) * freight.decor_distance_km * truck_factor
-    if freight.equipment_weight_kg > 0:
-        total += (freight.equipment_weight_kg / 1000) * freight.equipment_distance_km * truck_factor
-    if freight.food_weight_kg > 0:
-        total += (freight.food_weight_kg / 1000) * freight.food_distance_km * truck_factor
-    
-    return total
-
-def calculate_amenities_emissions(amenities: AmenitiesData) -> float:
-    total = 0
-    
-    # Utiliser les nouveaux ratios des hypothèses
-    amenities_factors = EMISSION_FACTORS.get("amenities", {})
-    
-    # Convertir les kgCO2/k€ en kgCO2/€
-    site_rental_ratio = amenities_factors.get("location_site", 170.0) / 1000
-    reception_ratio = amenities_factors.get("accueil", 170.0) / 1000
-    construction_ratio = amenities_factors.get("construction", 360.0) / 1000
-    it_ratio = amenities_factors.get("informatique_et_equipements_electroniques", 400.0) / 1000
-    
-    total += amenities.site_rental_expenses * site_rental_ratio
-    total += amenities.reception_expenses * reception_ratio
-    total += amenities.construction_expenses * construction_ratio
-    total += amenities.it_expenses * it_ratio
-    
-    return total
-
-def calculate_purchases_emissions(event: EventGeneral, purchases: PurchasesData) -> float:
-    total = 0
-    
-    # Utiliser les champs calculés
-    total_visitors = event.total_visitors or 0
-    total_exhibitors = event.calculated_total_exhibitors or 0
-    
-    # Goodies - utiliser le ratio de la catégorie appropriée
-    total_people = total_visitors + total_exhibitors
-    goodies_ratio = EMISSION_FACTORS.get("purchases", {}).get("goodies", {}).get("fournitures_de_bureau_legeres", 5.92)
-    total += total_people * purchases.goodies_expenses_per_person * goodies_ratio
-    
-    # Badges - nouveau mapping
-    badge_mapping = {
-        "plastic_soft": "plastique_souple",
-        "plastic_hard": "plastique_rigide",
-        "textile": "textile",
-        "paper": "papier",
-    }
-    
-    badge_factor = EMISSION_FACTORS.get("purchases", {}).get("badges", {}).get(
-        badge_mapping.get(purchases.badges_type, "plastique_souple"), 
-        0.130419
-    )
-    total += (purchases.badges_visitors + purchases.badges_exhibitors + purchases.badges_organizers) * badge_factor
-    
-    return total
-
-def get_emission_class(emissions_per_participant: float) -> str:
-    """Classify emissions per participant (kgCO2e/person)"""
-    if emissions_per_participant < 30:
-        return "A"
-    elif emissions_per_participant < 50:
-        return "B"
-    elif emissions_per_participant < 100:
-        return "C"
-    elif emissions_per_participant < 200:
-        return "D"
-    elif emissions_per_participant < 400:
-        return "E"
-    elif emissions_per_participant < 600:
-        return "F"
-    else:
-        return "G"
+    return calculate_general_fields(event, hypotheses_store.current.general)
 
 
 # ==================== ROUTES ====================
@@ -817,26 +143,79 @@ async def create_event(input: EventGeneralCreate):
     # Calculer automatiquement les champs dérivés
     event_obj = calculate_event_fields(event_obj)
     
-    doc = event_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    
-    await db.events.insert_one(doc)
-    return event_obj
+    return await repository.insert_event(event_obj)
+
+@api_router.post("/events/import", response_model=ImportReport)
+async def import_events_file(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|xlsx)$"),
+    filename: Optional[str] = None,
+    dry_run: bool = False,
+):
+    """
+    Importer des événements depuis un fichier CSV ou XLSX envoyé comme corps de
+    la requête (format déduit de `format`, de `filename` ou du Content-Type).
+    Renvoie le rapport d'import avec les erreurs par ligne.
+    """
+    file_format = format or detect_format(filename, request.headers.get("content-type"))
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            return await import_events(
+                spool, file_format, repository, hypotheses_store.current.general, dry_run,
+            )
+        except ImportFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+def parse_event_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Champs demandés (?fields=a,b) ; 400 si l'un d'eux n'existe pas"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in EventGeneral.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs inconnus: {', '.join(unknown)}")
+    return requested
+
+@api_router.get("/events", response_model=None)
+async def get_events(
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Événements triés par date de création, par pages de `limit` événements
+    (1000 par défaut et au maximum). S'il reste des événements, le curseur de la
+    page suivante est renvoyé dans l'en-tête X-Next-Cursor, à repasser dans
+    `cursor` ; l'en-tête est absent sur la dernière page.
+
+    Réponse : liste JSON des documents stockés, non revalidés par EventGeneral
+    (dates en ISO 8601, sans _id). Avec `fields=a,b`, chaque document ne contient
+    que ces champs, plus id et created_at (clé du curseur).
+    """
+    try:
+        events, next_cursor = await repository.list_events(limit, cursor, parse_event_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return JSONResponse(content=events, headers=headers)
 
-@api_router.get("/events", response_model=List[EventGeneral])
-async def get_events():
-    events = await db.events.find({}, {"_id": 0}).to_list(1000)
-    for event in events:
-        if isinstance(event['created_at'], str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
-        if isinstance(event['updated_at'], str):
-            event['updated_at'] = datetime.fromisoformat(event['updated_at'])
-    return events
+@api_router.get("/events/stream")
+async def stream_events(fields: Optional[str] = None):
+    """Export de tous les événements en NDJSON, lus par lots"""
+    projection = parse_event_fields(fields)
+    
+    async def lines():
+        async for event in repository.iter_events(projection):
+            yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @api_router.get("/events/{event_id}", response_model=EventGeneral)
 async def get_event(event_id: str):
-    event = await db.events.find_one({"id": event_id}, {"_id": 0})
+    event = await repository.get_event(event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Événement non trouvé")
     if isinstance(event['created_at'], str):
@@ -861,14 +240,13 @@ async def preview_event_calculations(input: EventGeneralCreate):
 async def create_energy_data(input: EnergyDataCreate):
     energy_dict = input.model_dump()
     energy_obj = EnergyData(**energy_dict)
-    doc = energy_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.energy.insert_one(doc)
+    energy_obj = await repository.save_section("energy", energy_obj)
+    await result_cache.invalidate_event(energy_obj.event_id)
     return energy_obj
 
 @api_router.get("/energy/{event_id}", response_model=EnergyData)
 async def get_energy_data(event_id: str):
-    energy = await db.energy.find_one({"event_id": event_id}, {"_id": 0})
+    energy = await repository.get_section("energy", event_id)
     if not energy:
         raise HTTPException(status_code=404, detail="Données énergie non trouvées")
     if isinstance(energy['created_at'], str):
@@ -880,14 +258,13 @@ async def get_energy_data(event_id: str):
 async def create_transport_data(input: TransportDataCreate):
     transport_dict = input.model_dump()
     transport_obj = TransportData(**transport_dict)
-    doc = transport_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.transport.insert_one(doc)
+    transport_obj = await repository.save_section("transport", transport_obj)
+    await result_cache.invalidate_event(transport_obj.event_id)
     return transport_obj
 
 @api_router.get("/transport/{event_id}", response_model=TransportData)
 async def get_transport_data(event_id: str):
-    transport = await db.transport.find_one({"event_id": event_id}, {"_id": 0})
+    transport = await repository.get_section("transport", event_id)
     if not transport:
         raise HTTPException(status_code=404, detail="Données transport non trouvées")
     if isinstance(transport['created_at'], str):
@@ -899,14 +276,13 @@ async def get_transport_data(event_id: str):
 async def create_catering_data(input: CateringDataCreate):
     catering_dict = input.model_dump()
     catering_obj = CateringData(**catering_dict)
-    doc = catering_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.catering.insert_one(doc)
+    catering_obj = await repository.save_section("catering", catering_obj)
+    await result_cache.invalidate_event(catering_obj.event_id)
     return catering_obj
 
 @api_router.get("/catering/{event_id}", response_model=CateringData)
 async def get_catering_data(event_id: str):
-    catering = await db.catering.find_one({"event_id": event_id}, {"_id": 0})
+    catering = await repository.get_section("catering", event_id)
     if not catering:
         raise HTTPException(status_code=404, detail="Données restauration non trouvées")
     if isinstance(catering['created_at'], str):
@@ -918,14 +294,13 @@ async def get_catering_data(event_id: str):
 async def create_accommodation_data(input: AccommodationDataCreate):
     accommodation_dict = input.model_dump()
     accommodation_obj = AccommodationData(**accommodation_dict)
-    doc = accommodation_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.accommodation.insert_one(doc)
+    accommodation_obj = await repository.save_section("accommodation", accommodation_obj)
+    await result_cache.invalidate_event(accommodation_obj.event_id)
     return accommodation_obj
 
 @api_router.get("/accommodation/{event_id}", response_model=AccommodationData)
 async def get_accommodation_data(event_id: str):
-    accommodation = await db.accommodation.find_one({"event_id": event_id}, {"_id": 0})
+    accommodation = await repository.get_section("accommodation", event_id)
     if not accommodation:
         raise HTTPException(status_code=404, detail="Données hébergement non trouvées")
     if isinstance(accommodation['created_at'], str):
@@ -937,14 +312,13 @@ async def get_accommodation_data(event_id: str):
 async def create_waste_data(input: WasteDataCreate):
     waste_dict = input.model_dump()
     waste_obj = WasteData(**waste_dict)
-    doc = waste_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.waste.insert_one(doc)
+    waste_obj = await repository.save_section("waste", waste_obj)
+    await result_cache.invalidate_event(waste_obj.event_id)
     return waste_obj
 
 @api_router.get("/waste/{event_id}", response_model=WasteData)
 async def get_waste_data(event_id: str):
-    waste = await db.waste.find_one({"event_id": event_id}, {"_id": 0})
+    waste = await repository.get_section("waste", event_id)
     if not waste:
         raise HTTPException(status_code=404, detail="Données déchets non trouvées")
     if isinstance(waste['created_at'], str):
@@ -956,14 +330,13 @@ async def get_waste_data(event_id: str):
 async def create_communication_data(input: CommunicationDataCreate):
     communication_dict = input.model_dump()
     communication_obj = CommunicationData(**communication_dict)
-    doc = communication_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.communication.insert_one(doc)
+    communication_obj = await repository.save_section("communication", communication_obj)
+    await result_cache.invalidate_event(communication_obj.event_id)
     return communication_obj
 
 @api_router.get("/communication/{event_id}", response_model=CommunicationData)
 async def get_communication_data(event_id: str):
-    communication = await db.communication.find_one({"event_id": event_id}, {"_id": 0})
+    communication = await repository.get_section("communication", event_id)
     if not communication:
         raise HTTPException(status_code=404, detail="Données communication non trouvées")
     if isinstance(communication['created_at'], str):
@@ -975,14 +348,13 @@ async def get_communication_data(event_id: str):
 async def create_freight_data(input: FreightDataCreate):
     freight_dict = input.model_dump()
     freight_obj = FreightData(**freight_dict)
-    doc = freight_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.freight.insert_one(doc)
+    freight_obj = await repository.save_section("freight", freight_obj)
+    await result_cache.invalidate_event(freight_obj.event_id)
     return freight_obj
 
 @api_router.get("/freight/{event_id}", response_model=FreightData)
 async def get_freight_data(event_id: str):
-    freight = await db.freight.find_one({"event_id": event_id}, {"_id": 0})
+    freight = await repository.get_section("freight", event_id)
     if not freight:
         raise HTTPException(status_code=404, detail="Données fret non trouvées")
     if isinstance(freight['created_at'], str):
@@ -994,14 +366,13 @@ async def get_freight_data(event_id: str):
 async def create_amenities_data(input: AmenitiesDataCreate):
     amenities_dict = input.model_dump()
     amenities_obj = AmenitiesData(**amenities_dict)
-    doc = amenities_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.amenities.insert_one(doc)
+    amenities_obj = await repository.save_section("amenities", amenities_obj)
+    await result_cache.invalidate_event(amenities_obj.event_id)
     return amenities_obj
 
 @api_router.get("/amenities/{event_id}", response_model=AmenitiesData)
 async def get_amenities_data(event_id: str):
-    amenities = await db.amenities.find_one({"event_id": event_id}, {"_id": 0})
+    amenities = await repository.get_section("amenities", event_id)
     if not amenities:
         raise HTTPException(status_code=404, detail="Données aménagements non trouvées")
     if isinstance(amenities['created_at'], str):
@@ -1013,14 +384,13 @@ async def get_amenities_data(event_id: str):
 async def create_purchases_data(input: PurchasesDataCreate):
     purchases_dict = input.model_dump()
     purchases_obj = PurchasesData(**purchases_dict)
-    doc = purchases_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.purchases.insert_one(doc)
+    purchases_obj = await repository.save_section("purchases", purchases_obj)
+    await result_cache.invalidate_event(purchases_obj.event_id)
     return purchases_obj
 
 @api_router.get("/purchases/{event_id}", response_model=PurchasesData)
 async def get_purchases_data(event_id: str):
-    purchases = await db.purchases.find_one({"event_id": event_id}, {"_id": 0})
+    purchases = await repository.get_section("purchases", event_id)
     if not purchases:
         raise HTTPException(status_code=404, detail="Données achats non trouvées")
     if isinstance(purchases['created_at'], str):
@@ -1030,132 +400,246 @@ async def get_purchases_data(event_id: str):
 # Calculate emissions
 @api_router.get("/calculate/{event_id}", response_model=EmissionResult)
 async def calculate_emissions(event_id: str):
-    # Get event data
-    event = await db.events.find_one({"id": event_id}, {"_id": 0})
-    if not event:
+    # Événement et sections en un seul aller-retour
+    hypotheses = hypotheses_store.current
+    docs = await repository.get_footprint_docs(event_id)
+    if not docs:
         raise HTTPException(status_code=404, detail="Événement non trouvé")
     
-    if isinstance(event['created_at'], str):
-        event['created_at'] = datetime.fromisoformat(event['created_at'])
-    if isinstance(event['updated_at'], str):
-        event['updated_at'] = datetime.fromisoformat(event['updated_at'])
-    
-    event_obj = EventGeneral(**event)
-    
-    emissions_by_category = {}
-    
-    # Energy
-    energy = await db.energy.find_one({"event_id": event_id}, {"_id": 0})
-    if energy:
-        if isinstance(energy.get('created_at'), str):
-            energy['created_at'] = datetime.fromisoformat(energy['created_at'])
-        energy_obj = EnergyData(**energy)
-        emissions_by_category["Énergie"] = calculate_energy_emissions(event_obj, energy_obj)
-    else:
-        emissions_by_category["Énergie"] = 0
-    
-    # Transport
-    transport = await db.transport.find_one({"event_id": event_id}, {"_id": 0})
-    if transport:
-        if isinstance(transport.get('created_at'), str):
-            transport['created_at'] = datetime.fromisoformat(transport['created_at'])
-        transport_obj = TransportData(**transport)
-        emissions_by_category["Transport"] = calculate_transport_emissions(event_obj, transport_obj)
-    else:
-        emissions_by_category["Transport"] = 0
-    
-    # Catering
-    catering = await db.catering.find_one({"event_id": event_id}, {"_id": 0})
-    if catering:
-        if isinstance(catering.get('created_at'), str):
-            catering['created_at'] = datetime.fromisoformat(catering['created_at'])
-        catering_obj = CateringData(**catering)
-        emissions_by_category["Restauration"] = calculate_catering_emissions(event_obj, catering_obj)
-    else:
-        emissions_by_category["Restauration"] = 0
-    
-    # Accommodation
-    accommodation = await db.accommodation.find_one({"event_id": event_id}, {"_id": 0})
-    if accommodation:
-        if isinstance(accommodation.get('created_at'), str):
-            accommodation['created_at'] = datetime.fromisoformat(accommodation['created_at'])
-        accommodation_obj = AccommodationData(**accommodation)
-        emissions_by_category["Hébergements"] = calculate_accommodation_emissions(event_obj, accommodation_obj)
-    else:
-        emissions_by_category["Hébergements"] = 0
-    
-    # Waste
-    waste = await db.waste.find_one({"event_id": event_id}, {"_id": 0})
-    if waste:
-        if isinstance(waste.get('created_at'), str):
-            waste['created_at'] = datetime.fromisoformat(waste['created_at'])
-        waste_obj = WasteData(**waste)
-        emissions_by_category["Déchets"] = calculate_waste_emissions(waste_obj)
-    else:
-        emissions_by_category["Déchets"] = 0
-    
-    # Communication
-    communication = await db.communication.find_one({"event_id": event_id}, {"_id": 0})
-    if communication:
-        if isinstance(communication.get('created_at'), str):
-            communication['created_at'] = datetime.fromisoformat(communication['created_at'])
-        communication_obj = CommunicationData(**communication)
-        emissions_by_category["Communication"] = calculate_communication_emissions(communication_obj)
-    else:
-        emissions_by_category["Communication"] = 0
-    
-    # Freight
-    freight = await db.freight.find_one({"event_id": event_id}, {"_id": 0})
-    if freight:
-        if isinstance(freight.get('created_at'), str):
-            freight['created_at'] = datetime.fromisoformat(freight['created_at'])
-        freight_obj = FreightData(**freight)
-        emissions_by_category["Fret"] = calculate_freight_emissions(freight_obj)
-    else:
-        emissions_by_category["Fret"] = 0
-    
-    # Amenities
-    amenities = await db.amenities.find_one({"event_id": event_id}, {"_id": 0})
-    if amenities:
-        if isinstance(amenities.get('created_at'), str):
-            amenities['created_at'] = datetime.fromisoformat(amenities['created_at'])
-        amenities_obj = AmenitiesData(**amenities)
-        emissions_by_category["Aménagements"] = calculate_amenities_emissions(amenities_obj)
-    else:
-        emissions_by_category["Aménagements"] = 0
-    
-    # Purchases
-    purchases = await db.purchases.find_one({"event_id": event_id}, {"_id": 0})
-    if purchases:
-        if isinstance(purchases.get('created_at'), str):
-            purchases['created_at'] = datetime.fromisoformat(purchases['created_at'])
-        purchases_obj = PurchasesData(**purchases)
-        emissions_by_category["Achats et goodies"] = calculate_purchases_emissions(event_obj, purchases_obj)
-    else:
-        emissions_by_category["Achats et goodies"] = 0
+    # Bilan inchangé tant que les saisies et les hypothèses sont les mêmes
+    docs_hash = footprint_hash(docs)
+    result = await result_cache.get(event_id, docs_hash, hypotheses.version_id)
+    if result is None:
+        result = incremental_engine.compute(docs, hypotheses)
+        await result_cache.put(event_id, docs_hash, hypotheses.version_id, result)
+    return result
+
+@api_router.post("/calculate/batch")
+async def calculate_emissions_batch(input: BatchCalculationRequest):
+    """
+    Calcule le bilan d'un lot d'événements. Les résultats (EmissionResult) sont
+    renvoyés en NDJSON au fil du calcul, dans l'ordre de la requête.
+    """
+    event_ids = list(dict.fromkeys(input.event_ids))
+    # Tout le lot est calculé avec la même version des hypothèses
+    hypotheses = hypotheses_store.current
+    
+    async def results():
+        for start in range(0, len(event_ids), BATCH_CHUNK_SIZE):
+            chunk = event_ids[start:start + BATCH_CHUNK_SIZE]
+            footprints = await repository.get_footprints(chunk)
+            for event_id in chunk:
+                footprint = footprints.get(event_id)
+                if footprint:
+                    calculate_general_fields(footprint.event, hypotheses.general)
+                    yield compute_emission_result(footprint, hypotheses.factors).model_dump_json() + "\n"
+                else:
+                    yield json.dumps({"event_id": event_id, "error": "Événement non trouvé"}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@api_router.get("/calculate/{event_id}/uncertainty", response_model=UncertaintyResult)
+async def calculate_emissions_uncertainty(
+    event_id: str,
+    draws: int = Query(DEFAULT_DRAWS, ge=100, le=MAX_DRAWS),
+    seed: Optional[int] = None,
+):
+    """
+    Bilan avec incertitudes (Monte Carlo) : moyenne, P5/P95 du total et de chaque
+    catégorie. `seed` rend les tirages reproductibles.
+    """
+    hypotheses = hypotheses_store.current
+    footprint = await repository.get_footprint(event_id)
+    if not footprint:
+        raise HTTPException(status_code=404, detail="Événement non trouvé")
     
-    # Calculate totals
-    total_emissions_kg = sum(emissions_by_category.values())
-    total_participants = (event_obj.total_visitors + 
-                         (event_obj.calculated_total_exhibitors or 0) + 
-                         event_obj.organizers_count)
-    emissions_per_participant = total_emissions_kg / total_participants if total_participants > 0 else 0
-    emission_class = get_emission_class(emissions_per_participant)
+    calculate_general_fields(footprint.event, hypotheses.general)
+    central = compute_emission_result(footprint, hypotheses.factors)
+    # Calcul NumPy hors de la boucle d'événements
+    return await asyncio.to_thread(
+        run_uncertainty, footprint, hypotheses.factors, hypotheses.general,
+        central.total_emissions_kg, draws, seed,
+    )
+
+@api_router.post("/calculate/{event_id}/scenarios", response_model=ScenarioResult)
+async def calculate_emissions_scenarios(event_id: str, input: ScenarioRequest):
+    """
+    Évalue une grille de variantes de l'événement (surcharges "section.champ")
+    en un seul calcul vectorisé, sans rien enregistrer
+    """
+    hypotheses = hypotheses_store.current
+    footprint = await repository.get_footprint(event_id)
+    if not footprint:
+        raise HTTPException(status_code=404, detail="Événement non trouvé")
     
-    # Get top 3 emitters
-    sorted_emissions = sorted(emissions_by_category.items(), key=lambda x: x[1], reverse=True)
-    top_3_emitters = [Top3Emitter(category=k, emissions=v) for k, v in sorted_emissions[:3]]
+    try:
+        return await asyncio.to_thread(
+            run_scenarios, footprint, resolve_factor_vector(hypotheses.factors), hypotheses.general, input,
+        )
+    except ScenarioError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/calculate/{event_id}/sensitivity", response_model=SensitivityResult)
+async def calculate_emissions_sensitivity(
+    event_id: str,
+    variation: float = Query(DEFAULT_VARIATION_PCT, gt=0, le=100),
+):
+    """
+    Sensibilité du total à chaque saisie et à chaque facteur d'émission :
+    dérivées partielles exactes et classement tornade pour ±`variation` %
+    """
+    hypotheses = hypotheses_store.current
+    footprint = await repository.get_footprint(event_id)
+    if not footprint:
+        raise HTTPException(status_code=404, detail="Événement non trouvé")
     
-    return EmissionResult(
-        event_id=event_id,
-        event_name=event_obj.event_name,
-        total_emissions_kg=total_emissions_kg,
-        emissions_by_category=emissions_by_category,
-        emissions_per_participant=emissions_per_participant,
-        emission_class=emission_class,
-        top_3_emitters=top_3_emitters
+    return run_sensitivity(footprint, hypotheses.factors, hypotheses.general, variation)
+
+# Live calculation
+@api_router.websocket("/ws/live")
+async def live_calculation(websocket: WebSocket, event_id: Optional[str] = None):
+    """
+    Calcul en direct du formulaire. Le client envoie des correctifs
+    {"section": "event" | "energy" | ..., "fields": {...}, "seq": n} ; le serveur
+    répond {"type": "update", "seq": n, "derived": ..., "categories": ..., "summary": ...}
+    avec uniquement les valeurs modifiées. `event_id` reprend un événement enregistré.
+    """
+    await websocket.accept()
+    docs = None
+    if event_id:
+        docs = await repository.get_footprint_docs(event_id)
+        if not docs:
+            await websocket.send_json({"type": "error", "detail": "Événement non trouvé"})
+            await websocket.close(code=4404)
+            return
+    session = LiveSession(docs)
+    await websocket.send_json({
+        "type": "state", "event_id": session.event_id, **session.changes(hypotheses_store.current),
+    })
+    
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "JSON invalide"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Message invalide"})
+                continue
+            seq = message.get("seq")
+            try:
+                session.apply(message.get("section"), message.get("fields"))
+            except LiveSessionError as e:
+                await websocket.send_json({"type": "error", "seq": seq, "detail": e.detail, "errors": e.errors})
+                continue
+            await websocket.send_json({"type": "update", "seq": seq, **session.changes(hypotheses_store.current)})
+    except WebSocketDisconnect:
+        pass
+
+# Export
+@api_router.get("/export")
+async def export_results(
+    format: str = Query(event_export.XLSX, pattern="^(xlsx|csv|ndjson)$"),
+    event_id: Optional[List[str]] = Query(None),
+    event_type: Optional[str] = None,
+):
+    """
+    Export des saisies, champs calculés et émissions par catégorie d'un ou
+    plusieurs événements (?event_id=...&event_id=...) ou de tous les événements
+    d'un type, dans la disposition du classeur Excel
+    """
+    query = {}
+    if event_id:
+        query["id"] = {"$in": event_id}
+    if event_type:
+        query["event_type"] = event_type
+    # Tout l'export est calculé avec la même version des hypothèses
+    hypotheses = hypotheses_store.current
+    chunks = event_export.export_chunks(format, repository.iter_footprints(query, BATCH_CHUNK_SIZE), hypotheses)
+    filename = f"bilans-carbone.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=event_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
+# Hypotheses
+@api_router.get("/hypotheses/version", response_model=HypothesesVersionInfo)
+async def get_hypotheses_version():
+    return version_info(hypotheses_store.current)
+
+def serialized_payload(kind: str, version: HypothesesVersion, build: Callable) -> Tuple[bytes, str]:
+    key = (kind, version.version_id)
+    if key not in serialized_payloads:
+        serialized_payloads[key] = evaluation_bundle.serialize(build(version))
+    return serialized_payloads[key]
+
+def if_none_match_hits(if_none_match: str, etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110, 13.1.2) : préfixe W/ ignoré, * accepte tout"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in tags)
+
+def etag_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    # no-cache : le client revalide à chaque fois (304 tant que la version n'a pas changé)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and if_none_match_hits(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@api_router.get("/hypotheses/bundle")
+async def get_evaluation_bundle(if_none_match: Optional[str] = Header(default=None)):
+    """Facteurs résolus, profils OTCP et seuils des classes pour le calcul côté client"""
+    body, etag = serialized_payload("bundle", hypotheses_store.current, evaluation_bundle.build_bundle)
+    return etag_response(body, etag, if_none_match)
+
+@api_router.get("/hypotheses/bundle/conformance")
+async def get_evaluation_bundle_conformance(if_none_match: Optional[str] = Header(default=None)):
+    """Vecteurs de conformité : snapshot des résultats du moteur serveur pour la version active"""
+    body, etag = serialized_payload("conformance", hypotheses_store.current, evaluation_bundle.conformance_vectors)
+    return etag_response(body, etag, if_none_match)
+
+@api_router.post("/admin/hypotheses/reload", response_model=HypothesesVersionInfo)
+async def reload_hypotheses(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Relire les fichiers d'hypothèses et activer la nouvelle version si elle diffère.
+    Seul le worker qui reçoit la requête est rechargé : avec plusieurs workers
+    uvicorn, les autres gardent l'ancienne version jusqu'à leur propre
+    rechargement. Pour tous les mettre à jour, activer HYPOTHESES_WATCH (chaque
+    worker surveille les fichiers) ou redémarrer le service ; la réponse indique
+    la version du worker qui a traité la requête.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    try:
+        version, changed = await asyncio.to_thread(hypotheses_store.reload)
+    except Exception as e:
+        logger.error(f"Rechargement des hypothèses refusé: {e}")
+        raise HTTPException(status_code=422, detail=f"Hypothèses invalides, version {hypotheses_store.version_id} conservée: {e}")
+    if changed:
+        await on_hypotheses_changed(version)
+    return version_info(version, changed)
+
+async def on_hypotheses_changed(version: HypothesesVersion):
+    incremental_engine.clear()
+    serialized_payloads.clear()
+    await result_cache.invalidate_version(version.version_id)
+
+# Cache
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    return {**result_cache.stats(), "incremental": incremental_engine.stats()}
+
+@api_router.get("/loop-lag")
+async def get_loop_lag(since: Optional[float] = None):
+    """Retard de la boucle d'événements de ce worker, depuis `since` (horodatage Unix)"""
+    if not LOOP_LAG_MONITOR:
+        raise HTTPException(status_code=404, detail="Mesure du retard de la boucle désactivée (LOOP_LAG_MONITOR)")
+    return loop_monitor.stats(since)
+
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1166,6 +650,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Configure logging
@@ -1175,6 +660,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await repository.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Création des index MongoDB impossible: {e}")
+
+@app.on_event("startup")
+async def setup_result_cache():
+    if RESULT_CACHE_SHARED:
+        if isinstance(repository, MongoEventRepository):
+            result_cache.shared = repository.db.calculation_cache
+        else:
+            logger.warning("RESULT_CACHE_SHARED ignoré : le niveau partagé nécessite MongoDB")
+    await result_cache.setup(ttl_seconds=int(os.environ.get('RESULT_CACHE_TTL_SECONDS', '86400')))
+
+@app.on_event("startup")
+async def start_hypotheses_watch():
+    if HYPOTHESES_WATCH:
+        app.state.hypotheses_watch = asyncio.create_task(
+            hypotheses_store.watch(on_change=on_hypotheses_changed)
+        )
+        logger.info(f"Surveillance des hypothèses activée ({hypotheses_store.directory})")
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if LOOP_LAG_MONITOR:
+        app.state.loop_monitor = asyncio.create_task(loop_monitor.run())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for name in ("hypotheses_watch", "loop_monitor"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    repository.close()
\ No newline at end of file
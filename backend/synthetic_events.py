@@ -0,0 +1,437 @@
+"""
+Générateur d'événements synthétiques pour les tests de charge et benchmarks
+
+Aucune donnée client : les types et sous-types viennent de types_evenements.json,
+les visiteurs, durées, entreprises exposantes et parts d'origine des profils
+de donnees_otcp_evenements_professionnels.json (tirages autour de la moyenne
+du sous-type ; moyennes des profils pour les événements culturels et
+sportifs). Les sections sont tirées dans des plages cohérentes avec les
+autres tables : lieux et catégories CEREN (énergie), nuitées et durées de
+séjour (hébergements), dépenses moyennes d'aménagement et de communication
+par sous-type, repas et boissons proportionnels aux participants et à la durée.
+
+Chaque événement est tiré avec son propre générateur, initialisé par (graine,
+rang) : une graine donne toujours le même corpus, et une tranche --start/--count
+donne les mêmes événements que le corpus complet. Les lignes portent les noms
+de colonnes de l'import ("<section>.<champ>" pour les sections).
+
+Usage (depuis backend/) :
+    python -m synthetic_events --count 1000000 --seed 42 > evenements.ndjson
+    python -m synthetic_events --count 1000000 --seed 42 --mongo   # MONGO_URL, DB_NAME
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import uuid
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from calculation_engine import (
+    ATHLETES_ARTISTS_TYPES,
+    DEFAULT_PERSONS_PER_EXHIBITOR_NATIONAL,
+    DEFAULT_PROFILE,
+    PROFESSIONAL,
+    GeneralHypotheses,
+    OtcpProfile,
+    build_otcp_profile,
+    calculate_general_fields,
+)
+from event_import import split_row
+from factor_table import BADGE_FACTORS
+from hypotheses_snapshot import HYPOTHESES_DIR
+from models import EventGeneral
+from repository import SECTION_MODELS, EventFootprint
+
+DEFAULT_SEED = 42
+MONGO_BATCH_SIZE = 1000
+
+# Répartition des types d'événements du corpus
+EVENT_TYPE_WEIGHTS = {PROFESSIONAL: 0.6, ATHLETES_ARTISTS_TYPES[0]: 0.25, ATHLETES_ARTISTS_TYPES[1]: 0.15}
+# Part des événements dont chaque section est saisie
+SECTION_PROBABILITY = 0.85
+# Part des événements professionnels dont un taux est déclaré inconnu
+UNKNOWN_RATE_PROBABILITY = 0.15
+
+# Concentration des tirages de parts autour des moyennes (plus grand = plus proche)
+SHARE_CONCENTRATION = 30.0
+# Entreprises exposantes d'un sous-type sans données OTCP
+ORGANIZATIONS_MEDIAN = 50
+# Sportifs/artistes : effectif médian et parts d'origine moyennes
+ATHLETES_MEDIAN = 40
+ATHLETES_SHARES = (0.1, 0.5, 0.4)  # étrangers, nationaux, franciliens
+
+CORPUS_START = date(2023, 1, 1)
+CORPUS_DAYS = 730
+
+# Espace de noms des identifiants : uuid5(graine:rang), stable d'une génération à l'autre
+SYNTHETIC_NAMESPACE = uuid.UUID("6f0f6c59-0f5e-4f8a-9a0e-3f0c2f7f5a21")
+
+
+@dataclass(frozen=True)
+class Distributions:
+    """Tables d'hypothèses utilisées par le générateur, lues une fois"""
+    subtypes: Dict[str, List[str]]
+    # Libellé du sous-type -> profil OTCP ; profil moyen hors événements professionnels
+    profiles: Dict[str, OtcpProfile]
+    pooled_profile: OtcpProfile
+    # Type d'événement -> catégories CEREN des lieux possibles
+    building_types: Dict[str, List[str]]
+    # Sous-type -> parts (5*, 3*, 1*, autre marchand, famille) des visiteurs étrangers / nationaux
+    foreign_stays: Dict[str, Sequence[float]]
+    national_stays: Dict[str, Sequence[float]]
+    stay_nights: Dict[str, float]
+    # Sous-type -> dépenses moyennes (€/participant, sauf location en €)
+    communication_per_person: Dict[str, float]
+    site_rental: Dict[str, float]
+    amenities_per_person: Dict[str, float]
+
+
+def _table(directory: Path, name: str):
+    with open(directory / name, encoding="utf-8") as f:
+        return json.load(f)["data"]
+
+
+def _stays(rows: List[Dict[str, Any]], family_key: str) -> Dict[str, Sequence[float]]:
+    return {
+        row["type"]: (
+            row["dont_hotels_4_5"], row["dont_hotels_2_3"], row["dont_hotels_0_1"],
+            row["dont_autre_hebergement_marchand"], row[family_key],
+        )
+        for row in rows
+    }
+
+
+def load_distributions(directory: Path = HYPOTHESES_DIR) -> Distributions:
+    profiles = {}
+    for row in _table(directory, "general/donnees_otcp_evenements_professionnels.json"):
+        profile = build_otcp_profile(row)
+        profiles[profile.label] = profile
+
+    def pooled(attribute: str) -> float:
+        values = [getattr(profile, attribute) for profile in profiles.values() if getattr(profile, attribute)]
+        return median(values) if values else getattr(DEFAULT_PROFILE, attribute)
+
+    pooled_profile = replace(
+        DEFAULT_PROFILE,
+        avg_visitors=pooled("avg_visitors"),
+        visitors_foreign_share=pooled("visitors_foreign_share"),
+        visitors_national_share=pooled("visitors_national_share"),
+        visitors_idf_share=pooled("visitors_idf_share"),
+        avg_duration_days=pooled("avg_duration_days"),
+    )
+
+    ceren = {place: row["categorie_ceren"] for place, row in _table(directory, "energie/lieux_ceren_correspondance.json").items()}
+    places = _table(directory, "energie/lieux_par_type_evenement.json")
+    building_types = {event_type: [ceren[place] for place in names if place in ceren] for event_type, names in places.items()}
+
+    communication = _table(directory, "communication/depenses_moyennes.json")
+    amenities = _table(directory, "amenagements_accueil/depenses_moyennes.json")
+    return Distributions(
+        subtypes=_table(directory, "general/types_evenements.json"),
+        profiles=profiles,
+        pooled_profile=pooled_profile,
+        building_types=building_types,
+        foreign_stays=_stays(
+            _table(directory, "hebergements/nuitees_internationaux.json"),
+            "sejour_des_visiteurs_internationaux_part_moyenne_qui_reside_chez_la_famille_ou_des_amis",
+        ),
+        national_stays=_stays(
+            _table(directory, "hebergements/nuitees_nationaux.json"),
+            "sejour_des_congressistes_internationaux_part_moyenne_qui_reside_chez_la_famille_ou_des_amis",
+        ),
+        stay_nights={row["type"]: row["duree_sejour_nuits"] for row in _table(directory, "hebergements/duree_sejour.json")},
+        communication_per_person={
+            row["type"]: row["depenses_moyennes_communication_personne_visiteurs_exposants"] for row in communication
+        },
+        site_rental={name: row["dépenses moyennes location site (€)"] for name, row in amenities.items()},
+        amenities_per_person={
+            name: row["dépenses moyennes aménagement (€/visiteur+exposant)"] for name, row in amenities.items()
+        },
+    )
+
+
+# ==================== TIRAGES ====================
+
+def _around(rng: random.Random, typical: float, sigma: float = 0.6) -> float:
+    """Tirage log-normal de médiane `typical`"""
+    return typical * math.exp(rng.gauss(0.0, sigma))
+
+
+def _shares(rng: random.Random, means: Sequence[float], concentration: float = SHARE_CONCENTRATION) -> List[float]:
+    """Parts (somme 1) tirées d'une loi de Dirichlet centrée sur `means`"""
+    draws = [rng.gammavariate(max(mean, 1e-3) * concentration, 1.0) for mean in means]
+    total = sum(draws)
+    return [draw / total for draw in draws]
+
+
+def _typical(table: Dict[str, float], subtype: str) -> float:
+    """Valeur du sous-type, médiane de la table s'il n'y figure pas"""
+    if subtype in table:
+        return table[subtype]
+    return median(table.values())
+
+
+def _pct(share: float) -> float:
+    return round(share * 100, 1)
+
+
+def _event_fields(rng: random.Random, dist: Distributions, index: int, event_type: str, subtype: str) -> Dict[str, Any]:
+    professional = event_type == PROFESSIONAL
+    profile = dist.profiles.get(subtype, dist.pooled_profile) if professional else dist.pooled_profile
+    if not profile.avg_visitors:
+        profile = dist.pooled_profile
+    duration = max(1, round(_around(rng, profile.avg_duration_days or dist.pooled_profile.avg_duration_days, 0.3)))
+    start = CORPUS_START + timedelta(days=rng.randrange(CORPUS_DAYS))
+    visitor_foreign, _, visitor_idf = _shares(rng, (
+        profile.visitors_foreign_share, profile.visitors_national_share, profile.visitors_idf_share,
+    ))
+    fields = {
+        "event_name": f"Événement synthétique {index}",
+        "event_type": event_type,
+        "event_subtype": subtype,
+        "event_duration_days": duration,
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=duration - 1)).isoformat(),
+        "total_visitors": max(1, int(_around(rng, profile.avg_visitors))),
+        "visitors_foreign_pct": _pct(visitor_foreign),
+        "visitors_idf_pct": _pct(visitor_idf),
+    }
+    if professional:
+        org_foreign, _, org_idf = _shares(rng, (
+            profile.organizations_foreign_share, profile.organizations_national_share, profile.organizations_idf_share,
+        ))
+        fields.update(
+            unknown_foreign_rate=rng.random() < UNKNOWN_RATE_PROBABILITY,
+            unknown_idf_rate=rng.random() < UNKNOWN_RATE_PROBABILITY,
+            exhibiting_organizations=int(_around(rng, profile.exhibiting_organizations or ORGANIZATIONS_MEDIAN)),
+            organizations_foreign_pct=_pct(org_foreign),
+            organizations_idf_pct=_pct(org_idf),
+            unknown_organizations_foreign_rate=rng.random() < UNKNOWN_RATE_PROBABILITY,
+            unknown_organizations_idf_rate=rng.random() < UNKNOWN_RATE_PROBABILITY,
+        )
+    else:
+        athletes_foreign, _, athletes_idf = _shares(rng, ATHLETES_SHARES)
+        fields.update(
+            athletes_artists_count=int(_around(rng, ATHLETES_MEDIAN, 1.0)),
+            athletes_artists_foreign_pct=_pct(athletes_foreign),
+            athletes_artists_idf_pct=_pct(athletes_idf),
+        )
+    fields["organizers_count"] = max(1, int(_around(rng, fields["total_visitors"] / 150, 0.5)))
+    return fields
+
+
+def _section_fields(rng: random.Random, dist: Distributions, event: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    event_type, subtype = event["event_type"], event["event_subtype"]
+    days = event["event_duration_days"]
+    visitors = event["total_visitors"]
+    exhibitors = event.get("athletes_artists_count", 0) or int(
+        event.get("exhibiting_organizations", 0) * DEFAULT_PERSONS_PER_EXHIBITOR_NATIONAL
+    )
+    participants = visitors + exhibitors + event["organizers_count"]
+    person_days = participants * days
+    sections = {}
+
+    if event_type in dist.building_types and rng.random() < 0.6:
+        sections["energy"] = {
+            "approach": "estimated",
+            "building_type": rng.choice(dist.building_types[event_type]),
+            "surface_m2": round(_around(rng, participants * 1.5 / days), 0),
+        }
+    else:
+        sections["energy"] = {
+            "approach": "real",
+            "electricity_kwh": round(_around(rng, person_days * 1.0), 1),
+            "gas_kwh": round(_around(rng, person_days * 0.8), 1) if rng.random() < 0.5 else 0.0,
+            "fuel_liters": round(_around(rng, days * 50), 1) if rng.random() < 0.1 else 0.0,
+        }
+    if event_type != PROFESSIONAL and rng.random() < 0.3:
+        sections["energy"].update(has_generators=True, generators_fuel_liters=round(_around(rng, days * 200), 1))
+
+    sections["transport"] = {
+        "visitors_avg_distance_foreign_km": round(_around(rng, 2500, 0.8), 0),
+        "visitors_avg_distance_national_km": round(_around(rng, 400, 0.5), 0),
+        "visitors_local_transport_expenses": round(visitors * _around(rng, 8, 0.4), 2),
+        "exhibitors_avg_distance_foreign_km": round(_around(rng, 2500, 0.8), 0),
+        "exhibitors_avg_distance_national_km": round(_around(rng, 400, 0.5), 0),
+        "exhibitors_local_transport_expenses": round(exhibitors * _around(rng, 12, 0.4), 2),
+        "organizers_avg_distance_km": round(_around(rng, 300, 0.8), 0),
+        "organizers_round_trips": event["organizers_count"] * rng.randint(1, 3),
+    }
+
+    meat, balanced, vegetarian = _shares(rng, (0.5, 0.3, 0.2))
+    sections["catering"] = {
+        "breakfasts_count": int(person_days * rng.uniform(0, 0.2)),
+        "lunches_count": int(person_days * rng.uniform(0.1, 0.6)),
+        "dinners_count": int(person_days * rng.uniform(0, 0.2)),
+        "snacks_count": int(person_days * rng.uniform(0.1, 0.8)),
+        "meals_meat_heavy_pct": _pct(meat),
+        "meals_balanced_pct": _pct(balanced),
+        "meals_vegetarian_pct": _pct(vegetarian),
+        "dishes_type": "reusable" if rng.random() < 0.4 else "disposable",
+        "water_liters": round(_around(rng, person_days * 0.5), 1),
+        "coffee_units": int(_around(rng, person_days * 0.8)),
+        "soft_drinks_units": int(_around(rng, person_days * 0.5)),
+        "alcohol_units": int(_around(rng, person_days * 0.2)),
+    }
+
+    accommodation = {}
+    nights = _typical(dist.stay_nights, subtype)
+    for prefix, stays in (("foreign", dist.foreign_stays), ("national", dist.national_stays)):
+        means = stays.get(subtype) or [median(row[i] for row in stays.values()) for i in range(5)]
+        hotel_5, hotel_3, hotel_1, other, family = _shares(rng, means, 50.0)
+        accommodation.update({
+            f"{prefix}_hotel_5star_pct": _pct(hotel_5),
+            f"{prefix}_hotel_3star_pct": _pct(hotel_3),
+            f"{prefix}_hotel_1star_pct": _pct(hotel_1),
+            f"{prefix}_other_accommodation_pct": _pct(other),
+            f"{prefix}_family_pct": _pct(family),
+            f"{prefix}_avg_nights": round(_around(rng, nights, 0.3), 1),
+        })
+    sections["accommodation"] = accommodation
+
+    waste_kg = _around(rng, person_days * 0.3)
+    waste_shares = _shares(rng, (0.3, 0.3, 0.15, 0.05, 0.05, 0.15))
+    sections["waste"] = {
+        field: round(waste_kg * share, 1)
+        for field, share in zip(
+            ("plastic_kg", "cardboard_kg", "paper_kg", "aluminum_kg", "textile_kg", "furniture_kg"), waste_shares
+        )
+    }
+
+    streaming = rng.random() < 0.3
+    sections["communication"] = {
+        "posters_count": int(_around(rng, visitors / 100)),
+        "flyers_count": int(_around(rng, visitors * 0.5)),
+        "banners_count": int(_around(rng, 10)),
+        "streaming_hours": round(_around(rng, days * 4), 1) if streaming else 0.0,
+        "streaming_audience": int(_around(rng, visitors * 0.2)) if streaming else 0,
+        "communication_expenses": round(participants * _around(rng, _typical(dist.communication_per_person, subtype)), 2),
+    }
+
+    sections["freight"] = {
+        "decor_weight_kg": round(_around(rng, participants * 0.5), 1),
+        "decor_distance_km": round(_around(rng, 300), 0),
+        "equipment_weight_kg": round(_around(rng, participants * 0.3), 1),
+        "equipment_distance_km": round(_around(rng, 300), 0),
+        "food_weight_kg": round(_around(rng, person_days * 0.3), 1),
+        "food_distance_km": round(_around(rng, 80), 0),
+    }
+
+    sections["amenities"] = {
+        "site_rental_expenses": round(_around(rng, _typical(dist.site_rental, subtype) / 10), 2),
+        "reception_expenses": round(participants * _around(rng, 10), 2),
+        "construction_expenses": round(participants * _around(rng, _typical(dist.amenities_per_person, subtype) / 10), 2),
+        "it_expenses": round(_around(rng, 5000, 1.0), 2),
+    }
+
+    sections["purchases"] = {
+        "goodies_expenses_per_person": round(_around(rng, 2, 0.8), 2) if rng.random() < 0.5 else 0.0,
+        "badges_visitors": int(visitors * rng.random()),
+        "badges_exhibitors": exhibitors,
+        "badges_organizers": event["organizers_count"],
+        "badges_type": rng.choice(tuple(BADGE_FACTORS)),
+    }
+    return {name: fields for name, fields in sections.items() if rng.random() < SECTION_PROBABILITY}
+
+
+def generate_row(dist: Distributions, seed: int, index: int) -> Dict[str, Any]:
+    """Événement de rang `index` du corpus `seed`, en colonnes d'import"""
+    rng = random.Random(f"{seed}:{index}")
+    event_type = rng.choices(tuple(EVENT_TYPE_WEIGHTS), weights=tuple(EVENT_TYPE_WEIGHTS.values()))[0]
+    subtype = rng.choice(dist.subtypes[event_type])
+    row = _event_fields(rng, dist, index, event_type, subtype)
+    for section, fields in _section_fields(rng, dist, row).items():
+        for field, value in fields.items():
+            row[f"{section}.{field}"] = value
+    return row
+
+
+def iter_rows(
+    count: int, seed: int = DEFAULT_SEED, start: int = 0, dist: Optional[Distributions] = None
+) -> Iterator[Dict[str, Any]]:
+    dist = dist or load_distributions()
+    for index in range(start, start + count):
+        yield generate_row(dist, seed, index)
+
+
+def synthetic_event_id(seed: int, index: int) -> str:
+    return str(uuid.uuid5(SYNTHETIC_NAMESPACE, f"{seed}:{index}"))
+
+
+def row_footprint(row: Dict[str, Any], event_id: str, general: GeneralHypotheses) -> EventFootprint:
+    """Footprint d'une ligne générée, champs dérivés calculés"""
+    event_fields, section_fields = split_row(row)
+    event = calculate_general_fields(EventGeneral(id=event_id, **event_fields), general)
+    sections = {
+        name: SECTION_MODELS[name](event_id=event_id, **fields) for name, fields in section_fields.items()
+    }
+    return EventFootprint(event=event, **sections)
+
+
+async def write_mongo(
+    repository, count: int, seed: int, start: int, general: GeneralHypotheses, batch_size: int = MONGO_BATCH_SIZE
+) -> int:
+    """
+    Insérer le corpus par lots ; les identifiants dépendent de (graine, rang),
+    une nouvelle exécution ne crée donc pas de doublons. Nombre d'insertions.
+    """
+    dist = load_distributions()
+    inserted = 0
+    for batch_start in range(start, start + count, batch_size):
+        batch_end = min(batch_start + batch_size, start + count)
+        # Génération hors de la boucle d'événements
+        footprints = await asyncio.to_thread(lambda: [
+            row_footprint(generate_row(dist, seed, index), synthetic_event_id(seed, index), general)
+            for index in range(batch_start, batch_end)
+        ])
+        failed = await repository.insert_footprints(footprints)
+        inserted += len(footprints) - len(failed)
+    return inserted
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Générer un corpus d'événements synthétiques")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--start", type=int, default=0, help="rang du premier événement (génération par tranches)")
+    parser.add_argument("--output", default="-", help="fichier NDJSON (- : sortie standard)")
+    parser.add_argument("--mongo", action="store_true", help="insérer dans MongoDB (MONGO_URL, DB_NAME)")
+    parser.add_argument("--batch-size", type=int, default=MONGO_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.mongo:
+        from dotenv import load_dotenv
+
+        from hypotheses_store import HypothesesStore
+        from repository import MongoEventRepository
+
+        load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+        repository = MongoEventRepository.from_url(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+        try:
+            await repository.ensure_indexes()
+            inserted = await write_mongo(
+                repository, args.count, args.seed, args.start, HypothesesStore().current.general, args.batch_size,
+            )
+        finally:
+            repository.close()
+        print(f"✓ {inserted}/{args.count} événements insérés", file=sys.stderr)
+        return
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for row in iter_rows(args.count, args.seed, args.start):
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,213 @@
+"""
+Propagation des incertitudes par Monte Carlo
+
+Les N tirages d'un événement sont calculés en une seule passe du moteur
+vectorisé : chaque ligne des colonnes est une copie de l'événement, et les
+facteurs d'émission forment une matrice (N, F) au lieu d'un vecteur.
+
+Distributions :
+  - facteurs d'émission : lognormale de médiane la valeur des hypothèses,
+    l'incertitude relative (intervalle à 95 %) étant fixée par facteur ;
+  - parts OTCP utilisées pour les taux inconnus : loi de Dirichlet sur
+    (étrangers, franciliens, nationaux) centrée sur les parts du profil, pour
+    que leur somme reste de 100 % ;
+  - répartition des repas (viande/équilibré/végétarien) : loi de Dirichlet
+    centrée sur la répartition saisie.
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from calculation_engine import PROFESSIONAL, GeneralHypotheses
+from emissions import CATEGORIES, EMISSION_CLASSES
+from factor_table import FACTOR_NAMES, FactorTable
+from models import DistributionSummary, UncertaintyResult
+from repository import EventFootprint
+from vectorized_engine import (
+    FactorVector,
+    columns_from_footprints,
+    compute_emissions,
+    compute_general_columns,
+    resolve_factor_vector,
+)
+
+DEFAULT_DRAWS = 10000
+MAX_DRAWS = 200000
+
+# Incertitude relative (demi-largeur de l'intervalle à 95 %) par facteur,
+# ordres de grandeur des incertitudes de la Base Carbone
+DEFAULT_FACTOR_UNCERTAINTY = 0.3
+FACTOR_UNCERTAINTY = {
+    "gas_kwh": 0.05,
+    "fuel_liter": 0.05,
+    "electricity_kwh": 0.1,
+    "coal_kg": 0.05,
+    "plane_long_haul": 0.2,
+    "plane_medium_haul": 0.2,
+    "plane_short_haul": 0.2,
+    "car_average": 0.2,
+    "train_average": 0.2,
+    "local_transport_euro_ratio": 0.5,
+    "breakfast": 0.5,
+    "snack": 0.5,
+    "meal_meat_heavy": 0.5,
+    "meal_balanced": 0.5,
+    "meal_vegetarian": 0.5,
+    "communication_ratio": 0.5,
+    "site_rental_ratio": 0.5,
+    "reception_ratio": 0.5,
+    "construction_ratio": 0.5,
+    "it_ratio": 0.5,
+    "goodies_ratio": 0.5,
+}
+# Intensités énergétiques des bâtiments (CEREN)
+BUILDING_UNCERTAINTY = 0.3
+
+# Concentration des lois de Dirichlet (parts OTCP et repas)
+OTCP_SHARE_CONCENTRATION = 30.0
+MEAL_MIX_CONCENTRATION = 50.0
+MEAL_FIELDS = ("meals_meat_heavy_pct", "meals_balanced_pct", "meals_vegetarian_pct")
+
+# Taux inconnus, par population : (colonne saisie, drapeau, attribut du profil
+# OTCP) des étrangers puis des franciliens ; les nationaux sont le reste
+OTCP_RATES = (
+    (
+        ("visitors_foreign_pct", "unknown_foreign_rate", "visitors_foreign_share"),
+        ("visitors_idf_pct", "unknown_idf_rate", "visitors_idf_share"),
+    ),
+    (
+        ("organizations_foreign_pct", "unknown_organizations_foreign_rate", "organizations_foreign_share"),
+        ("organizations_idf_pct", "unknown_organizations_idf_rate", "organizations_idf_share"),
+    ),
+)
+
+
+def _lognormal_sigma(relative_uncertainty: float) -> float:
+    """Écart-type du log tel que exp(±1.96 σ) couvre ±u autour de la médiane"""
+    return math.log1p(relative_uncertainty) / 1.96
+
+
+def sample_factor_vector(factors: FactorTable, draws: int, rng: np.random.Generator) -> FactorVector:
+    """Matrice (N, F) de facteurs tirés autour des valeurs centrales"""
+    central = resolve_factor_vector(factors)
+    sigmas = np.array(
+        [_lognormal_sigma(FACTOR_UNCERTAINTY.get(name, DEFAULT_FACTOR_UNCERTAINTY)) for name in FACTOR_NAMES]
+    )
+    values = central.values * rng.lognormal(0.0, sigmas, size=(draws, len(FACTOR_NAMES)))
+    # Un même aléa pour tous les types de bâtiments (même méthode d'estimation)
+    building = rng.lognormal(0.0, _lognormal_sigma(BUILDING_UNCERTAINTY), size=(draws, 1))
+    return FactorVector(
+        values=values,
+        building_types=central.building_types,
+        building_values=central.building_values * building,
+    )
+
+
+def _sample_mix(mix: np.ndarray, concentration: float, draws: int, rng: np.random.Generator) -> np.ndarray:
+    """Tirages (N, K) d'une répartition de Dirichlet centrée sur `mix` (somme 1) ; les parts nulles le restent"""
+    samples = np.zeros((draws, len(mix)))
+    nonzero = mix > 0
+    if np.count_nonzero(nonzero) > 1:
+        samples[:, nonzero] = rng.dirichlet(mix[nonzero] * concentration, size=draws)
+    else:
+        samples[:, nonzero] = 1.0
+    return samples
+
+
+def _sample_origin_shares(
+    profile_shares, entered_shares, unknown, draws: int, rng: np.random.Generator
+) -> List[np.ndarray]:
+    """
+    Parts (étrangers, franciliens) tirées pour les taux inconnus. La
+    répartition étrangers/franciliens/nationaux du profil est tirée d'un bloc ;
+    un taux inconnu à côté d'un taux saisi est borné par la part restante.
+    """
+    foreign, idf = (max(float(share), 0.0) for share in profile_shares)
+    mix = np.array([foreign, idf, max(1 - foreign - idf, 0.0)])
+    samples = _sample_mix(mix / mix.sum(), OTCP_SHARE_CONCENTRATION, draws, rng)
+    shares = []
+    for i in range(2):
+        if not unknown[i]:
+            shares.append(np.full(draws, entered_shares[i]))
+        elif unknown[1 - i]:
+            shares.append(samples[:, i])
+        else:
+            shares.append(np.minimum(samples[:, i], max(1 - entered_shares[1 - i], 0.0)))
+    return shares
+
+
+def sample_inputs(
+    footprint: EventFootprint, general: GeneralHypotheses, draws: int, rng: np.random.Generator
+) -> Dict[str, np.ndarray]:
+    """Colonnes de N copies de l'événement, avec tirage des parts OTCP et des repas"""
+    single = columns_from_footprints([footprint])
+    columns = {name: np.repeat(values, draws) for name, values in single.items()}
+    event = footprint.event
+
+    # Taux inconnus : les parts du profil OTCP deviennent des saisies tirées aléatoirement
+    if event.event_type == PROFESSIONAL:
+        profile = general.profile(event.event_subtype)
+        for rates in OTCP_RATES:
+            unknown = [getattr(event, unknown_field) for _, unknown_field, _ in rates]
+            if not any(unknown):
+                continue
+            shares = _sample_origin_shares(
+                [getattr(profile, share_attribute) for _, _, share_attribute in rates],
+                [getattr(event, pct_field) / 100 for pct_field, _, _ in rates],
+                unknown, draws, rng,
+            )
+            for (pct_field, unknown_field, _), share in zip(rates, shares):
+                columns[pct_field] = share * 100
+                columns[unknown_field] = np.zeros(draws, dtype=bool)
+
+    catering = footprint.catering
+    if catering:
+        mix = np.array([getattr(catering, field) for field in MEAL_FIELDS], dtype=float)
+        total_pct = mix.sum()
+        if total_pct > 0 and np.count_nonzero(mix) > 1:
+            samples = _sample_mix(mix / total_pct, MEAL_MIX_CONCENTRATION, draws, rng)
+            for i, field in enumerate(MEAL_FIELDS):
+                columns[field] = samples[:, i] * total_pct
+
+    columns.update(compute_general_columns(columns, general))
+    return columns
+
+
+def summarize(values: np.ndarray) -> DistributionSummary:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return DistributionSummary(
+        mean=float(values.mean()), std=float(values.std()), p5=float(p5), p50=float(p50), p95=float(p95)
+    )
+
+
+def run_uncertainty(
+    footprint: EventFootprint,
+    factors: FactorTable,
+    general: GeneralHypotheses,
+    central_total: float,
+    draws: int = DEFAULT_DRAWS,
+    seed: Optional[int] = None,
+) -> UncertaintyResult:
+    """Distribution du bilan d'un événement sur `draws` tirages"""
+    rng = np.random.default_rng(seed)
+    columns = sample_inputs(footprint, general, draws, rng)
+    result = compute_emissions(columns, sample_factor_vector(factors, draws, rng))
+
+    labels = [label for _, label in EMISSION_CLASSES] + ["G"]
+    classes, counts = np.unique(result.emission_class, return_counts=True)
+    frequencies = dict(zip(classes.tolist(), (counts / draws).tolist()))
+
+    return UncertaintyResult(
+        event_id=footprint.event.id,
+        event_name=footprint.event.event_name,
+        draws=draws,
+        seed=seed,
+        total_emissions_kg=central_total,
+        total=summarize(result.total_emissions_kg),
+        emissions_per_participant=summarize(result.emissions_per_participant),
+        emissions_by_category={
+            category: summarize(result.emissions_by_category[category]) for category in CATEGORIES
+        },
+        emission_class_probabilities={label: frequencies.get(label, 0.0) for label in labels},
+    )
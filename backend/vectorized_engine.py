@@ -0,0 +1,425 @@
+"""
+Moteur de calcul vectorisé (NumPy) pour les recalculs en masse
+
+Les événements sont fournis en colonnes : un tableau de longueur N par champ
+d'entrée (total_visitors, gas_kwh, lunches_count, ...). La table compilée des
+facteurs est résolue une seule fois en un vecteur dense, puis chaque catégorie
+est calculée par opérations vectorielles. Les résultats reproduisent ceux des
+fonctions calculate_*_emissions de emissions.py (aux arrondis flottants près).
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from calculation_engine import (
+    ATHLETES_ARTISTS_TYPES,
+    DEFAULT_GENERAL_HYPOTHESES,
+    DEFAULT_PROFILE,
+    PROFESSIONAL,
+    GeneralHypotheses,
+)
+from emissions import CATEGORIES, EMISSION_CLASSES, NATIONAL_CAR_SHARE, NATIONAL_TRAIN_SHARE
+from factor_table import BADGE_FACTORS, FACTOR_NAMES, FactorTable
+
+# Sections optionnelles d'un événement (une colonne booléenne has_<section> chacune)
+SECTIONS = (
+    "energy", "transport", "catering", "accommodation", "waste",
+    "communication", "freight", "amenities", "purchases",
+)
+
+FACTOR_INDEX = {name: i for i, name in enumerate(FACTOR_NAMES)}
+
+# Types de badges saisis et facteurs associés (un type inconnu retombe sur le premier)
+BADGE_TYPES = tuple(BADGE_FACTORS)
+BADGE_FACTOR_NAMES = tuple(BADGE_FACTORS.values())
+
+# Seuils des classes d'émission (kgCO2e/participant)
+CLASS_THRESHOLDS = np.array([threshold for threshold, _ in EMISSION_CLASSES], dtype=float)
+CLASS_LABELS = np.array([label for _, label in EMISSION_CLASSES] + ["G"])
+
+NUMERIC_EVENT_FIELDS = (
+    "event_duration_days", "total_visitors", "visitors_foreign_pct", "visitors_idf_pct",
+    "exhibiting_organizations", "organizations_foreign_pct", "organizations_idf_pct",
+    "athletes_artists_count", "athletes_artists_foreign_pct", "athletes_artists_idf_pct",
+    "organizers_count",
+)
+BOOLEAN_EVENT_FIELDS = (
+    "unknown_foreign_rate", "unknown_idf_rate",
+    "unknown_organizations_foreign_rate", "unknown_organizations_idf_rate",
+)
+CALCULATED_EVENT_FIELDS = (
+    "calculated_visitors_foreign", "calculated_visitors_national_non_idf", "calculated_visitors_idf",
+    "calculated_exhibitors_foreign", "calculated_exhibitors_national", "calculated_exhibitors_idf",
+    "calculated_total_exhibitors", "calculated_total_foreign", "calculated_total_national",
+    "calculated_total_idf",
+)
+
+# Champs numériques de chaque section
+SECTION_FIELDS = {
+    "energy": ("gas_kwh", "fuel_liters", "electricity_kwh", "coal_kg", "surface_m2", "generators_fuel_liters"),
+    "transport": (
+        "visitors_avg_distance_foreign_km", "visitors_avg_distance_national_km", "visitors_local_transport_expenses",
+        "exhibitors_avg_distance_foreign_km", "exhibitors_avg_distance_national_km", "exhibitors_local_transport_expenses",
+        "organizers_avg_distance_km", "organizers_round_trips",
+    ),
+    "catering": (
+        "breakfasts_count", "lunches_count", "dinners_count", "snacks_count",
+        "meals_meat_heavy_pct", "meals_balanced_pct", "meals_vegetarian_pct",
+        "water_liters", "coffee_units", "soft_drinks_units", "alcohol_units",
+    ),
+    "accommodation": (
+        "foreign_hotel_5star_pct", "foreign_hotel_3star_pct", "foreign_hotel_1star_pct",
+        "foreign_other_accommodation_pct", "foreign_family_pct", "foreign_avg_nights",
+        "national_hotel_5star_pct", "national_hotel_3star_pct", "national_hotel_1star_pct",
+        "national_other_accommodation_pct", "national_family_pct", "national_avg_nights",
+    ),
+    "waste": ("plastic_kg", "cardboard_kg", "paper_kg", "aluminum_kg", "textile_kg", "furniture_kg"),
+    "communication": (
+        "posters_count", "flyers_count", "banners_count",
+        "streaming_hours", "streaming_audience", "communication_expenses",
+    ),
+    "freight": (
+        "decor_weight_kg", "decor_distance_km", "equipment_weight_kg",
+        "equipment_distance_km", "food_weight_kg", "food_distance_km",
+    ),
+    "amenities": ("site_rental_expenses", "reception_expenses", "construction_expenses", "it_expenses"),
+    "purchases": ("goodies_expenses_per_person", "badges_visitors", "badges_exhibitors", "badges_organizers"),
+}
+
+# Champs catégoriels (chaînes) et booléens des sections
+CATEGORICAL_FIELDS = {
+    "event": ("event_type", "event_subtype"),
+    "energy": ("approach", "building_type"),
+    "catering": ("dishes_type",),
+    "purchases": ("badges_type",),
+}
+BOOLEAN_SECTION_FIELDS = {"energy": ("has_generators",)}
+
+
+@dataclass(frozen=True)
+class FactorVector:
+    """Facteurs d'émission résolus en tableaux denses"""
+    values: np.ndarray            # (F,) ou (N, F), indexé par FACTOR_INDEX
+    building_types: Tuple[str, ...]
+    building_values: np.ndarray   # (B + 1,) ou (N, B + 1) : chauffage + élec. + clim. ; dernier = repli
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[..., FACTOR_INDEX[name]]
+
+
+def resolve_factor_vector(factors: FactorTable) -> FactorVector:
+    """Résoudre une fois pour toutes la table compilée en vecteur dense"""
+    values = np.array([getattr(factors, name) for name in FACTOR_NAMES], dtype=float)
+    building_types = tuple(factors.building_intensity)
+    building_values = np.array(
+        list(factors.building_intensity.values()) + [factors.building_fallback], dtype=float
+    )
+    return FactorVector(values=values, building_types=building_types, building_values=building_values)
+
+
+@dataclass
+class VectorizedResult:
+    """Résultats d'un lot de N événements"""
+    emissions_by_category: Dict[str, np.ndarray]
+    total_emissions_kg: np.ndarray
+    total_participants: np.ndarray
+    emissions_per_participant: np.ndarray
+    emission_class: np.ndarray
+
+
+def columns_from_footprints(footprints: Iterable) -> Dict[str, np.ndarray]:
+    """Convertir une liste d'EventFootprint en colonnes NumPy (sections absentes = 0)"""
+    footprints = list(footprints)
+    columns = {}
+
+    events = [footprint.event for footprint in footprints]
+    for field in NUMERIC_EVENT_FIELDS + CALCULATED_EVENT_FIELDS:
+        columns[field] = np.array([getattr(event, field) or 0 for event in events], dtype=float)
+    for field in BOOLEAN_EVENT_FIELDS:
+        columns[field] = np.array([getattr(event, field) for event in events], dtype=bool)
+    columns["event_type"] = np.array([event.event_type for event in events], dtype=object)
+    columns["event_subtype"] = np.array([event.event_subtype for event in events], dtype=object)
+
+    for section in SECTIONS:
+        docs = [getattr(footprint, section) for footprint in footprints]
+        columns[f"has_{section}"] = np.array([doc is not None for doc in docs], dtype=bool)
+        for field in SECTION_FIELDS[section]:
+            columns[field] = np.array([(getattr(doc, field) or 0) if doc else 0 for doc in docs], dtype=float)
+        for field in BOOLEAN_SECTION_FIELDS.get(section, ()):
+            columns[field] = np.array([bool(doc and getattr(doc, field)) for doc in docs], dtype=bool)
+        for field in CATEGORICAL_FIELDS.get(section, ()):
+            columns[field] = np.array([getattr(doc, field) if doc else None for doc in docs], dtype=object)
+    return columns
+
+
+def compute_general_columns(
+    columns: Dict[str, np.ndarray], general: GeneralHypotheses = DEFAULT_GENERAL_HYPOTHESES
+) -> Dict[str, np.ndarray]:
+    """Version vectorisée de calculate_general_fields (champs calculated_*)"""
+    total_visitors = columns["total_visitors"]
+    event_type = columns["event_type"]
+    professional = event_type == PROFESSIONAL
+    athletes_artists = np.isin(event_type.astype(str), ATHLETES_ARTISTS_TYPES)
+
+    # Profils OTCP par ligne (sous-type inconnu ou non professionnel -> profil par défaut)
+    keys = tuple(general.profiles)
+    profiles = list(general.profiles.values()) + [DEFAULT_PROFILE]
+    codes = _encode(columns["event_subtype"], keys, len(keys))
+    codes = np.where(professional, codes, len(keys))
+
+    def profile_share(attribute: str) -> np.ndarray:
+        return np.array([getattr(profile, attribute) for profile in profiles], dtype=float)[codes]
+
+    visitors_foreign_share = np.where(
+        professional & columns["unknown_foreign_rate"],
+        profile_share("visitors_foreign_share"),
+        columns["visitors_foreign_pct"] / 100,
+    )
+    visitors_idf_share = np.where(
+        professional & columns["unknown_idf_rate"],
+        profile_share("visitors_idf_share"),
+        columns["visitors_idf_pct"] / 100,
+    )
+    visitors_foreign = np.trunc(total_visitors * visitors_foreign_share)
+    visitors_idf = np.trunc(total_visitors * visitors_idf_share)
+    visitors_national = total_visitors - visitors_foreign - visitors_idf
+
+    # Événements professionnels : organisations exposantes
+    organizations = columns["exhibiting_organizations"]
+    org_foreign_share = np.where(
+        columns["unknown_organizations_foreign_rate"],
+        profile_share("organizations_foreign_share"),
+        columns["organizations_foreign_pct"] / 100,
+    )
+    org_idf_share = np.where(
+        columns["unknown_organizations_idf_rate"],
+        profile_share("organizations_idf_share"),
+        columns["organizations_idf_pct"] / 100,
+    )
+    pro_foreign = np.trunc(organizations * org_foreign_share * general.persons_per_exhibitor_foreign)
+    pro_national = np.trunc(
+        organizations * (1 - org_foreign_share - org_idf_share) * general.persons_per_exhibitor_national
+    )
+    pro_idf = np.trunc(organizations * org_idf_share * general.persons_per_exhibitor_national)
+
+    # Événements culturels et sportifs : sportifs/artistes
+    athletes = columns["athletes_artists_count"]
+    athletes_foreign_pct = columns["athletes_artists_foreign_pct"]
+    athletes_idf_pct = columns["athletes_artists_idf_pct"]
+    art_foreign = np.trunc(athletes * (athletes_foreign_pct / 100))
+    art_idf = np.trunc(athletes * (athletes_idf_pct / 100))
+    art_national = np.trunc(athletes * ((100 - athletes_foreign_pct - athletes_idf_pct) / 100))
+
+    exhibitors_foreign = np.select([professional, athletes_artists], [pro_foreign, art_foreign], 0.0)
+    exhibitors_idf = np.select([professional, athletes_artists], [pro_idf, art_idf], 0.0)
+    exhibitors_national = np.select([professional, athletes_artists], [pro_national, art_national], 0.0)
+
+    return {
+        "calculated_visitors_foreign": visitors_foreign,
+        "calculated_visitors_national_non_idf": visitors_national,
+        "calculated_visitors_idf": visitors_idf,
+        "calculated_exhibitors_foreign": exhibitors_foreign,
+        "calculated_exhibitors_national": exhibitors_national,
+        "calculated_exhibitors_idf": exhibitors_idf,
+        "calculated_total_exhibitors": exhibitors_foreign + exhibitors_national + exhibitors_idf,
+        "calculated_total_foreign": visitors_foreign + exhibitors_foreign,
+        "calculated_total_national": visitors_national + exhibitors_national,
+        "calculated_total_idf": visitors_idf + exhibitors_idf,
+    }
+
+
+def _encode(values: np.ndarray, vocabulary: Tuple[str, ...], unknown: int) -> np.ndarray:
+    """Codes entiers d'une colonne catégorielle (valeur inconnue -> `unknown`)"""
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    positions = {name: i for i, name in enumerate(vocabulary)}
+    codes = np.array([positions.get(name, unknown) for name in uniques], dtype=np.intp)
+    return codes[inverse.reshape(-1)]
+
+
+def _pick(table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Sélectionner table[code] par ligne, pour une table (K,) ou (N, K)"""
+    if table.ndim == 1:
+        return table[codes]
+    return np.take_along_axis(table, codes[:, None], axis=1)[:, 0]
+
+
+def _plane_factor(distance: np.ndarray, f: FactorVector) -> np.ndarray:
+    return np.where(
+        distance > 3000, f["plane_long_haul"],
+        np.where(distance > 1000, f["plane_medium_haul"], f["plane_short_haul"]),
+    )
+
+
+def energy_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    real = (
+        c["gas_kwh"] * f["gas_kwh"]
+        + c["fuel_liters"] * f["fuel_liter"]
+        + c["electricity_kwh"] * f["electricity_kwh"]
+        + c["coal_kg"] * f["coal_kg"]
+    )
+    building_type = c["building_type"]
+    has_building = building_type.astype(bool) & (c["surface_m2"] != 0)
+    codes = _encode(building_type, f.building_types, unknown=len(f.building_types))
+    estimated = c["surface_m2"] * (c["event_duration_days"] / 365) * _pick(f.building_values, codes)
+
+    total = np.where(c["approach"] == "real", real, np.where(has_building, estimated, 0.0))
+    return total + np.where(c["has_generators"], c["generators_fuel_liters"] * f["fuel_liter"], 0.0)
+
+
+def transport_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    national_factor = f["car_average"] * NATIONAL_CAR_SHARE + f["train_average"] * NATIONAL_TRAIN_SHARE
+    total = np.zeros_like(c["total_visitors"])
+
+    for people, distance in (
+        (c["calculated_visitors_foreign"], c["visitors_avg_distance_foreign_km"]),
+        (c["calculated_exhibitors_foreign"], c["exhibitors_avg_distance_foreign_km"]),
+    ):
+        total = total + np.where(
+            (distance > 0) & (people > 0), people * distance * 2 * _plane_factor(distance, f), 0.0
+        )
+    for people, distance in (
+        (c["calculated_visitors_national_non_idf"], c["visitors_avg_distance_national_km"]),
+        (c["calculated_exhibitors_national"], c["exhibitors_avg_distance_national_km"]),
+    ):
+        total = total + np.where((distance > 0) & (people > 0), people * distance * 2 * national_factor, 0.0)
+
+    organizers = c["organizers_count"]
+    distance = c["organizers_avg_distance_km"]
+    total = total + np.where(
+        (distance > 0) & (organizers > 0),
+        organizers * distance * c["organizers_round_trips"] * f["car_average"],
+        0.0,
+    )
+
+    local_ratio = f["local_transport_euro_ratio"]
+    return total + c["visitors_local_transport_expenses"] * local_ratio + c["exhibitors_local_transport_expenses"] * local_ratio
+
+
+def catering_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    meal_factor = (
+        (c["meals_meat_heavy_pct"] / 100) * f["meal_meat_heavy"]
+        + (c["meals_balanced_pct"] / 100) * f["meal_balanced"]
+        + (c["meals_vegetarian_pct"] / 100) * f["meal_vegetarian"]
+    )
+    total = (
+        c["breakfasts_count"] * f["breakfast"]
+        + c["snacks_count"] * f["snack"]
+        + (c["lunches_count"] + c["dinners_count"]) * meal_factor
+        + c["water_liters"] * f["water_liter"]
+        + c["coffee_units"] * f["coffee_unit"]
+        + c["soft_drinks_units"] * f["soft_drink_unit"]
+        + c["alcohol_units"] * f["alcohol_unit"]
+    )
+
+    meals = c["breakfasts_count"] + c["lunches_count"] + c["dinners_count"]
+    disposable = meals * f["dishes_disposable_meal"] + c["snacks_count"] * f["dishes_disposable_snack"]
+    reusable = (meals + c["snacks_count"]) * f["dishes_reusable"]
+    return total + np.where(c["dishes_type"] == "disposable", disposable, reusable)
+
+
+def accommodation_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    total = np.zeros_like(c["total_visitors"])
+    for group, people in (
+        ("foreign", c["calculated_visitors_foreign"]),
+        ("national", c["calculated_visitors_national_non_idf"]),
+    ):
+        nights = c[f"{group}_avg_nights"]
+        emissions = np.zeros_like(total)
+        for kind, factor in (
+            ("hotel_5star", "hotel_5star"),
+            ("hotel_3star", "hotel_3star"),
+            ("hotel_1star", "hotel_1star"),
+            ("other_accommodation", "other_accommodation"),
+        ):
+            pct = c[f"{group}_{kind}_pct"]
+            emissions = emissions + np.where(pct > 0, people * nights * (pct / 100) * f[factor], 0.0)
+        total = total + np.where((people > 0) & (nights > 0), emissions, 0.0)
+    return total
+
+
+def waste_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    return (
+        c["plastic_kg"] * f["waste_plastic"]
+        + c["cardboard_kg"] * f["waste_cardboard"]
+        + c["paper_kg"] * f["waste_paper"]
+        + c["aluminum_kg"] * f["waste_aluminum"]
+        + c["textile_kg"] * f["waste_textile"]
+        + c["furniture_kg"] * f["waste_furniture"]
+    )
+
+
+def communication_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    hours = c["streaming_hours"]
+    audience = c["streaming_audience"]
+    streaming = np.where(
+        (hours > 0) & (audience > 0), hours * audience / 1000 * f["streaming_hour_per_1000"], 0.0
+    )
+    return (
+        c["posters_count"] * f["poster"]
+        + c["flyers_count"] * f["flyer"]
+        + c["banners_count"] * f["banner"]
+        + streaming
+        + c["communication_expenses"] * f["communication_ratio"]
+    )
+
+
+def freight_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    total = np.zeros_like(c["total_visitors"])
+    for kind in ("decor", "equipment", "food"):
+        weight = c[f"{kind}_weight_kg"]
+        total = total + np.where(weight > 0, (weight / 1000) * c[f"{kind}_distance_km"] * f["truck_tkm"], 0.0)
+    return total
+
+
+def amenities_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    return (
+        c["site_rental_expenses"] * f["site_rental_ratio"]
+        + c["reception_expenses"] * f["reception_ratio"]
+        + c["construction_expenses"] * f["construction_ratio"]
+        + c["it_expenses"] * f["it_ratio"]
+    )
+
+
+def purchases_emissions(c: Dict[str, np.ndarray], f: FactorVector) -> np.ndarray:
+    people = c["total_visitors"] + c["calculated_total_exhibitors"]
+    goodies = people * c["goodies_expenses_per_person"] * f["goodies_ratio"]
+
+    badge_table = np.stack([f[name] for name in BADGE_FACTOR_NAMES], axis=-1)
+    badge_factor = _pick(badge_table, _encode(c["badges_type"], BADGE_TYPES, unknown=0))
+    badges = c["badges_visitors"] + c["badges_exhibitors"] + c["badges_organizers"]
+    return goodies + badges * badge_factor
+
+
+CATEGORY_FUNCTIONS = {
+    "Énergie": ("energy", energy_emissions),
+    "Transport": ("transport", transport_emissions),
+    "Restauration": ("catering", catering_emissions),
+    "Hébergements": ("accommodation", accommodation_emissions),
+    "Déchets": ("waste", waste_emissions),
+    "Communication": ("communication", communication_emissions),
+    "Fret": ("freight", freight_emissions),
+    "Aménagements": ("amenities", amenities_emissions),
+    "Achats et goodies": ("purchases", purchases_emissions),
+}
+
+
+def compute_emissions(columns: Dict[str, np.ndarray], factors: FactorVector) -> VectorizedResult:
+    """Calculer toutes les catégories, le total et la classe d'émission de N événements"""
+    emissions_by_category = {}
+    for category in CATEGORIES:
+        section, function = CATEGORY_FUNCTIONS[category]
+        emissions_by_category[category] = np.where(columns[f"has_{section}"], function(columns, factors), 0.0)
+
+    total = sum(emissions_by_category.values())
+    participants = columns["total_visitors"] + columns["calculated_total_exhibitors"] + columns["organizers_count"]
+    per_participant = np.divide(total, participants, out=np.zeros_like(total), where=participants > 0)
+    emission_class = CLASS_LABELS[np.searchsorted(CLASS_THRESHOLDS, per_participant, side="right")]
+
+    return VectorizedResult(
+        emissions_by_category=emissions_by_category,
+        total_emissions_kg=total,
+        total_participants=participants,
+        emissions_per_participant=per_participant,
+        emission_class=emission_class,
+    )
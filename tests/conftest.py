@@ -0,0 +1,30 @@
+"""
+Les tests importent les modules de backend/ comme le serveur (depuis backend/).
+Le serveur utilise le dépôt en mémoire : aucun MongoDB n'est nécessaire.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("EVENT_REPOSITORY", "memory")
+
+
+@pytest.fixture
+def client():
+    """Client de l'API sur un dépôt en mémoire vide, caches vidés"""
+    from fastapi.testclient import TestClient
+
+    import server
+    from incremental_engine import IncrementalEngine
+    from repository import InMemoryEventRepository
+    from result_cache import ResultCache
+
+    server.repository = InMemoryEventRepository()
+    server.result_cache = ResultCache()
+    server.incremental_engine = IncrementalEngine()
+    with TestClient(server.app) as test_client:
+        yield test_client
@@ -0,0 +1,39 @@
+"""Calcul par lots (python -m batch_compute) sur un fichier NDJSON"""
+import argparse
+import asyncio
+import io
+import json
+
+from batch_compute import InvalidRow, iter_ndjson_rows, run
+from hypotheses_snapshot import HYPOTHESES_DIR
+
+ROW = {"event_name": "Festival", "event_type": "Autre", "event_duration_days": 2, "total_visitors": 300,
+       "catering.lunches_count": 100}
+
+
+def test_unreadable_ndjson_lines_become_invalid_rows():
+    data = b'{"event_name": "A"}\n\n{"event_name": \n[1, 2]\n\xff\n'
+    rows = list(iter_ndjson_rows(io.BytesIO(data)))
+    assert [number for number, _ in rows] == [1, 3, 4, 5]
+    assert rows[0][1] == {"event_name": "A"}
+    assert all(isinstance(row, InvalidRow) for _, row in rows[1:])
+
+
+def test_malformed_line_is_reported_without_stopping_the_run(tmp_path):
+    source = tmp_path / "evenements.ndjson"
+    lines = [json.dumps(ROW), '{"event_name": "tronqué"', json.dumps({**ROW, "event_name": "Salon"})]
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    output = tmp_path / "bilans.ndjson"
+    args = argparse.Namespace(
+        input=str(source), mongo=False, event_type=None, output=str(output), workers=1, chunk_size=2,
+        checkpoint=None, resume=False, hypotheses=str(HYPOTHESES_DIR),
+    )
+
+    summary = asyncio.run(run(args))
+
+    assert summary["events"] == 3
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [result["row"] for result in results] == [1, 2, 3]
+    assert results[1]["errors"][0].startswith("JSON invalide")
+    assert results[0]["event_name"] == "Festival" and results[2]["event_name"] == "Salon"
+    assert not (tmp_path / "bilans.ndjson.checkpoint").exists()
@@ -0,0 +1,78 @@
+"""Champs dérivés du module Général et index des profils OTCP"""
+from calculation_engine import (
+    DEFAULT_GENERAL_HYPOTHESES,
+    DEFAULT_PROFILE,
+    build_general_hypotheses,
+    calculate_general_fields,
+)
+from models import EventGeneral
+
+OTCP_ROW = {
+    "id": "salon_test",
+    "Données évènements professionnels": "Salon test",
+    "% visiteurs étrangers": 0.2,
+    "% visiteurs IDF": 0.3,
+    "% entreprises étrangères": 0.4,
+    "% entreprises IDF": 0.1,
+}
+GENERAL = build_general_hypotheses({"general": {
+    "otcp": [OTCP_ROW],
+    "personnes_par_exposant": [
+        {"id": "nationale", "nombre_personnes_par_entreprise_exposante": 5},
+        {"id": "etrangere", "nombre_personnes_par_entreprise_exposante": 4},
+    ],
+}})
+
+
+def professional_event(**fields) -> EventGeneral:
+    return EventGeneral(**{
+        "event_name": "Salon", "event_type": "Evenement_professionnel", "event_subtype": "salon_test",
+        "event_duration_days": 3, "total_visitors": 1000, "exhibiting_organizations": 100, **fields,
+    })
+
+
+def test_profiles_are_indexed_by_id_and_label():
+    profile = GENERAL.profile("salon_test")
+    assert GENERAL.profile("Salon test") is profile
+    assert profile.visitors_national_share == 1 - 0.2 - 0.3
+    assert GENERAL.profile("inconnu") is DEFAULT_PROFILE
+    assert GENERAL.profile(None) is DEFAULT_PROFILE
+
+
+def test_unknown_rates_use_the_subtype_profile():
+    event = calculate_general_fields(professional_event(
+        unknown_foreign_rate=True, unknown_idf_rate=True,
+        unknown_organizations_foreign_rate=True, unknown_organizations_idf_rate=True,
+    ), GENERAL)
+    assert event.calculated_visitors_foreign == 200
+    assert event.calculated_visitors_idf == 300
+    assert event.calculated_visitors_national_non_idf == 500
+    assert event.calculated_exhibitors_foreign == 160     # 100 * 40% * 4
+    assert event.calculated_exhibitors_idf == 50          # 100 * 10% * 5
+    assert event.calculated_exhibitors_national == 250    # 100 * 50% * 5
+
+
+def test_known_rates_ignore_the_profile():
+    event = calculate_general_fields(professional_event(visitors_foreign_pct=10, visitors_idf_pct=50), GENERAL)
+    assert event.calculated_visitors_foreign == 100
+    assert event.calculated_visitors_idf == 500
+
+
+def test_unknown_subtype_falls_back_to_defaults():
+    event = calculate_general_fields(
+        professional_event(event_subtype="inconnu", unknown_foreign_rate=True), DEFAULT_GENERAL_HYPOTHESES,
+    )
+    assert event.calculated_visitors_foreign == int(1000 * DEFAULT_PROFILE.visitors_foreign_share)
+
+
+def test_preview_resolves_the_profile_from_the_label(client):
+    import server
+
+    profile = server.hypotheses_store.current.general.profile("Salon professionnel international")
+    response = client.post("/api/events/preview", json={
+        "event_name": "Salon", "event_type": "Evenement_professionnel",
+        "event_subtype": "Salon professionnel international", "event_duration_days": 4,
+        "total_visitors": 10000, "unknown_foreign_rate": True,
+    })
+    assert response.status_code == 200
+    assert response.json()["calculated_visitors_foreign"] == int(10000 * profile.visitors_foreign_share)
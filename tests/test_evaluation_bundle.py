@@ -0,0 +1,65 @@
+"""Bundle d'évaluation : GET /api/hypotheses/bundle, ETag et rechargement"""
+import json
+import shutil
+
+import pytest
+
+import evaluation_bundle
+from hypotheses_snapshot import HYPOTHESES_DIR
+from hypotheses_store import HypothesesStore
+
+
+def test_bundle_is_served_with_an_etag(client):
+    response = client.get("/api/hypotheses/bundle")
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    bundle = response.json()
+    assert bundle["version_id"] == client.get("/api/hypotheses/version").json()["version_id"]
+
+
+@pytest.mark.parametrize("if_none_match", [
+    "{etag}",
+    "W/{etag}",
+    '"autre", {etag}',
+    "*",
+])
+def test_matching_if_none_match_gives_304(client, if_none_match):
+    etag = client.get("/api/hypotheses/bundle").headers["ETag"]
+    response = client.get("/api/hypotheses/bundle", headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_other_etag_gives_the_body(client):
+    response = client.get("/api/hypotheses/bundle", headers={"If-None-Match": 'W/"autre"'})
+    assert response.status_code == 200
+    assert response.json()["format"] == evaluation_bundle.BUNDLE_FORMAT
+
+
+def test_reload_changes_the_etag(client, monkeypatch, tmp_path):
+    import server
+
+    directory = tmp_path / "hypotheses"
+    shutil.copytree(HYPOTHESES_DIR, directory)
+    monkeypatch.setattr(server, "hypotheses_store", HypothesesStore(directory))
+    monkeypatch.setattr(server, "ADMIN_TOKEN", None)
+    before = client.get("/api/hypotheses/bundle")
+
+    path = directory / "energie" / "combustibles.json"
+    table = json.loads(path.read_text(encoding="utf-8"))
+    table["data"]["Gaz"]["emissions"] *= 2
+    path.write_text(json.dumps(table, ensure_ascii=False), encoding="utf-8")
+    assert client.post("/api/admin/hypotheses/reload").json()["changed"]
+
+    after = client.get("/api/hypotheses/bundle", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.json()["factors"]["gas_kwh"] == 2 * before.json()["factors"]["gas_kwh"]
+
+
+def test_bundle_holds_every_value_the_engine_reads(client):
+    bundle = client.get("/api/hypotheses/bundle").json()
+    vectors = client.get("/api/hypotheses/bundle/conformance").json()
+    assert vectors["version_id"] == bundle["version_id"]
+    assert evaluation_bundle.self_consistency_failures(bundle, vectors) == []
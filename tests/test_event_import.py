@@ -0,0 +1,83 @@
+"""Import CSV/XLSX : lecture des fichiers et POST /api/events/import"""
+import io
+
+import pytest
+
+from event_import import ImportFormatError, iter_csv_rows
+
+HEADER = "event_name;event_type;event_duration_days;total_visitors;catering.lunches_count"
+
+
+def test_csv_rows_utf8_with_bom():
+    data = ("\ufeff" + HEADER + "\nFête;Autre;2;1000;12\n").encode("utf-8")
+    rows = list(iter_csv_rows(io.BytesIO(data)))
+    assert rows == [{"event_name": "Fête", "event_type": "Autre", "event_duration_days": "2",
+                     "total_visitors": "1000", "catering.lunches_count": "12"}]
+
+
+def test_csv_rows_fall_back_to_windows_1252():
+    data = (HEADER + "\nSalon;Autre;2;1000;0\nFête de l'été – Œuvre;Autre;1;10;0\n").encode("cp1252")
+    rows = list(iter_csv_rows(io.BytesIO(data)))
+    assert rows[1]["event_name"] == "Fête de l'été – Œuvre"
+
+
+def test_csv_rows_reject_undecodable_bytes():
+    data = HEADER.encode() + b"\n\x81\x8d;Autre;1;10;0\n"
+    with pytest.raises(ImportFormatError):
+        list(iter_csv_rows(io.BytesIO(data)))
+
+
+def post_file(client, data: bytes, **params):
+    return client.post("/api/events/import", content=data, params=params, headers={"Content-Type": "text/csv"})
+
+
+def test_import_route_reports_row_errors(client):
+    data = (HEADER + "\nFête;Autre;2;1000;12\nSans durée;Autre;;10;0\nMauvais;Autre;1;10;-\n").encode("cp1252")
+    report = post_file(client, data).json()
+    assert report["rows"] == 3
+    assert report["imported"] == 1
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+
+    events = client.get("/api/events").json()
+    assert [event["event_name"] for event in events] == ["Fête"]
+    assert events[0]["calculated_visitors_national_non_idf"] == 1000
+    assert client.get(f"/api/catering/{events[0]['id']}").json()["lunches_count"] == 12
+
+
+def test_import_route_dry_run_writes_nothing(client):
+    report = post_file(client, (HEADER + "\nFête;Autre;2;1000;12\n").encode(), dry_run="true").json()
+    assert report["imported"] == 1 and report["dry_run"]
+    assert client.get("/api/events").json() == []
+
+
+@pytest.mark.parametrize("data", [
+    b"event_name;inconnu\nA;1\n",
+    b"event_type\nAutre\n",
+    HEADER.encode() + b"\n\x81\x8d;Autre;1;10;0\n",
+])
+def test_import_route_rejects_unreadable_files(client, data):
+    assert post_file(client, data).status_code == 400
+
+
+def test_import_route_checks_the_encoding_before_writing(client):
+    # Windows-1252 valide sur 2 500 lignes, puis un octet sans caractère (0x81)
+    rows = "".join(f"Fête {i};Autre;1;10;0\n" for i in range(2500)).encode("cp1252")
+    response = post_file(client, HEADER.encode() + b"\n" + rows + b"Salon \x81;Autre;1;10;0\n")
+    assert response.status_code == 400
+    assert "Encodage" in response.json()["detail"]
+    assert client.get("/api/events").json() == []
+
+
+def test_import_route_reads_xlsx(client):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER.split(";"))
+    sheet.append(["Salon", "Autre", 3, 500, 40])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    report = client.post("/api/events/import", content=buffer.getvalue(), params={"filename": "evenements.xlsx"}).json()
+    assert report["imported"] == 1
+    assert client.get("/api/events").json()[0]["total_visitors"] == 500
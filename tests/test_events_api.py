@@ -0,0 +1,61 @@
+"""Création et liste paginée des événements (POST/GET /api/events)"""
+import base64
+import json
+
+import pytest
+
+
+def event_payload(name: str, **fields) -> dict:
+    return {"event_name": name, "event_type": "Salon", "event_duration_days": 2, "total_visitors": 1000, **fields}
+
+
+def test_create_event_calculates_derived_fields(client):
+    response = client.post("/api/events", json=event_payload("Salon A", visitors_foreign_pct=10))
+    assert response.status_code == 200
+    event = response.json()
+    assert event["id"]
+    assert event["calculated_visitors_foreign"] == 100
+
+
+def test_list_events_pages_with_cursor(client):
+    ids = [client.post("/api/events", json=event_payload(f"Salon {i}")).json()["id"] for i in range(5)]
+
+    first = client.get("/api/events", params={"limit": 2})
+    assert first.status_code == 200
+    assert [event["id"] for event in first.json()] == ids[:2]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/api/events", params={"limit": 2, "cursor": cursor})
+    assert [event["id"] for event in second.json()] == ids[2:4]
+
+    last = client.get("/api/events", params={"limit": 2, "cursor": second.headers["X-Next-Cursor"]})
+    assert [event["id"] for event in last.json()] == ids[4:]
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_list_events_default_page_returns_everything(client):
+    for i in range(3):
+        client.post("/api/events", json=event_payload(f"Salon {i}"))
+    response = client.get("/api/events")
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_events_projects_fields(client):
+    client.post("/api/events", json=event_payload("Salon A"))
+    event = client.get("/api/events", params={"fields": "event_name"}).json()[0]
+    assert set(event) == {"id", "created_at", "event_name"}
+
+
+def test_list_events_rejects_unknown_field_and_bad_cursor(client):
+    assert client.get("/api/events", params={"fields": "event_name,nope"}).status_code == 400
+    assert client.get("/api/events", params={"cursor": "pas-un-curseur"}).status_code == 400
+    assert client.get("/api/events", params={"limit": 1001}).status_code == 422
+
+
+@pytest.mark.parametrize("position", [[1, 2], [None, "x"], ["2024-01-01"], {"id": "x"}])
+def test_list_events_rejects_malformed_cursor(client, position):
+    client.post("/api/events", json=event_payload("Salon A"))
+    cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+    response = client.get("/api/events", params={"cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+from deduplicate import deduplicate
+from models import EnergyData
+from repository import ARCHIVE_COLLECTION, MongoEventRepository
+
+
+def make_repository() -> MongoEventRepository:
+    repository = MongoEventRepository(AsyncMongoMockClient()["tests"])
+    repository.use_lookup = False
+    return repository
+
+
+async def insert_duplicates(repository: MongoEventRepository):
+    # Anciennes écritures : deux sections energy pour le même événement
+    await repository.db.energy.insert_one({"id": "a", "event_id": "e1", "approach": "real", "gas_kwh": 1.0})
+    await repository.db.energy.insert_one({"id": "b", "event_id": "e1", "approach": "real", "gas_kwh": 2.0})
+    await repository.db.energy.insert_one({"id": "c", "event_id": "e2", "approach": "real", "gas_kwh": 3.0})
+
+
+def test_ensure_indexes_keeps_duplicates():
+    async def scenario():
+        repository = make_repository()
+        await insert_duplicates(repository)
+        await repository.ensure_indexes()
+        assert await repository.db.energy.count_documents({}) == 3
+        assert await repository.db[ARCHIVE_COLLECTION].count_documents({}) == 0
+        indexes = await repository.db.energy.index_information()
+        assert "event_id_unique" not in indexes
+        # Les autres index sont créés
+        assert "id_unique" in await repository.db.events.index_information()
+
+    asyncio.run(scenario())
+
+
+def test_deduplicate_archives_all_but_oldest():
+    async def scenario():
+        repository = make_repository()
+        await insert_duplicates(repository)
+        assert await deduplicate(repository, dry_run=True) == 1
+        assert await repository.db.energy.count_documents({}) == 3
+
+        assert await deduplicate(repository) == 1
+        remaining = await repository.db.energy.find({"event_id": "e1"}).to_list(None)
+        assert [doc["id"] for doc in remaining] == ["a"]
+        archived = await repository.db[ARCHIVE_COLLECTION].find({}).to_list(None)
+        assert len(archived) == 1
+        assert archived[0]["collection"] == "energy"
+        assert archived[0]["key"] == "e1"
+        assert archived[0]["kept"] == remaining[0]["_id"]
+        assert archived[0]["document"]["id"] == "b"
+
+        assert "event_id_unique" in await repository.db.energy.index_information()
+        with pytest.raises(DuplicateKeyError):
+            await repository.db.energy.insert_one({"id": "d", "event_id": "e2", "approach": "real"})
+
+    asyncio.run(scenario())
+
+
+def test_save_section_upsert_keeps_id_and_created_at():
+    async def scenario():
+        repository = make_repository()
+        await repository.ensure_indexes()
+        first = await repository.save_section("energy", EnergyData(event_id="e1", approach="real", gas_kwh=1.0))
+        second = await repository.save_section("energy", EnergyData(event_id="e1", approach="real", gas_kwh=5.0))
+        assert second.id == first.id
+        assert second.created_at == first.created_at
+        assert second.gas_kwh == 5.0
+        assert await repository.db.energy.count_documents({"event_id": "e1"}) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+"""Calcul en direct du formulaire : WebSocket /api/ws/live"""
+EVENT = {
+    "event_name": "Salon", "event_type": "Evenement_professionnel", "event_subtype": "Salon professionnel national",
+    "event_duration_days": 2, "total_visitors": 1000, "visitors_foreign_pct": 10, "visitors_idf_pct": 50,
+}
+
+
+def test_initial_state_then_only_changed_values(client):
+    with client.websocket_connect("/api/ws/live") as websocket:
+        state = websocket.receive_json()
+        assert state["type"] == "state" and state["event_id"]
+        assert state["summary"]["total_emissions_kg"] == 0
+        assert set(state["derived"]) >= {"calculated_visitors_foreign", "calculated_total_exhibitors"}
+
+        websocket.send_json({"section": "event", "fields": EVENT, "seq": 1})
+        update = websocket.receive_json()
+        assert update["type"] == "update" and update["seq"] == 1
+        assert update["derived"]["calculated_visitors_foreign"] == 100
+        assert update["derived"]["calculated_visitors_national_non_idf"] == 400
+
+        websocket.send_json({"section": "catering", "fields": {"lunches_count": 500}, "seq": 2})
+        update = websocket.receive_json()
+        assert update["derived"] == {}
+        assert list(update["categories"]) == ["Restauration"]
+        assert update["summary"]["total_emissions_kg"] > 0
+
+
+def test_invalid_messages_get_error_frames(client):
+    with client.websocket_connect("/api/ws/live") as websocket:
+        websocket.receive_json()
+
+        websocket.send_json({"section": "event", "fields": {"total_visitors": "beaucoup"}, "seq": 1})
+        error = websocket.receive_json()
+        assert error["type"] == "error" and error["seq"] == 1
+        assert error["errors"][0]["loc"] == ["total_visitors"]
+
+        websocket.send_json({"section": "inconnue", "fields": {}, "seq": 2})
+        assert websocket.receive_json()["detail"] == "Section inconnue: inconnue"
+
+        websocket.send_text("{pas du json")
+        assert websocket.receive_json() == {"type": "error", "detail": "JSON invalide"}
+
+        # La session reste utilisable après une erreur
+        websocket.send_json({"section": "event", "fields": EVENT, "seq": 3})
+        assert websocket.receive_json()["type"] == "update"
+
+
+def test_resumes_a_saved_event(client):
+    event_id = client.post("/api/events", json=EVENT).json()["id"]
+    with client.websocket_connect(f"/api/ws/live?event_id={event_id}") as websocket:
+        state = websocket.receive_json()
+        assert state["event_id"] == event_id
+        assert state["derived"]["calculated_visitors_foreign"] == 100
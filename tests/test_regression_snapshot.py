@@ -0,0 +1,8 @@
+"""Les deux moteurs reproduisent le snapshot de non-régression figé"""
+from regression_snapshot import load_corpus
+from regression_snapshot.__main__ import run
+
+
+def test_engines_reproduce_the_snapshot():
+    report = run(load_corpus(), repeat=1)
+    assert report["failures"] == {}
@@ -0,0 +1,165 @@
+"""
+Contrat de EventRepository, vérifié sur les deux implémentations : en mémoire
+et MongoDB (mongomock-motor, index uniques créés)
+"""
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from models import CateringData, EnergyData, EventGeneral
+from repository import EventFootprint, EventRepository, InMemoryEventRepository, MongoEventRepository
+
+
+async def memory_repository() -> EventRepository:
+    return InMemoryEventRepository()
+
+
+async def mongo_repository() -> EventRepository:
+    repository = MongoEventRepository(AsyncMongoMockClient()["tests"])
+    # $lookup avec localField + pipeline non pris en charge par mongomock
+    repository.use_lookup = False
+    await repository.ensure_indexes()
+    return repository
+
+
+@pytest.fixture(params=[memory_repository, mongo_repository], ids=["memory", "mongo"])
+def run(request):
+    """Exécuter un scénario asynchrone sur un dépôt neuf"""
+    def runner(scenario):
+        async def main():
+            return await scenario(await request.param())
+        return asyncio.run(main())
+    return runner
+
+
+def make_event(name: str, **fields) -> EventGeneral:
+    return EventGeneral(**{
+        "event_name": name, "event_type": "Autre", "event_duration_days": 1, "total_visitors": 100, **fields,
+    })
+
+
+def make_footprint(name: str, **fields) -> EventFootprint:
+    event = make_event(name, **fields)
+    return EventFootprint(
+        event=event,
+        energy=EnergyData(event_id=event.id, approach="real", gas_kwh=10),
+        catering=CateringData(event_id=event.id, lunches_count=5),
+    )
+
+
+def test_repository_is_abstract():
+    with pytest.raises(TypeError):
+        EventRepository()
+
+
+def test_get_many_keeps_request_order_and_omits_missing(run):
+    async def scenario(repository):
+        footprints = [make_footprint(f"E{i}") for i in range(3)]
+        assert await repository.insert_footprints(footprints) == {}
+        ids = [footprints[2].event.id, "absent", footprints[0].event.id]
+        docs = await repository.get_many(ids)
+        assert list(docs) == [ids[0], ids[2]]
+        event_doc, sections = docs[ids[0]]
+        assert event_doc["event_name"] == "E2"
+        assert sections["energy"]["gas_kwh"] == 10
+        assert sections["transport"] is None
+        assert "_id" not in event_doc and "_id" not in sections["energy"]
+
+    run(scenario)
+
+
+def test_save_section_replaces_and_keeps_id(run):
+    async def scenario(repository):
+        event = await repository.insert_event(make_event("E"))
+        first = await repository.save_section("energy", EnergyData(event_id=event.id, approach="real", gas_kwh=1))
+        second = await repository.save_section("energy", EnergyData(event_id=event.id, approach="real", gas_kwh=2))
+        assert second.id == first.id
+        assert second.created_at == first.created_at
+        stored = await repository.get_section("energy", event.id)
+        assert stored["gas_kwh"] == 2 and stored["id"] == first.id
+
+    run(scenario)
+
+
+def test_upsert_many_counts_created_documents(run):
+    async def scenario(repository):
+        events = [make_event(f"E{i}") for i in range(3)]
+        assert await repository.upsert_many("events", events) == 3
+        renamed = events[0].model_copy(update={"event_name": "Renommé"})
+        assert await repository.upsert_many("events", [renamed, make_event("E3")]) == 1
+        stored = await repository.get_event(events[0].id)
+        assert stored["event_name"] == "Renommé"
+        assert stored["created_at"] == events[0].created_at.isoformat()
+
+        sections = [CateringData(event_id=event.id, lunches_count=1) for event in events]
+        assert await repository.upsert_many("catering", sections) == 3
+        replacement = CateringData(event_id=events[1].id, lunches_count=7)
+        assert await repository.upsert_many("catering", [replacement]) == 0
+        stored = await repository.get_section("catering", events[1].id)
+        assert stored["lunches_count"] == 7 and stored["id"] == sections[1].id
+
+    run(scenario)
+
+
+def test_insert_footprints_reports_rejected_rows(run):
+    async def scenario(repository):
+        existing = make_footprint("Existant")
+        await repository.insert_event(existing.event)
+        # Section orpheline : l'événement qui la réclame est refusé
+        conflicting = make_footprint("Section en conflit")
+        await repository.save_section("catering", CateringData(event_id=conflicting.event.id, lunches_count=1))
+
+        batch = [make_footprint("A"), existing, conflicting, make_footprint("B")]
+        failed = await repository.insert_footprints(batch)
+        assert sorted(failed) == [1, 2]
+        assert failed[2].startswith("catering")
+
+        assert await repository.get_event(conflicting.event.id) is None
+        assert await repository.get_section("energy", conflicting.event.id) is None
+        # La section existante n'est pas touchée
+        assert (await repository.get_section("catering", conflicting.event.id))["lunches_count"] == 1
+        assert await repository.get_section("energy", existing.event.id) is None
+        for footprint in (batch[0], batch[3]):
+            assert (await repository.get_footprint(footprint.event.id)).catering.lunches_count == 5
+
+    run(scenario)
+
+
+def test_iter_footprints_filters_and_loads_sections(run):
+    async def scenario(repository):
+        footprints = [make_footprint(f"E{i}", event_type="Autre" if i % 2 else "Evenement_culturel") for i in range(5)]
+        await repository.insert_footprints(footprints)
+
+        async def get_many(event_ids):
+            raise AssertionError("événements déjà lus par iter_events")
+
+        repository.get_many = get_many
+        loaded = [footprint async for footprint in repository.iter_footprints({"event_type": "Autre"}, batch_size=1)]
+        assert [footprint.event.event_name for footprint in loaded] == ["E1", "E3"]
+        assert all(footprint.energy.gas_kwh == 10 and footprint.waste is None for footprint in loaded)
+
+    run(scenario)
+
+
+def test_list_events_pages_and_projects(run):
+    async def scenario(repository):
+        for i in range(3):
+            await repository.insert_event(make_event(f"E{i}"))
+        page, cursor = await repository.list_events(2, fields=["event_name"])
+        assert [set(doc) for doc in page] == [{"id", "created_at", "event_name"}] * 2
+        rest, end = await repository.list_events(2, cursor)
+        assert [doc["event_name"] for doc in page + rest] == ["E0", "E1", "E2"]
+        assert end is None
+        with pytest.raises(ValueError):
+            await repository.list_events(2, "pas-un-curseur")
+
+    run(scenario)
+
+
+def test_get_footprint_of_missing_event(run):
+    async def scenario(repository):
+        assert await repository.get_footprint("absent") is None
+        assert await repository.get_footprint_docs("absent") is None
+
+    run(scenario)
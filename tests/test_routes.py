@@ -0,0 +1,61 @@
+"""Routes principales de l'API sur le dépôt en mémoire"""
+import csv
+import io
+import json
+
+import pytest
+
+EVENT = {
+    "event_name": "Festival", "event_type": "Evenement_culturel", "event_duration_days": 3,
+    "total_visitors": 2000, "visitors_foreign_pct": 10, "visitors_idf_pct": 60,
+}
+
+
+@pytest.fixture
+def event_id(client):
+    return client.post("/api/events", json=EVENT).json()["id"]
+
+
+def test_get_event(client, event_id):
+    response = client.get(f"/api/events/{event_id}")
+    assert response.status_code == 200
+    assert response.json()["event_name"] == "Festival"
+    assert client.get("/api/events/absent").status_code == 404
+
+
+def test_section_is_replaced_on_each_save(client, event_id):
+    assert client.get(f"/api/energy/{event_id}").status_code == 404
+    first = client.post("/api/energy", json={"event_id": event_id, "approach": "real", "gas_kwh": 100}).json()
+    second = client.post("/api/energy", json={"event_id": event_id, "approach": "real", "gas_kwh": 250}).json()
+    assert second["id"] == first["id"]
+    stored = client.get(f"/api/energy/{event_id}").json()
+    assert stored["gas_kwh"] == 250
+
+
+def test_calculate_follows_section_updates(client, event_id):
+    empty = client.get(f"/api/calculate/{event_id}").json()
+    assert empty["total_emissions_kg"] == 0
+    client.post("/api/catering", json={"event_id": event_id, "lunches_count": 1000})
+    result = client.get(f"/api/calculate/{event_id}").json()
+    assert result["emissions_by_category"]["Restauration"] > 0
+    assert result["total_emissions_kg"] == pytest.approx(sum(result["emissions_by_category"].values()))
+    assert client.get("/api/calculate/absent").status_code == 404
+
+
+def test_batch_streams_results_in_request_order(client, event_id):
+    other_id = client.post("/api/events", json={**EVENT, "event_name": "Autre"}).json()["id"]
+    client.post("/api/catering", json={"event_id": other_id, "lunches_count": 10})
+    response = client.post("/api/calculate/batch", json={"event_ids": [other_id, "absent", event_id, other_id]})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["event_id"] for line in lines] == [other_id, "absent", event_id]
+    assert lines[1]["error"]
+    assert lines[0] == client.get(f"/api/calculate/{other_id}").json()
+
+
+def test_export_csv_filters_events(client, event_id):
+    client.post("/api/events", json={**EVENT, "event_name": "Salon", "event_type": "Autre"})
+    response = client.get("/api/export", params={"format": "csv", "event_type": "Evenement_culturel"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+    assert [row["id"] for row in rows] == [event_id]
+    assert rows[0]["event_name"] == "Festival"
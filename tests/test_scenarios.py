@@ -0,0 +1,69 @@
+"""Grilles de scénarios : POST /api/calculate/{event_id}/scenarios"""
+import json
+
+import pytest
+
+EVENT = {"event_name": "Congrès", "event_type": "Evenement_culturel", "event_duration_days": 2, "total_visitors": 500}
+
+
+@pytest.fixture
+def event_id(client):
+    event_id = client.post("/api/events", json=EVENT).json()["id"]
+    client.post("/api/catering", json={"event_id": event_id, "lunches_count": 400})
+    return event_id
+
+
+def post_grid(client, event_id, body: str):
+    return client.post(
+        f"/api/calculate/{event_id}/scenarios", content=body, headers={"Content-Type": "application/json"},
+    )
+
+
+def test_grid_evaluates_every_variant(client, event_id):
+    response = client.post(f"/api/calculate/{event_id}/scenarios", json={"grid": {
+        "catering.lunches_count": [0, 400],
+        "catering.dishes_type": ["disposable", "reusable"],
+    }})
+    assert response.status_code == 200
+    result = response.json()
+    assert len(result["values"]) == len(result["total_emissions_kg"]) == 4
+    base = client.get(f"/api/calculate/{event_id}").json()
+    assert result["base_total_emissions_kg"] == pytest.approx(base["total_emissions_kg"])
+    # Variantes dans l'ordre du produit cartésien ; la 3e reprend la base
+    assert result["values"][2] == [400, "disposable"]
+    assert result["total_emissions_kg"][2] == pytest.approx(base["total_emissions_kg"])
+    assert result["total_emissions_kg"][0] < result["total_emissions_kg"][2]
+
+
+def test_overrides_are_converted_to_the_field_type(client, event_id):
+    response = client.post(f"/api/calculate/{event_id}/scenarios", json={"variants": [
+        {"event.unknown_foreign_rate": "false", "catering.lunches_count": 300.0},
+        {"event.unknown_foreign_rate": False, "catering.lunches_count": 300},
+    ]})
+    assert response.status_code == 200
+    first, second = response.json()["total_emissions_kg"]
+    assert first == second
+
+
+def test_values_echo_the_converted_overrides(client, event_id):
+    result = client.post(f"/api/calculate/{event_id}/scenarios", json={"grid": {
+        "catering.lunches_count": ["12", 300.0],
+        "catering.meals_vegetarian_pct": ["1e1"],
+        "event.unknown_foreign_rate": ["false"],
+    }}).json()
+    assert result["values"] == [[12, 10.0, False], [300, 10.0, False]]
+
+
+@pytest.mark.parametrize("override", [
+    '{"catering.lunches_count": [2.5]}',
+    '{"catering.meals_vegetarian_pct": [NaN]}',
+    '{"catering.meals_vegetarian_pct": [Infinity]}',
+    '{"catering.meals_vegetarian_pct": ["inf"]}',
+    '{"event.unknown_foreign_rate": ["peut-être"]}',
+    '{"catering.dishes_type": [3]}',
+    '{"catering.nope": [1]}',
+])
+def test_invalid_overrides_are_rejected(client, event_id, override):
+    response = post_grid(client, event_id, '{"grid": %s}' % override)
+    assert response.status_code == 400
+    assert json.loads(override).popitem()[0] in response.json()["detail"]
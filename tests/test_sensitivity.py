@@ -0,0 +1,44 @@
+"""Analyse de sensibilité : GET /api/calculate/{event_id}/sensitivity"""
+import pytest
+
+EVENT = {
+    "event_name": "Salon", "event_type": "Evenement_professionnel",
+    "event_subtype": "Salon professionnel international", "event_duration_days": 3,
+    "total_visitors": 10000, "visitors_foreign_pct": 20, "visitors_idf_pct": 50,
+    "exhibiting_organizations": 200, "organizations_foreign_pct": 30, "organizations_idf_pct": 40,
+}
+TRANSPORT = {
+    "visitors_avg_distance_foreign_km": 1500, "visitors_avg_distance_national_km": 400,
+    "exhibitors_avg_distance_foreign_km": 2000, "exhibitors_avg_distance_national_km": 300,
+}
+
+
+@pytest.fixture
+def event_id(client):
+    event_id = client.post("/api/events", json=EVENT).json()["id"]
+    client.post("/api/transport", json={"event_id": event_id, **TRANSPORT})
+    return event_id
+
+
+def test_derivatives_reach_raw_form_fields(client, event_id):
+    result = client.get(f"/api/calculate/{event_id}/sensitivity").json()
+    items = {item["name"]: item for item in result["items"]}
+
+    assert result["total_emissions_kg"] == pytest.approx(client.get(f"/api/calculate/{event_id}").json()["total_emissions_kg"])
+    for name in ("event.total_visitors", "event.visitors_foreign_pct", "event.exhibiting_organizations",
+                 "event.organizations_foreign_pct"):
+        assert items[name]["derivative"] != 0
+    assert not any(name.startswith("event.calculated_") for name in items)
+
+
+def test_foreign_share_derivative_matches_a_finite_difference(client, event_id):
+    derivative = next(
+        item["derivative"] for item in client.get(f"/api/calculate/{event_id}/sensitivity").json()["items"]
+        if item["name"] == "event.visitors_foreign_pct"
+    )
+    # +1 point de visiteurs étrangers : 100 visiteurs passent de la France à l'étranger
+    before = client.get(f"/api/calculate/{event_id}").json()["total_emissions_kg"]
+    other_id = client.post("/api/events", json={**EVENT, "visitors_foreign_pct": 21}).json()["id"]
+    client.post("/api/transport", json={"event_id": other_id, **TRANSPORT})
+    after = client.get(f"/api/calculate/{other_id}").json()["total_emissions_kg"]
+    assert derivative == pytest.approx(after - before)
@@ -0,0 +1,55 @@
+"""Monte Carlo : GET /api/calculate/{event_id}/uncertainty et tirage des parts"""
+import numpy as np
+import pytest
+
+from calculation_engine import build_general_hypotheses
+from hypotheses_loader import load_all_hypotheses
+from models import EventGeneral
+from repository import EventFootprint
+from uncertainty import sample_inputs
+
+EVENT = {
+    "event_name": "Congrès", "event_type": "Evenement_professionnel", "event_subtype": "Congrès international",
+    "event_duration_days": 3, "total_visitors": 2000, "exhibiting_organizations": 100,
+    "unknown_foreign_rate": True, "unknown_idf_rate": True,
+    "unknown_organizations_foreign_rate": True, "unknown_organizations_idf_rate": True,
+}
+
+
+@pytest.fixture
+def event_id(client):
+    event_id = client.post("/api/events", json=EVENT).json()["id"]
+    client.post("/api/transport", json={
+        "event_id": event_id, "visitors_avg_distance_foreign_km": 3000, "visitors_avg_distance_national_km": 400,
+    })
+    return event_id
+
+
+def test_seed_makes_draws_reproducible(client, event_id):
+    params = {"draws": 500, "seed": 7}
+    first = client.get(f"/api/calculate/{event_id}/uncertainty", params=params)
+    assert first.status_code == 200
+    assert client.get(f"/api/calculate/{event_id}/uncertainty", params=params).json() == first.json()
+    other = client.get(f"/api/calculate/{event_id}/uncertainty", params={"draws": 500, "seed": 8}).json()
+    assert other["total"] != first.json()["total"]
+    assert first.json()["total"]["p5"] > 0
+
+
+@pytest.mark.parametrize("fields", [
+    {},
+    # Taux francilien saisi : la part étrangère tirée est bornée par le reste
+    {"unknown_idf_rate": False, "visitors_idf_pct": 90, "unknown_organizations_foreign_rate": False,
+     "organizations_foreign_pct": 95},
+])
+def test_sampled_shares_never_exceed_the_whole(fields):
+    general = build_general_hypotheses(load_all_hypotheses())
+    footprint = EventFootprint(event=EventGeneral(**{**EVENT, **fields}))
+    columns = sample_inputs(footprint, general, 5000, np.random.default_rng(0))
+
+    for prefix in ("visitors", "organizations"):
+        foreign, idf = columns[f"{prefix}_foreign_pct"], columns[f"{prefix}_idf_pct"]
+        assert (foreign >= 0).all() and (idf >= 0).all()
+        assert (foreign + idf <= 100 + 1e-9).all()
+    for column in ("calculated_visitors_foreign", "calculated_visitors_idf", "calculated_visitors_national_non_idf",
+                   "calculated_exhibitors_foreign", "calculated_exhibitors_idf", "calculated_exhibitors_national"):
+        assert (columns[column] >= 0).all(), column